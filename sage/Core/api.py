@@ -1,6 +1,12 @@
-from openai import OpenAI
+from types import SimpleNamespace
 from rich.console import Console
-from .env_util import get_api_key, get_model
+from .backends import get_backend
+from .config import get_settings
+from .env_util import get_backend_api_key, get_model, get_fallback_models, get_hedge_deadline
+from .hedge import hedged_completion
+from .scheduler import endpoint_key, get_scheduler
+from .bench import rank_models
+from .prompt_layout import PromptLayout, cache_stats
 import json
 import os
 from pathlib import Path
@@ -10,14 +16,21 @@ console = Console()
 
 class OpenRouterClient:
     def __init__(self):
-        self.api_key = get_api_key()
+        self.backend = get_backend()
+        # Local and mock backends run without a key, but still send one when it is set
+        self.api_key = get_backend_api_key(self.backend)
+        # MODEL=auto is resolved to the fastest healthy model of the latest `sage bench-models` run
         self.model = get_model()
+        self.fallback_models = get_fallback_models()
+        if get_settings().rank_fallbacks:
+            self.fallback_models = rank_models(self.fallback_models)
+        self.hedge_deadline = get_hedge_deadline()
         self.client = None
         self._initialize_client()
     
     def _initialize_client(self):
-        """Initialize the OpenRouter client"""
-        if not self.api_key:
+        """Initialize the client for the configured backend"""
+        if self.backend.requires_api_key and not self.api_key:
             console.print("[red]x Error: API_KEY not found in .env file[/red]")
             return
         
@@ -25,15 +38,18 @@ class OpenRouterClient:
             console.print("[red]x Error: MODEL not found in .env file[/red]")
             return
             
-        self.client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=self.api_key,
-        )
+        self.client = self.backend.create_client(self.api_key)
     
+    def close(self):
+        """Close the backend client and its connection pool"""
+        if self.client is not None and hasattr(self.client, "close"):
+            self.client.close()
+        self.client = None
+
     def _send_request(self, messages: list) -> Optional[str]:
-        """Send request to OpenRouter and return response"""
+        """Send request to the configured backend and return response"""
         if not self.client:
-            console.print("[red]x Error: OpenRouter client not initialized[/red]")
+            console.print("[red]x Error: AI client not initialized[/red]")
             return None
         
         try:
@@ -47,18 +63,20 @@ class OpenRouterClient:
                 # console.print(f"[white]Content: {content}[/white]")
                 # console.print("[cyan]---[/cyan]")
             
-            completion = self.client.chat.completions.create(
-                extra_headers={
-                    "HTTP-Referer": "https://your-site.com",
-                    "X-Title": "Your App Name",
-                },
-                model=self.model,
-                messages=messages,
-                temperature=0.7,
-                top_p=0.8,
-                max_tokens=10000,
+            # Primary model first, then the configured fallback chain without repeats
+            chain = [self.model] + [m for m in self.fallback_models if m != self.model]
+            ai_response, used_model = hedged_completion(
+                lambda model, cancel: get_scheduler().submit(
+                    lambda: self._create_stream(model, messages),
+                    model=model,
+                    key=endpoint_key(self.backend.base_url, self.api_key),
+                    cancel=cancel,
+                ),
+                chain,
+                self.hedge_deadline,
             )
-            ai_response = completion.choices[0].message.content
+            if used_model != self.model:
+                console.print(f"[dim]Answered by fallback model {used_model}[/dim]")
             
             # Print what's received from the AI
             # console.print("\n[green]=== RECEIVED FROM AI ===[/green]")
@@ -76,21 +94,66 @@ class OpenRouterClient:
             # Re-raise the exception to stop the process
             raise e
 
-def single_step_ai_processing(interface_data: dict, user_prompt: str, system_prompt: str) -> str:
-    """Single-step processing function with interface data"""
-    client = OpenRouterClient()
-    
-    # Combine interface data with user prompt
-    full_user_content = f"""Project Interface:
-{json.dumps(interface_data, indent=2)}
+    def _create_stream(self, model: str, messages: list):
+        """Open a streaming completion for one model in the chain"""
+        params = dict(
+            model=model,
+            messages=self.backend.prepare_messages(messages),
+            temperature=0.7,
+            top_p=0.8,
+            max_tokens=10000,
+            **self.backend.request_options(json_mode=True),
+        )
+        if self.backend.supports_streaming:
+            if self.backend.stream_usage:
+                # The final chunk then carries usage, including cached prompt tokens
+                params["stream_options"] = {"include_usage": True}
+            return _UsageStream(model, self.client.chat.completions.create(stream=True, **params))
+        # Backends without streaming answer in one piece; present it as a single chunk
+        completion = self.client.chat.completions.create(**params)
+        if getattr(completion, "usage", None):
+            cache_stats.record(model, completion.usage)
+        content = completion.choices[0].message.content or ""
+        return iter([SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])])
 
-User Request:
-{user_prompt}"""
+class _UsageStream:
+    """
+    Pass chunks through, recording prompt-cache usage from the chunk that carries it.
+    Unlike a generator, close() works while another thread is blocked reading, so a
+    cancelled hedge attempt can drop its connection at once.
+    """
+
+    def __init__(self, model: str, stream):
+        self.model = model
+        self.stream = stream
+        self.chunks = iter(stream)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        chunk = next(self.chunks)
+        if getattr(chunk, "usage", None):
+            cache_stats.record(self.model, chunk.usage)
+        return chunk
+
+    def close(self):
+        if hasattr(self.stream, "close"):
+            self.stream.close()
+
+def single_step_ai_processing(interface_data: dict, user_prompt: str, system_prompt: str,
+                              client: Optional[OpenRouterClient] = None,
+                              layout: Optional[PromptLayout] = None) -> str:
+    """Single-step processing function with interface data"""
+    client = client or OpenRouterClient()
+    layout = layout or PromptLayout(system_prompt)
     
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": full_user_content}
-    ]
+    # System prompt and interface snapshot first so they form a cacheable prefix
+    messages = layout.messages(
+        interface_data,
+        [{"role": "user", "content": f"User Request:\n{user_prompt}"}],
+        client.model,
+    )
     
     final_response = client._send_request(messages)
     
@@ -99,12 +162,18 @@ User Request:
     else:
         raise Exception("AI processing failed - no response from API")
 
+def send_messages(messages: list, client: Optional[OpenRouterClient] = None) -> str:
+    """Send prebuilt messages (e.g. from a PromptLayout) and return the reply text"""
+    client = client or OpenRouterClient()
+    return client._send_request(messages) or "{}"
+
 # Legacy function for backward compatibility
-def send_to_openrouter(system_prompt: str, user_prompt: str) -> str:
+def send_to_openrouter(system_prompt: str, user_prompt: str,
+                       client: Optional[OpenRouterClient] = None) -> str:
     """
     Send prompt to OpenRouter AI using OpenAI client.
     """
-    client = OpenRouterClient()
+    client = client or OpenRouterClient()
     
     messages = []
     if system_prompt:
@@ -0,0 +1,200 @@
+import json
+import os
+import time
+from types import SimpleNamespace
+from typing import Optional
+
+from rich.console import Console
+from .config import get_settings
+
+console = Console()
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+LOCAL_BASE_URL = "http://localhost:8080/v1"
+
+
+class Backend:
+    """An inference endpoint: where requests go, how long they may take, what it supports."""
+
+    name = "base"
+    requires_api_key = True
+    # Whether the endpoint honors cache_control hints on message parts
+    cache_hints = False
+    # Per-backend defaults; REQUEST_TIMEOUT, CONNECT_TIMEOUT, MAX_CONNECTIONS, STREAMING and JSON_MODE override them
+    default_timeout = 120.0
+    default_connect_timeout = 10.0
+    default_max_connections = 20
+    default_streaming = True
+    default_json_mode = False
+
+    def __init__(self, base_url: str, timeout: Optional[float] = None, connect_timeout: Optional[float] = None,
+                 max_connections: Optional[int] = None, supports_streaming: Optional[bool] = None,
+                 supports_json_mode: Optional[bool] = None, supports_prompt_cache: Optional[bool] = None,
+                 stream_usage: bool = True):
+        self.base_url = base_url
+        self.timeout = self.default_timeout if timeout is None else timeout
+        self.connect_timeout = self.default_connect_timeout if connect_timeout is None else connect_timeout
+        self.max_connections = self.default_max_connections if max_connections is None else max_connections
+        self.supports_streaming = self.default_streaming if supports_streaming is None else supports_streaming
+        self.supports_json_mode = self.default_json_mode if supports_json_mode is None else supports_json_mode
+        self.supports_prompt_cache = self.cache_hints if supports_prompt_cache is None else supports_prompt_cache
+        self.stream_usage = stream_usage
+
+    def extra_headers(self) -> dict:
+        return {}
+
+    def create_client(self, api_key: Optional[str]):
+        """Build an OpenAI-compatible client with this backend's timeouts and pool size"""
+        import httpx
+        from openai import OpenAI
+
+        return OpenAI(
+            base_url=self.base_url,
+            api_key=api_key or "sk-no-key-required",
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            # Retries are owned by the request scheduler, not the SDK
+            max_retries=0,
+            http_client=httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            ),
+        )
+
+    def prepare_messages(self, messages: list) -> list:
+        """
+        Strip layout markers from messages; segments marked "cache" get an
+        ephemeral cache_control breakpoint when the backend takes hints.
+        """
+        prepared = []
+        for message in messages:
+            message = dict(message)
+            cache = message.pop("cache", False)
+            if cache and self.supports_prompt_cache and isinstance(message["content"], str):
+                message["content"] = [{"type": "text", "text": message["content"],
+                                       "cache_control": {"type": "ephemeral"}}]
+            prepared.append(message)
+        return prepared
+
+    def request_options(self, json_mode: bool = False) -> dict:
+        """Extra keyword arguments for chat.completions.create on this backend"""
+        options = {}
+        headers = self.extra_headers()
+        if headers:
+            options["extra_headers"] = headers
+        if json_mode and self.supports_json_mode:
+            options["response_format"] = {"type": "json_object"}
+        return options
+
+
+class OpenRouterBackend(Backend):
+    name = "openrouter"
+    # Passed through to providers with explicit caching (Anthropic, Gemini); others cache prefixes automatically
+    cache_hints = True
+
+    def extra_headers(self) -> dict:
+        # OpenRouter uses these for app attribution on its leaderboards
+        return {
+            "HTTP-Referer": "https://github.com/Fikresilase/sage",
+            "X-Title": "Sage CLI",
+        }
+
+
+class OpenAICompatibleBackend(Backend):
+    """Any server speaking the OpenAI API, e.g. a local llama.cpp or vLLM server."""
+
+    name = "openai"
+    # Sends SAGE_API_KEY when one is set (OpenAI, vLLM --api-key); keyless local servers work without
+    requires_api_key = False
+    # Local generation is slow but the server is close: long reads, quick connects, a small pool
+    default_timeout = 600.0
+    default_connect_timeout = 3.0
+    default_max_connections = 8
+    # llama.cpp and vLLM both accept response_format={"type": "json_object"}
+    default_json_mode = True
+
+
+class MockBackend(Backend):
+    """In-process fake endpoint for offline runs and CI; never touches the network."""
+
+    name = "mock"
+    requires_api_key = False
+    cache_hints = True
+    default_timeout = 10.0
+    default_connect_timeout = 1.0
+    default_max_connections = 100
+
+    def create_client(self, api_key: Optional[str]):
+        return MockClient(latency=get_settings().mock_latency)
+
+
+class MockClient:
+    """Minimal stand-in for OpenAI() exposing chat.completions.create"""
+
+    # Previous prompt across clients, like a provider-side cache, to report a cached prefix
+    last_prompt = ""
+
+    def __init__(self, latency: float = 0.0):
+        self.api_key = "mock"
+        self.latency = latency
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model: str, messages: list, stream: bool = False, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        last = messages[-1]["content"] if messages else ""
+        if isinstance(last, list):
+            last = " ".join(part.get("text", "") for part in last if isinstance(part, dict))
+        reply = json.dumps({
+            "text": f"[mock:{model}] received {len(last)} characters",
+            "update": "no",
+        })
+        prompt = "\n".join(
+            part.get("text", "") if isinstance(part, dict) else str(part)
+            for message in messages
+            for part in (message["content"] if isinstance(message["content"], list) else [message["content"]])
+        )
+        shared = len(os.path.commonprefix([prompt, self.last_prompt]))
+        MockClient.last_prompt = prompt
+        usage = SimpleNamespace(prompt_tokens=len(prompt) // 4, completion_tokens=len(reply) // 4,
+                                prompt_tokens_details=SimpleNamespace(cached_tokens=shared // 4))
+        if stream:
+            chunks = [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=reply))], usage=None)]
+            if kwargs.get("stream_options", {}).get("include_usage"):
+                chunks.append(SimpleNamespace(choices=[], usage=usage))
+            return iter(chunks)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=reply))],
+            usage=usage,
+        )
+
+
+BACKENDS = {
+    "openrouter": OpenRouterBackend,
+    "openai": OpenAICompatibleBackend,
+    "local": OpenAICompatibleBackend,
+    "mock": MockBackend,
+}
+
+
+def get_backend() -> Backend:
+    """Build the backend selected by BACKEND in the settings (default: openrouter)."""
+    settings = get_settings()
+    backend_class = BACKENDS.get(settings.backend)
+    if backend_class is None:
+        console.print(f"[yellow]⚠️ Unknown BACKEND '{settings.backend}', using openrouter[/yellow]")
+        backend_class = OpenRouterBackend
+
+    default_url = OPENROUTER_BASE_URL if backend_class is OpenRouterBackend else LOCAL_BASE_URL
+    # Unset (None) tuning values fall back to the backend's own defaults
+    return backend_class(
+        base_url=settings.base_url or default_url,
+        timeout=settings.request_timeout,
+        connect_timeout=settings.connect_timeout,
+        max_connections=settings.max_connections,
+        supports_streaming=settings.streaming,
+        supports_json_mode=settings.json_mode,
+        supports_prompt_cache=settings.prompt_cache and backend_class.cache_hints,
+        stream_usage=settings.stream_usage,
+    )
@@ -0,0 +1,90 @@
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from rich.console import Console
+
+console = Console(stderr=True)
+
+
+def load_manifest(manifest_file: Path) -> List[dict]:
+    """
+    Load batch tasks. Accepts a JSON array (of strings or {"id", "prompt"} objects),
+    JSON Lines, or plain text with one prompt per line.
+    """
+    text = manifest_file.read_text(encoding="utf-8")
+    stripped = text.strip()
+    entries = []
+    if stripped.startswith("["):
+        entries = json.loads(stripped)
+    else:
+        for line in stripped.splitlines():
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            entries.append(json.loads(line) if line.startswith("{") else line)
+
+    tasks = []
+    for position, entry in enumerate(entries, start=1):
+        if isinstance(entry, str):
+            entry = {"prompt": entry}
+        if "prompt" not in entry and "prompt_file" in entry:
+            entry["prompt"] = Path(entry["prompt_file"]).read_text(encoding="utf-8")
+        entry.setdefault("id", str(position))
+        tasks.append(entry)
+    return tasks
+
+
+def route_console_to_stderr():
+    """Send every Sage console to stderr so stdout carries only JSON results."""
+    from rich.console import Console as RichConsole
+
+    for name, module in list(sys.modules.items()):
+        if name.startswith("sage.") and isinstance(getattr(module, "console", None), RichConsole):
+            module.console.stderr = True
+
+
+def _run_task(task: dict, api_key: Optional[str], client, interface_data: dict) -> dict:
+    from .combiner import Combiner
+
+    # One combiner per task keeps conversation history separate
+    combiner = Combiner(api_key, client=client, interface_data=interface_data)
+    started = time.perf_counter()
+    response = combiner.get_ai_response(task["prompt"])
+    return {
+        "id": task["id"],
+        "ok": combiner.last_error is None,
+        "response": response,
+        "error": combiner.last_error,
+        "elapsed": round(time.perf_counter() - started, 3),
+    }
+
+
+def run_batch(tasks: List[dict], workers: int = 4,
+              interface_file: Path = Path("Sage/interface.json")) -> Iterator[dict]:
+    """Run tasks across a worker pool sharing one client and one loaded interface; yield results as they finish."""
+    from .api import OpenRouterClient
+    from . import combiner, orchestrator  # noqa: F401 - imported so their consoles get rerouted
+
+    route_console_to_stderr()
+    client = OpenRouterClient()
+    if not client.client:
+        raise RuntimeError("Could not initialize the model client, check SAGE_API_KEY / MODEL / BACKEND")
+
+    if interface_file.exists():
+        interface_data = json.loads(interface_file.read_text(encoding="utf-8"))
+    else:
+        console.print(f"[yellow]⚠️ {interface_file} not found, running without a project index[/yellow]")
+        interface_data = {"command": {"summary": "", "commands": []}, "text": "", "update": ""}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(_run_task, task, client.api_key, client, interface_data): task for task in tasks}
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                yield future.result()
+            except Exception as e:
+                yield {"id": task["id"], "ok": False, "response": "", "error": str(e), "elapsed": None}
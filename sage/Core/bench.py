@@ -0,0 +1,175 @@
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from rich.console import Console
+from .backends import get_backend
+from .env_util import get_backend_api_key
+from .scheduler import endpoint_key, get_scheduler
+
+console = Console()
+
+BENCH_FILE = Path("Sage/model_bench.json")
+# Models failing more often than this are skipped by the automatic picker
+MAX_HEALTHY_ERROR_RATE = 0.34
+
+BENCH_PROMPT = (
+    'Reply with only a JSON object of the form {"text": "<one sentence>", "update": "no"} '
+    "explaining what a linked list is."
+)
+
+
+def load_bench_results(bench_file: Path = BENCH_FILE) -> dict:
+    """Load persisted benchmark results keyed by model name."""
+    if not bench_file.exists():
+        return {}
+    try:
+        return json.loads(bench_file.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def save_bench_results(results: dict, bench_file: Path = BENCH_FILE):
+    """Merge new results into the persisted benchmark file."""
+    merged = load_bench_results(bench_file)
+    merged.update(results)
+    bench_file.parent.mkdir(parents=True, exist_ok=True)
+    bench_file.write_text(json.dumps(merged, indent=2, sort_keys=True), encoding="utf-8")
+
+
+def _is_json(text: str) -> bool:
+    cleaned = text.strip()
+    if cleaned.startswith("```"):
+        cleaned = cleaned.split("\n", 1)[-1].rsplit("```", 1)[0]
+    try:
+        return isinstance(json.loads(cleaned), dict)
+    except json.JSONDecodeError:
+        return False
+
+
+def _run_once(client, backend, model: str, key: str) -> dict:
+    """One streamed request; returns ttft, tokens/s and JSON validity."""
+    messages = [{"role": "user", "content": BENCH_PROMPT}]
+    started = time.perf_counter()
+    ttft = None
+    parts = []
+    usage_tokens = None
+
+    def open_stream():
+        options = backend.request_options(json_mode=True)
+        if backend.supports_streaming:
+            return client.chat.completions.create(model=model, messages=messages, max_tokens=200,
+                                                  temperature=0, stream=True, **options)
+        return client.chat.completions.create(model=model, messages=messages, max_tokens=200,
+                                              temperature=0, **options)
+
+    # No retries: a benchmark that hides failures can't report an error rate
+    response = get_scheduler().submit(open_stream, model=model, key=key, max_retries=0)
+    if backend.supports_streaming:
+        for chunk in response:
+            usage = getattr(chunk, "usage", None)
+            if usage is not None and getattr(usage, "completion_tokens", None):
+                usage_tokens = usage.completion_tokens
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content or ""
+            if delta and ttft is None:
+                ttft = time.perf_counter() - started
+            parts.append(delta)
+    else:
+        parts.append(response.choices[0].message.content or "")
+        ttft = time.perf_counter() - started
+    total = time.perf_counter() - started
+
+    text = "".join(parts)
+    # Roughly four characters per token when the server doesn't report usage
+    tokens = usage_tokens or max(1, len(text) // 4)
+    generation_time = max(total - (ttft or total), 1e-6)
+    return {
+        "ttft": ttft if ttft is not None else total,
+        "tps": tokens / generation_time if backend.supports_streaming else tokens / total,
+        "json": _is_json(text),
+    }
+
+
+def bench_model(model: str, runs: int = 3, client=None, backend=None) -> dict:
+    """Measure time-to-first-token, throughput, JSON validity and error rate for one model."""
+    backend = backend or get_backend()
+    api_key = get_backend_api_key(backend)
+    client = client or backend.create_client(api_key)
+    key = endpoint_key(backend.base_url, api_key)
+
+    samples, errors = [], 0
+    for _ in range(runs):
+        try:
+            samples.append(_run_once(client, backend, model, key))
+        except Exception as e:
+            errors += 1
+            console.print(f"[dim]{model}: {e}[/dim]")
+
+    result = {
+        "runs": runs,
+        "error_rate": errors / runs if runs else 1.0,
+        "json_rate": sum(s["json"] for s in samples) / len(samples) if samples else 0.0,
+        "ttft": round(statistics.median(s["ttft"] for s in samples), 3) if samples else None,
+        "tps": round(statistics.median(s["tps"] for s in samples), 1) if samples else None,
+        "backend": backend.name,
+        "measured_at": int(time.time()),
+    }
+    return result
+
+
+def bench_models(models: List[str], runs: int = 3) -> dict:
+    """Benchmark several models against the configured backend and persist the results ({} without a key)."""
+    backend = get_backend()
+    api_key = get_backend_api_key(backend)
+    if backend.requires_api_key and not api_key:
+        return {}
+    client = backend.create_client(api_key)
+
+    results = {}
+    for model in models:
+        console.print(f"[dim]Benchmarking {model}...[/dim]")
+        results[model] = bench_model(model, runs, client=client, backend=backend)
+    save_bench_results(results)
+    return results
+
+
+def is_healthy(result: Optional[dict]) -> bool:
+    return bool(result) and result.get("ttft") is not None and result.get("error_rate", 1.0) <= MAX_HEALTHY_ERROR_RATE
+
+
+def rank_models(models: List[str], results: Optional[dict] = None) -> List[str]:
+    """
+    Order models fastest first: healthy measured models by time-to-first-token,
+    then unmeasured models in their given order, then unhealthy ones.
+    """
+    results = load_bench_results() if results is None else results
+
+    def sort_key(item):
+        position, model = item
+        result = results.get(model)
+        if is_healthy(result):
+            return (0, result["ttft"], -(result.get("tps") or 0), position)
+        if result is None:
+            return (1, 0, 0, position)
+        return (2, 0, 0, position)
+
+    return [model for _, model in sorted(enumerate(models), key=sort_key)]
+
+
+def fastest_healthy_model(results: Optional[dict] = None) -> Optional[str]:
+    """The measured model with the lowest time-to-first-token that isn't erroring."""
+    results = load_bench_results() if results is None else results
+    healthy = [model for model, result in results.items() if is_healthy(result)]
+    ranked = rank_models(healthy, results)
+    return ranked[0] if ranked else None
+
+
+def resolve_model(model: Optional[str]) -> Optional[str]:
+    """MODEL as configured, with "auto" replaced by the fastest healthy benchmarked model (None if none)."""
+    if model and model.lower() == "auto":
+        return fastest_healthy_model()
+    return model
@@ -9,15 +9,18 @@ from rich.live import Live
 from rich.status import Status
 from rich.table import Table
 import time
+from .api import OpenRouterClient
 from .combiner import Combiner
-from .env_util import get_api_key, get_model
+from .env_util import get_backend_api_key, get_model
 from .select_models import select_model
+from .scheduler import get_scheduler
+from .prompt_layout import cache_stats
+from .backends import get_backend
+from .daemon import DaemonClient
+from .watcher import start_watching, stop_watching
+from .summary_worker import get_summary_worker, stop_summary_worker
+from .snapshots import get_snapshot_store
 import os
-
-from prompt_toolkit import PromptSession
-from prompt_toolkit.key_binding import KeyBindings
-from prompt_toolkit.keys import Keys
-from prompt_toolkit.styles import Style
 console = Console()
 # Define your main color and related colors
 MAIN_COLOR = "#8B5CF6" 
@@ -50,6 +53,8 @@ def display_header():
     # console.print("3. Create [magenta]SAGE.txt[/magenta] files to customize your interactions with Sage.")
     console.print("3. Type [cyan]model[/cyan] to select a model")
     console.print("4. Type [cyan]voice[/cyan] to use the voice mode")
+    console.print("5. Type [cyan]stats[/cyan] to see request queue and rate-limit stats")
+    console.print("6. Type [cyan]undo[/cyan] / [cyan]redo[/cyan] to revert Sage's file changes turn by turn, [cyan]checkpoint list[/cyan] to see them")
     console.print("\n")
 def display_footer():
     ownership = Text("made by a brokie called ", style="bright_black")
@@ -67,19 +72,26 @@ def display_chat_ready():
     display_footer()
     console.print(f"[{ACCENT_COLOR}]Sage is ready. Type your message below.[/{ACCENT_COLOR}]")
 
-def chat():
+def chat(combiner=None):
     """
     Main chat function that sets up the UI and enters the interactive loop.
+    Pass a combiner (e.g. a DaemonClient) to reuse state kept elsewhere.
     """
-    # Get API key first
-    api_key = get_api_key()
-    if not api_key:
-        console.print(f"[bold red] Cannot start chat without API key[/bold red]")
-        return
-    
-    # Initialize combiner (which includes orchestrator)
-    combiner = Combiner(api_key)
+    if combiner is None:
+        # Get API key first (local and mock backends don't need one)
+        backend = get_backend()
+        api_key = get_backend_api_key(backend)
+        if backend.requires_api_key and not api_key:
+            console.print(f"[bold red] Cannot start chat without API key[/bold red]")
+            return
+        
+        # Initialize combiner (which includes orchestrator) with one client, and so one
+        # connection pool, for the whole session
+        combiner = Combiner(api_key, client=OpenRouterClient())
     
+    # Keep the interface in step with edits made outside Sage (the daemon runs its own)
+    watcher = None if isinstance(combiner, DaemonClient) else start_watching()
+
     # Display the static screen that perfectly matches the provided image
     display_chat_ready()
 
@@ -102,6 +114,10 @@ def chat():
                 try:
                     selected_model = select_model()
                     if selected_model:
+                        if isinstance(combiner.client, OpenRouterClient):
+                            # The session client was built for the old model
+                            combiner.client.close()
+                            combiner.client = OpenRouterClient()
                         console.print(f"[{MAIN_COLOR}]✓ Model changed to: {selected_model}[/{MAIN_COLOR}]")
                     else:
                         console.print("[yellow]Model selection cancelled[/yellow]")
@@ -119,6 +135,14 @@ def chat():
                 # display_chat_ready()
                 continue
 
+            if user_message.lower() == 'stats':
+                _display_scheduler_stats()
+                continue
+
+            if user_message.lower() in ('undo', 'redo', 'checkpoint list', 'checkpoints'):
+                _handle_checkpoint_command(user_message.lower())
+                continue
+
             # Only send to AI if it's not a command
             # Get AI response with a spinner
             response = _get_ai_response_with_spinner(user_message, combiner)
@@ -137,8 +161,17 @@ def chat():
             console.print(f"[red]xxx Error in chat: {e}[/red]")
             break
 
+    stop_watching(watcher)
+    stop_summary_worker()
+    if isinstance(getattr(combiner, "client", None), OpenRouterClient):
+        combiner.client.close()
+
 def _get_user_input() -> str:
     """Multiline input. Submit with double Enter, Ctrl+J, or Ctrl+D."""
+    from prompt_toolkit import PromptSession
+    from prompt_toolkit.key_binding import KeyBindings
+    from prompt_toolkit.styles import Style
+
     kb = KeyBindings()
     
     # Track the last Enter press time for double Enter detection
@@ -168,7 +201,7 @@ def _get_user_input() -> str:
     def _(event):
         raise KeyboardInterrupt
 
-    style = Style.from_dict({'prompt': f'bold {USER_COLOR}'})
+    style = Style.from_dict({'prompt': f'bold {USER_COLOR}', 'bottom-toolbar': f'noreverse {MAIN_COLOR}'})
 
     session = PromptSession(
         multiline=True,
@@ -176,6 +209,9 @@ def _get_user_input() -> str:
         style=style,
         wrap_lines=True,
         complete_while_typing=False,
+        # Background summarization progress, refreshed while the user types
+        bottom_toolbar=_summary_progress if get_summary_worker(create=False) else None,
+        refresh_interval=0.5,
     )
 
     try:
@@ -190,6 +226,18 @@ def _get_user_input() -> str:
         raise
     except EOFError:
         return ""
+def _summary_progress() -> str:
+    """Footer text for the background summary worker."""
+    worker = get_summary_worker(create=False)
+    if worker is None:
+        return ""
+    done, total = worker.progress()
+    if not total:
+        return ""
+    if done >= total:
+        return f" ✓ {total} files summarized"
+    return f" Summarizing files in the background: {done}/{total}"
+
 def _get_ai_response_with_spinner(user_message: str, combiner: Combiner) -> str:
     """Get AI response with a loading spinner."""
     # console.print(f"[bold cyan]🔹 Using model: {get_model()}[/bold cyan]")
@@ -216,4 +264,60 @@ def _display_ai_response(response: str):
             padding=(1, 2),
             box=box.ROUNDED
         )
-    )
\ No newline at end of file
+    )
+
+def _handle_checkpoint_command(command: str):
+    """undo / redo the last checkpoint of Sage's file changes, or list checkpoints."""
+    store = get_snapshot_store()
+    if store is None:
+        console.print("[yellow]⚠️ Checkpoints are off (set snapshots = true in Sage/config.toml)[/yellow]")
+        return
+    if command in ('checkpoint list', 'checkpoints'):
+        index = store.list()
+        if not index["checkpoints"]:
+            console.print("[dim]No checkpoints yet[/dim]")
+            return
+        table = Table(box=box.SIMPLE, header_style=f"bold {MAIN_COLOR}")
+        for column in ("#", "Time", "Files", "Paths", ""):
+            table.add_column(column)
+        for position, checkpoint in enumerate(index["checkpoints"], 1):
+            state = "current" if position == index["head"] else ("undone" if position > index["head"] else "")
+            table.add_row(str(checkpoint["id"]), time.strftime("%H:%M:%S", time.localtime(checkpoint["time"])),
+                          str(len(checkpoint["changes"])), checkpoint["label"], state)
+        console.print(table)
+        return
+    result = store.undo() if command == 'undo' else store.redo()
+    if result is None:
+        console.print(f"[yellow]⚠️ Nothing to {command}[/yellow]")
+        return
+    action = "Undid" if command == 'undo' else "Redid"
+    console.print(f"[{MAIN_COLOR}]✓ {action} checkpoint {result['checkpoint']['id']}: "
+                  f"{len(result['restored'])} file(s) restored[/{MAIN_COLOR}]")
+    for path in result["skipped"]:
+        console.print(f"[yellow]⚠️ Skipped {path}: it changed after that checkpoint[/yellow]")
+
+def _display_scheduler_stats():
+    """Show queue depth, retries, prompt-cache hits and per-model AIMD windows."""
+    metrics = get_scheduler().metrics()
+    console.print(
+        f"[{ACCENT_COLOR}]Requests:[/] {metrics['requests']}  "
+        f"[{ACCENT_COLOR}]Queued:[/] {metrics['queue_depth']}  "
+        f"[{ACCENT_COLOR}]In flight:[/] {metrics['in_flight']}  "
+        f"[{ACCENT_COLOR}]Retries:[/] {metrics['retries']}  "
+        f"[{ACCENT_COLOR}]Throttled:[/] {metrics['throttled']}  "
+        f"[{ACCENT_COLOR}]Failures:[/] {metrics['failures']}"
+    )
+    for model, stats in cache_stats.snapshot().items():
+        console.print(
+            f"[{ACCENT_COLOR}]Prompt cache[/] {model}: {stats['hit_ratio']:.0%} of "
+            f"{stats['prompt_tokens']} prompt tokens cached ({stats['hits']}/{stats['requests']} requests hit)"
+        )
+    if not metrics["models"]:
+        return
+    table = Table(box=box.SIMPLE, header_style=f"bold {MAIN_COLOR}")
+    for column in ("Model", "Limit", "In flight", "Queued", "Throttled", "Blocked (s)"):
+        table.add_column(column)
+    for model, stats in metrics["models"].items():
+        table.add_row(model, str(stats["limit"]), str(stats["in_flight"]), str(stats["queued"]),
+                      str(stats["throttled"]), str(stats["blocked_for"]))
+    console.print(table)
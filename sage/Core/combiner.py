@@ -1,30 +1,51 @@
 import json
 from pathlib import Path
 from rich.console import Console
-from .api import send_to_openrouter, single_step_ai_processing
+from .api import send_messages, single_step_ai_processing, OpenRouterClient
 from .orchestrator import Orchestrator
 from .prompts import SYSTEM_PROMPT
+from .interface_store import get_interface_store
+from .encoding import decode_reply
+from .prompt_layout import PromptLayout
+from .config import get_settings
+from .models import CHARS_PER_TOKEN, context_length
 
 console = Console()
 
+# Share of the model's context window that earlier turns may use
+HISTORY_SHARE = 0.25
+
 class Combiner:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, client=None, interface_data: dict = None):
         self.api_key = api_key
         self.orchestrator = Orchestrator(api_key)
         self.conversation_history = []
         self.pending_actions = False
+        # Batch workers share one client (and its connection pool) and one loaded index
+        self.client = client
+        self.interface_data = interface_data
+        self.last_error = None
+        # One layout per session keeps the prompt prefix stable across turns and follow-ups
+        self.layout = PromptLayout(SYSTEM_PROMPT)
+        self.turn = 0
 
     def get_ai_response(self, user_prompt: str) -> str:
+        self.last_error = None
+        self.turn += 1
+        self.orchestrator.ledger.begin_turn(self.turn)
         try:
             interface_data = self._load_interface_data()
             if not interface_data:
+                self.last_error = "Could not load project interface data"
                 return "x Error: Could not load project interface data. Please run setup first."
 
             # Use single-step processing with interface data
             ai_response_text = single_step_ai_processing(
                 interface_data=interface_data,
                 user_prompt=user_prompt,
-                system_prompt=SYSTEM_PROMPT
+                system_prompt=SYSTEM_PROMPT,
+                client=self.client,
+                layout=self.layout
             )
 
             ai_response = self._parse_ai_response(ai_response_text)
@@ -46,7 +67,7 @@ class Combiner:
                     })
 
                     # Get follow-up response for action results
-                    follow_up_response = self._get_ai_followup(results_text, interface_data)
+                    follow_up_response = self._get_ai_followup(user_prompt, ai_response_text, results_text, interface_data)
 
                     if follow_up_response.get("update", "").lower() == "yes":
                         self.orchestrator.update_interface_json(follow_up_response)
@@ -57,6 +78,7 @@ class Combiner:
                         "ai": follow_up_response,
                         "pending": False
                     })
+                    self._remember_turn(user_prompt, ai_response_text, results_text, follow_up_response)
 
                     return follow_up_response.get("text", "").strip()
                 else:
@@ -68,6 +90,7 @@ class Combiner:
                         "pending": False
                     })
                     self.pending_actions = False
+                    self._remember_turn(user_prompt, ai_response_text)
                     return results_text if results_text else ai_response.get("text", "").strip()
 
             else:
@@ -82,13 +105,41 @@ class Combiner:
                     "pending": False
                 })
                 self.pending_actions = False
+                self._remember_turn(user_prompt, ai_response_text)
 
                 return ai_response.get("text", "").strip()
 
         except Exception as e:
+            self.last_error = str(e)
+            # Nothing from this turn reached the history, so nothing it provided counts as seen
+            self.orchestrator.ledger.discard_turn()
             console.print(f"[red]x Error in combiner: {e}[/red]")
             return f"Error: {str(e)}"
 
+    def _remember_turn(self, user_prompt: str, reply: str, results: str = None, follow_up: dict = None):
+        """Keep the finished turn in the prompt so later turns (and the context ledger) can refer to it."""
+        turn_messages = [
+            {"role": "user", "content": f"User Request (turn {self.turn}):\n{user_prompt}"},
+            {"role": "assistant", "content": reply},
+        ]
+        if results is not None:
+            turn_messages.append({"role": "user", "content": f"**ORCHESTRATOR EXECUTION RESULTS:**\n{results}"})
+            turn_messages.append({"role": "assistant", "content": json.dumps(follow_up)})
+        self.layout.add_turn(self.turn, turn_messages)
+        self.orchestrator.ledger.commit_turn()
+        oldest = self.layout.trim_history(self._history_budget())
+        # Content from trimmed turns is no longer visible, so it must be sent again in full
+        self.orchestrator.ledger.forget_before(oldest)
+
+    def _history_budget(self) -> int:
+        """Characters of earlier turns to keep: a share of the smallest context window in the model chain."""
+        settings = get_settings()
+        models = [getattr(self.client, "model", None)] + list(getattr(self.client, "fallback_models", None) or [])
+        tokens = min([context_length(model) or settings.context_tokens for model in models if model]
+                     or [settings.context_tokens])
+        budget = int(tokens * CHARS_PER_TOKEN * HISTORY_SHARE)
+        return min(budget, settings.max_history_chars) if settings.max_history_chars > 0 else budget
+
     def _is_action_response(self, response: dict) -> bool:
         """Check if AI response contains actions that need orchestrator processing"""
         if not isinstance(response, dict):
@@ -107,47 +158,39 @@ class Combiner:
             
         return False
 
-    def _get_ai_followup(self, orchestrator_results: str, interface_data: dict) -> dict:
+    def _get_ai_followup(self, user_prompt: str, previous_reply: str, orchestrator_results: str,
+                         interface_data: dict) -> dict:
         """Get follow-up response for action results"""
-        followup_prompt = f"""
-Project Interface JSON:
-{json.dumps(interface_data, indent=2)}
-
-**ORCHESTRATOR EXECUTION RESULTS:**
-{orchestrator_results}
-"""
-        # Use direct API call for follow-up
-        ai_response_text = send_to_openrouter(
-            system_prompt=SYSTEM_PROMPT,
-            user_prompt=followup_prompt
-        )
+        client = self.client or OpenRouterClient()
+        # Same prefix as the first call of the turn, extended by its reply and the results
+        messages = self.layout.messages(interface_data, [
+            {"role": "user", "content": f"User Request:\n{user_prompt}"},
+            {"role": "assistant", "content": previous_reply},
+            {"role": "user", "content": f"**ORCHESTRATOR EXECUTION RESULTS:**\n{orchestrator_results}"},
+        ], client.model)
+        ai_response_text = send_messages(messages, client=client)
 
         return self._parse_ai_response(ai_response_text)
 
     def _parse_ai_response(self, response_text: str) -> dict[str, any]:
         """Parse AI response text into a dictionary"""
-        try:
-            cleaned_text = response_text.strip()
-            if cleaned_text.startswith('```json'):
-                cleaned_text = cleaned_text[7:]
-            if cleaned_text.endswith('```'):
-                cleaned_text = cleaned_text[:-3]
-            cleaned_text = cleaned_text.strip()
-            return json.loads(cleaned_text)
-        except json.JSONDecodeError:
-            console.print("[yellow]⚠️  AI response is not valid JSON, treating as text[/yellow]")
-            return {"text": response_text, "update": "no"}
+        # Plain or fenced JSON (short keys expanded), or a compact interface dump
+        parsed = decode_reply(response_text)
+        if isinstance(parsed, dict):
+            return parsed
+        console.print("[yellow]⚠️  AI response is not valid JSON, treating as text[/yellow]")
+        return {"text": response_text, "update": "no"}
 
     def _load_interface_data(self):
         """Load the project interface data"""
-        interface_file = Path("Sage/interface.json")
-        if not interface_file.exists():
+        if self.interface_data is not None:
+            return self.interface_data
+        store = get_interface_store(Path("Sage/interface.json"))
+        if not store.exists():
             console.print("[red]x interface.json not found. Please run setup first.[/red]")
             return None
         try:
-            with open(interface_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return data
+            return store.load()
         except Exception as e:
             console.print(f"[red]x Error loading interface.json: {e}[/red]")
             return None
\ No newline at end of file
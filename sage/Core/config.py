@@ -0,0 +1,193 @@
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ENV_FILE = Path(".env")
+CONFIG_FILE = Path("Sage/config.toml")
+# Environment variables override files when prefixed, e.g. SAGE_MODEL=..., SAGE_BACKEND=mock
+ENV_PREFIX = "SAGE_"
+
+
+def parse_env_text(text: str) -> Dict[str, str]:
+    """Parse KEY=value lines, skipping comments and stripping optional quotes / export."""
+    values = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        if line.startswith("export "):
+            line = line[len("export "):]
+        key, value = line.split("=", 1)
+        value = value.strip()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+            value = value[1:-1]
+        values[key.strip()] = value
+    return values
+
+
+def _load_toml(path: Path) -> Dict[str, str]:
+    """Flatten config.toml into upper-case keys; nested tables join with '_'."""
+    import tomllib
+
+    with path.open("rb") as f:
+        data = tomllib.load(f)
+
+    values = {}
+
+    def flatten(prefix: str, table: dict):
+        for key, value in table.items():
+            name = f"{prefix}{key}".upper()
+            if isinstance(value, dict):
+                flatten(f"{name}_", value)
+            elif isinstance(value, list):
+                values[name] = ",".join(str(item) for item in value)
+            elif isinstance(value, bool):
+                values[name] = "true" if value else "false"
+            else:
+                values[name] = str(value)
+
+    flatten("", data)
+    return values
+
+
+class Settings:
+    """Typed view over merged config.toml < .env < SAGE_* environment values."""
+
+    def __init__(self, values: Dict[str, str]):
+        self.values = values
+        self.api_key = self.get("SAGE_API_KEY")
+        self.model = self.get("MODEL")
+        self.fallback_models = self.get_list("FALLBACK_MODELS")
+        self.hedge_deadline = self.get_float("HEDGE_DEADLINE", 10.0)
+        # FALLBACK_MODELS is tried in the order written unless this opts into benchmark ranking
+        self.rank_fallbacks = self.get_bool("RANK_FALLBACKS", False)
+        self.backend = (self.get("BACKEND") or "openrouter").lower()
+        self.base_url = self.get("BASE_URL")
+        # None unless set: each backend has its own defaults for these
+        self.request_timeout = self.get_float("REQUEST_TIMEOUT", None)
+        self.connect_timeout = self.get_float("CONNECT_TIMEOUT", None)
+        self.max_connections = self.get_int("MAX_CONNECTIONS", None)
+        self.streaming = self.get_bool("STREAMING", None)
+        self.json_mode = self.get_bool("JSON_MODE", None)
+        self.mock_latency = self.get_float("MOCK_LATENCY", 0.0)
+        self.startup_budget_ms = self.get_float("STARTUP_BUDGET_MS", 150.0)
+        self.max_retries = self.get_int("MAX_RETRIES", 5)
+        self.retry_base_delay = self.get_float("RETRY_BASE_DELAY", 1.0)
+        self.retry_max_delay = self.get_float("RETRY_MAX_DELAY", 60.0)
+        self.initial_concurrency = self.get_float("INITIAL_CONCURRENCY", 2.0)
+        self.max_concurrency = self.get_float("MAX_CONCURRENCY", 16.0)
+        self.watch = self.get_bool("WATCH", True)
+        self.watch_backend = (self.get("WATCH_BACKEND") or "auto").lower()
+        self.watch_debounce = self.get_float("WATCH_DEBOUNCE", 0.5)
+        self.watch_poll_interval = self.get_float("WATCH_POLL_INTERVAL", 2.0)
+        # 0 lets the walker pick a default from the core count
+        self.walk_workers = self.get_int("WALK_WORKERS", 0)
+        # auto: read .git/index when the project is a git repository, else walk the tree
+        self.file_source = (self.get("FILE_SOURCE") or "auto").lower()
+        self.max_file_bytes = self.get_int("MAX_FILE_BYTES", 200_000)
+        self.max_turn_bytes = self.get_int("MAX_TURN_BYTES", 600_000)
+        # Provided files up to this size are kept in memory so edits against a stale version can be rebased
+        self.rebase_max_bytes = self.get_int("REBASE_MAX_BYTES", 2_000_000)
+        self.stub_head_lines = self.get_int("STUB_HEAD_LINES", 40)
+        self.stub_tail_lines = self.get_int("STUB_TAIL_LINES", 20)
+        # Local pre-summaries: only low-confidence or widely imported files go to the model
+        self.local_summaries = self.get_bool("LOCAL_SUMMARIES", True)
+        self.local_summary_confidence = self.get_float("LOCAL_SUMMARY_CONFIDENCE", 0.7)
+        self.central_imports = self.get_int("CENTRAL_IMPORTS", 3)
+        self.summary_workers = self.get_int("SUMMARY_WORKERS", 0)
+        self.summary_batch = self.get_int("SUMMARY_BATCH", 20)
+        # Files bigger than this are summarized chunk by chunk
+        self.summary_chunk_bytes = self.get_int("SUMMARY_CHUNK_BYTES", 24_000)
+        # Near-duplicate files (estimated Jaccard >= threshold) share one model summary
+        self.dedupe = self.get_bool("DEDUPE", True)
+        self.dedupe_threshold = self.get_float("DEDUPE_THRESHOLD", 0.8)
+        # How the interface is written into prompts: json | compact, with per-model `model=format` overrides
+        self.prompt_format = (self.get("PROMPT_FORMAT") or "json").lower()
+        self.prompt_formats = self.get_list("PROMPT_FORMATS")
+        # Send cache_control hints to backends that take them; ask for usage in streams to track cache hits
+        self.prompt_cache = self.get_bool("PROMPT_CACHE", True)
+        self.stream_usage = self.get_bool("STREAM_USAGE", True)
+        # Earlier turns kept in the prompt (and so in the context ledger): a quarter of the model's
+        # context window, capped by MAX_HISTORY_CHARS when set (0 = no cap)
+        self.max_history_chars = self.get_int("MAX_HISTORY_CHARS", 0)
+        # Context window assumed for models not listed in models.py
+        self.context_tokens = self.get_int("CONTEXT_TOKENS", 32_768)
+        # Per-turn checkpoints of orchestrator file changes in Sage/objects, for undo/redo
+        self.snapshots = self.get_bool("SNAPSHOTS", True)
+        self.max_checkpoints = self.get_int("MAX_CHECKPOINTS", 200)
+        # Summarize in the background and open chat right away
+        self.background_summaries = self.get_bool("BACKGROUND_SUMMARIES", True)
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        value = self.values.get(key)
+        return value if value else default
+
+    def get_float(self, key: str, default: float) -> float:
+        try:
+            return float(self.get(key, default))
+        except (TypeError, ValueError):
+            return default
+
+    def get_int(self, key: str, default: int) -> int:
+        try:
+            return int(float(self.get(key, default)))
+        except (TypeError, ValueError):
+            return default
+
+    def get_bool(self, key: str, default: bool) -> bool:
+        value = self.get(key)
+        if value is None:
+            return default
+        return value.strip().lower() in ("1", "true", "yes", "on")
+
+    def get_list(self, key: str) -> List[str]:
+        return [item.strip() for item in (self.get(key) or "").split(",") if item.strip()]
+
+
+_cache: Dict[str, Any] = {"stamp": None, "settings": None}
+_lock = threading.Lock()
+
+
+def _stamp(path: Path):
+    try:
+        stat = path.stat()
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+
+def get_settings() -> Settings:
+    """
+    Cached settings for the current project. Files are only re-read when the
+    working directory, a file's mtime/size or the SAGE_* environment changes.
+    """
+    env_overrides = {key: value for key, value in os.environ.items() if key.startswith(ENV_PREFIX)}
+    stamp = (os.getcwd(), _stamp(ENV_FILE), _stamp(CONFIG_FILE), tuple(sorted(env_overrides.items())))
+    with _lock:
+        if _cache["stamp"] == stamp:
+            return _cache["settings"]
+
+        values = {}
+        if stamp[2] is not None:
+            try:
+                values.update(_load_toml(CONFIG_FILE))
+            except Exception:
+                pass
+        if stamp[1] is not None:
+            try:
+                values.update(parse_env_text(ENV_FILE.read_text(encoding="utf-8")))
+            except (OSError, UnicodeDecodeError):
+                # Deleted, unreadable or half-written since the stat: keep the last good
+                # settings (or defaults) and leave the stamp unset so the next call re-reads
+                if _cache["settings"] is not None:
+                    return _cache["settings"]
+                stamp = None
+        for key, value in env_overrides.items():
+            # SAGE_API_KEY is already prefixed; SAGE_MODEL maps to MODEL
+            values[key if key == "SAGE_API_KEY" else key[len(ENV_PREFIX):]] = value
+
+        settings = Settings(values)
+        _cache["stamp"] = stamp
+        _cache["settings"] = settings
+        return settings
@@ -0,0 +1,303 @@
+import codecs
+import mmap
+from pathlib import Path
+from typing import Optional
+
+from .config import get_settings
+
+SNIFF_BYTES = 8192
+# Text files whose sniffed lines average longer than this are treated as minified bundles
+MINIFIED_LINE_LENGTH = 1000
+_WINDOW = 4 * 1024 * 1024
+
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+_MAGIC = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF8", "image/gif"),
+    (b"RIFF", "riff (image/audio/video)"),
+    (b"%PDF", "application/pdf"),
+    (b"PK\x03\x04", "zip archive"),
+    (b"\x1f\x8b", "gzip archive"),
+    (b"SQLite format 3\x00", "sqlite database"),
+    (b"\x7fELF", "elf binary"),
+    (b"MZ", "windows executable"),
+    (b"\x00asm", "webassembly"),
+)
+
+
+class ContentBudget:
+    """Bytes of file content still allowed into the current turn's prompt."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.limit - self.used)
+
+    def consume(self, amount: int):
+        self.used += amount
+
+
+def sniff(prefix: bytes) -> dict:
+    """Guess kind and encoding from the first few KB of a file."""
+    for bom, encoding in _BOMS:
+        if prefix.startswith(bom):
+            return {"binary": False, "kind": "text", "encoding": encoding}
+    for magic, kind in _MAGIC:
+        if prefix.startswith(magic):
+            return {"binary": True, "kind": kind, "encoding": None}
+    if b"\x00" in prefix:
+        return {"binary": True, "kind": "binary", "encoding": None}
+    try:
+        # The prefix may end mid-character, so decode incrementally without finalizing
+        codecs.getincrementaldecoder("utf-8")().decode(prefix, final=False)
+        encoding = "utf-8"
+    except UnicodeDecodeError:
+        # Mostly printable bytes that aren't UTF-8 are legacy single-byte text
+        control = sum(1 for b in prefix if b < 9 or 13 < b < 32)
+        if prefix and control / len(prefix) > 0.1:
+            return {"binary": True, "kind": "binary", "encoding": None}
+        encoding = "latin-1"
+    lines = prefix.count(b"\n") + 1
+    kind = "minified text" if len(prefix) >= SNIFF_BYTES and len(prefix) / lines > MINIFIED_LINE_LENGTH else "text"
+    return {"binary": False, "kind": kind, "encoding": encoding}
+
+
+def _count_lines(mm) -> int:
+    count = 0
+    for start in range(0, len(mm), _WINDOW):
+        count += mm[start:start + _WINDOW].count(b"\n")
+    if len(mm) and mm[-1:] != b"\n":
+        count += 1
+    return count
+
+
+def _head_tail(mm, head_lines: int, tail_lines: int, max_chars: int):
+    """First and last lines of a mapped file (each capped at max_chars bytes) without reading the middle."""
+    size = len(mm)
+    head_end = 0
+    for _ in range(head_lines):
+        found = mm.find(b"\n", head_end, max_chars)
+        if found == -1:
+            head_end = min(size, max_chars)
+            break
+        head_end = found + 1
+
+    floor = max(head_end, size - max_chars)
+    tail_start = size
+    search_end = size - 1 if mm[size - 1:size] == b"\n" else size
+    for _ in range(tail_lines):
+        found = mm.rfind(b"\n", floor, search_end)
+        if found == -1:
+            tail_start = floor
+            break
+        tail_start = found + 1
+        search_end = found
+    return mm[:head_end], mm[tail_start:]
+
+
+def load_file(path: Path, budget: Optional[ContentBudget] = None, max_bytes: Optional[int] = None) -> dict:
+    """
+    Load a file for the model with bounded memory. Returns a dict with "path",
+    "kind", "encoding", "size" and either "content" (full text) or, for binary,
+    oversized or over-budget files, "lines", "head" and "tail".
+    """
+    settings = get_settings()
+    max_bytes = settings.max_file_bytes if max_bytes is None else max_bytes
+    size = path.stat().st_size
+    with path.open("rb") as f:
+        info = sniff(f.read(SNIFF_BYTES))
+        result = {"path": str(path).replace("\\", "/"), "kind": info["kind"], "encoding": info["encoding"], "size": size}
+        if info["binary"]:
+            result["reason"] = "binary"
+            return result
+
+        allowed = max_bytes if budget is None else min(max_bytes, budget.remaining)
+        if size <= allowed and info["kind"] != "minified text":
+            f.seek(0)
+            result["content"] = f.read().decode(info["encoding"], errors="replace")
+            if budget is not None:
+                budget.consume(size)
+            return result
+
+        result["reason"] = "minified" if info["kind"] == "minified text" else (
+            "too large" if size > max_bytes else "turn budget exhausted")
+        if size == 0:
+            result.update(lines=0, head="", tail="")
+            return result
+        # The stub's excerpts come out of the same budget, so they shrink as it runs out
+        max_chars = SNIFF_BYTES if budget is None else min(SNIFF_BYTES, budget.remaining // 2)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            head, tail = _head_tail(mm, settings.stub_head_lines, settings.stub_tail_lines,
+                                    max_chars=max_chars)
+            result["lines"] = _count_lines(mm)
+        result["head"] = head.decode(info["encoding"], errors="replace")
+        result["tail"] = tail.decode(info["encoding"], errors="replace")
+        if budget is not None:
+            budget.consume(len(head) + len(tail))
+        return result
+
+
+def render(result: dict) -> str:
+    """Text for the prompt: the content itself, or a stub describing what was left out."""
+    if "content" in result:
+        return result["content"]
+    lines = [f"[Not loaded in full: {result.get('reason')}]",
+             f"type: {result['kind']}, size: {result['size']} bytes"]
+    if result.get("encoding"):
+        lines[-1] += f", encoding: {result['encoding']}"
+    if "lines" in result:
+        lines[-1] += f", lines: {result['lines']}"
+        lines.append("--- head ---")
+        lines.append(result["head"].rstrip("\n"))
+        if result["tail"]:
+            lines.append("--- tail ---")
+            lines.append(result["tail"].rstrip("\n"))
+    return "\n".join(lines)
+
+
+def read_for_prompt(path: Path, budget: Optional[ContentBudget] = None) -> str:
+    """load_file + render, with missing or unreadable files reported inline."""
+    try:
+        return render(load_file(path, budget))
+    except FileNotFoundError:
+        return f"File not found: {path}"
+    except OSError as e:
+        return f"Error reading file: {e}"
+
+
+class LineIndex:
+    """Byte offset of every line start in one version of a file."""
+
+    def __init__(self, path: Path, stamp):
+        from array import array
+
+        self.stamp = stamp
+        self.offsets = array("Q", [0])
+        with path.open("rb") as f:
+            self.encoding = sniff(f.read(SNIFF_BYTES))["encoding"] or "utf-8"
+            f.seek(0, 2)
+            self.size = f.tell()
+            if self.size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    position = mm.find(b"\n")
+                    while position != -1:
+                        self.offsets.append(position + 1)
+                        position = mm.find(b"\n", position + 1)
+        # A trailing newline doesn't start another line
+        if len(self.offsets) > 1 and self.offsets[-1] == self.size:
+            self.offsets.pop()
+        if not self.size:
+            self.offsets.pop()
+
+    @property
+    def line_count(self) -> int:
+        return len(self.offsets)
+
+    def line_start(self, line: int) -> int:
+        """Byte offset where 1-based `line` starts (or EOF past the last line)."""
+        return self.offsets[line - 1] if line <= len(self.offsets) else self.size
+
+
+_line_indexes = {}
+_MAX_LINE_INDEXES = 32
+
+
+def get_line_index(path: Path) -> LineIndex:
+    """Line index for the current version of path, rebuilt only when mtime/size change."""
+    stat = path.stat()
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    key = str(path.resolve())
+    index = _line_indexes.pop(key, None)
+    if index is None or index.stamp != stamp:
+        index = LineIndex(path, stamp)
+    _line_indexes[key] = index
+    # dicts keep insertion order, so the first key is the least recently used
+    while len(_line_indexes) > _MAX_LINE_INDEXES:
+        _line_indexes.pop(next(iter(_line_indexes)))
+    return index
+
+
+def read_range(path: Path, start: Optional[int] = None, end: Optional[int] = None,
+               offset: Optional[int] = None, length: Optional[int] = None,
+               budget: Optional[ContentBudget] = None, page_bytes: Optional[int] = None) -> dict:
+    """
+    Read lines start..end (1-based, inclusive) or `length` bytes from `offset`,
+    seeking straight to the range through the cached line index. Results larger
+    than page_bytes (or the turn budget) are cut short and carry "next_start" /
+    "next_offset" so the rest can be requested on a later turn.
+    """
+    from bisect import bisect_right
+
+    settings = get_settings()
+    page_bytes = page_bytes or settings.max_file_bytes
+    if budget is not None:
+        page_bytes = min(page_bytes, budget.remaining)
+    index = get_line_index(path)
+    result = {"path": str(path).replace("\\", "/"), "size": index.size, "total_lines": index.line_count}
+    if page_bytes <= 0:
+        result["reason"] = "turn budget exhausted"
+        return result
+
+    if offset is not None:
+        begin = max(0, min(offset, index.size))
+        stop = index.size if length is None else min(index.size, begin + max(0, length))
+        if stop - begin > page_bytes:
+            stop = begin + page_bytes
+            result["next_offset"] = stop
+        result.update(offset=begin, length=stop - begin)
+    else:
+        start = max(1, start or 1)
+        end = min(index.line_count, end or index.line_count)
+        if start > end:
+            result.update(start=start, end=end, content="")
+            return result
+        begin = index.line_start(start)
+        stop = index.line_start(end + 1)
+        if stop - begin > page_bytes:
+            # Last line that still fits in the page, but always at least one line
+            fits = bisect_right(index.offsets, begin + page_bytes) - 1
+            last = max(start, fits)
+            if last == start and index.line_start(start + 1) - begin > page_bytes:
+                # A single line longer than the page: continue it by byte offset
+                stop = begin + page_bytes
+                result["next_offset"] = stop
+            else:
+                stop = index.line_start(last + 1)
+                result["next_start"] = last + 1
+            end = last
+        result.update(start=start, end=end)
+
+    with path.open("rb") as f:
+        f.seek(begin)
+        data = f.read(stop - begin)
+    if budget is not None:
+        budget.consume(len(data))
+    result["content"] = data.decode(index.encoding, errors="replace")
+    return result
+
+
+def render_range(result: dict) -> str:
+    """Prompt text for a read_range result, with a header saying how to continue."""
+    if "content" not in result:
+        return f"[Not loaded: {result.get('reason')}; request this range again next turn]"
+    if "start" in result:
+        header = f"[lines {result['start']}-{result['end']} of {result['total_lines']}]"
+    else:
+        header = f"[bytes {result['offset']}-{result['offset'] + result['length']} of {result['size']}]"
+    text = f"{header}\n{result['content']}"
+    if "next_start" in result:
+        text += f'\n[more: request {{"provide": {{"start": {result["next_start"]}}}}} or {{"provide": {{"page": "next"}}}}]'
+    elif "next_offset" in result:
+        text += f'\n[more: request {{"provide": {{"offset": {result["next_offset"]}}}}} or {{"provide": {{"page": "next"}}}}]'
+    return text
@@ -0,0 +1,221 @@
+import json
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from rich.console import Console
+
+console = Console()
+
+SOCKET_FILE = Path("Sage/sage.sock")
+PID_FILE = Path("Sage/sage.pid")
+LOG_FILE = Path("Sage/daemon.log")
+
+
+def is_supported() -> bool:
+    return hasattr(socket, "AF_UNIX")
+
+
+class SageDaemon:
+    """Per-project state kept warm between terminal sessions."""
+
+    def __init__(self):
+        from .interface_store import get_interface_store
+
+        self.store = get_interface_store()
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.requests = 0
+        self._client = None
+        self._client_settings = None
+        self.watching = False
+
+    def client(self):
+        """Shared model client, rebuilt only when the settings object changes."""
+        from .api import OpenRouterClient
+        from .config import get_settings
+
+        settings = get_settings()
+        with self.lock:
+            if self._client is None or self._client_settings is not settings:
+                self._client = OpenRouterClient()
+                self._client_settings = settings
+            return self._client
+
+    def session(self, session_id: str):
+        from .combiner import Combiner
+
+        client = self.client()
+        with self.lock:
+            combiner = self.sessions.get(session_id)
+            if combiner is None or combiner.client is not client:
+                combiner = Combiner(client.api_key, client=client)
+                self.sessions[session_id] = combiner
+            return combiner
+
+    def handle(self, request: dict) -> dict:
+        op = request.get("op")
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid()}
+        if op == "ask":
+            with self.lock:
+                self.requests += 1
+            combiner = self.session(request.get("session", "default"))
+            response = combiner.get_ai_response(request.get("prompt", ""))
+            return {"ok": combiner.last_error is None, "response": response, "error": combiner.last_error}
+        if op == "end_session":
+            with self.lock:
+                self.sessions.pop(request.get("session"), None)
+            return {"ok": True}
+        if op == "status":
+            from .scheduler import get_scheduler
+            from .summary_worker import get_summary_worker
+            from .prompt_layout import cache_stats
+
+            interface = self.store.load() or {}
+            worker = get_summary_worker(create=False)
+            return {
+                "ok": True,
+                "pid": os.getpid(),
+                "uptime": round(time.time() - self.started_at, 1),
+                "sessions": len(self.sessions),
+                "requests": self.requests,
+                "files": sum(1 for key in interface if key not in ("command", "text", "update")),
+                "interface_version": self.store.version,
+                "watching": self.watching,
+                "summarized": list(worker.progress()) if worker else None,
+                "scheduler": get_scheduler().metrics(),
+                "prompt_cache": cache_stats.snapshot(),
+            }
+        return {"ok": False, "error": f"unknown op: {op}"}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        # One JSON request per line, one JSON response per line
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if request.get("op") == "shutdown":
+                    self._reply({"ok": True})
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+                    return
+                response = self.server.daemon_state.handle(request)
+            except Exception as e:
+                response = {"ok": False, "error": str(e)}
+            self._reply(response)
+
+    def _reply(self, response: dict):
+        self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+        self.wfile.flush()
+
+
+def serve():
+    """Run the daemon in the foreground until a shutdown request arrives."""
+    if not is_supported():
+        console.print("[red]x Unix domain sockets are not available on this platform[/red]")
+        return
+    if SOCKET_FILE.exists():
+        if ping():
+            console.print("[yellow]⚠️ Sage daemon is already running for this project[/yellow]")
+            return
+        SOCKET_FILE.unlink()
+
+    SOCKET_FILE.parent.mkdir(parents=True, exist_ok=True)
+    server = socketserver.ThreadingUnixStreamServer(str(SOCKET_FILE), _Handler)
+    server.daemon_threads = True
+    server.daemon_state = SageDaemon()
+    from .watcher import start_watching, stop_watching
+    watcher = start_watching()
+    server.daemon_state.watching = watcher is not None
+    PID_FILE.write_text(str(os.getpid()), encoding="utf-8")
+    console.print(f"[green]✓ Sage daemon listening on {SOCKET_FILE}[/green]")
+    try:
+        server.serve_forever()
+    finally:
+        stop_watching(watcher)
+        server.server_close()
+        for path in (SOCKET_FILE, PID_FILE):
+            if path.exists():
+                path.unlink()
+
+
+def start_background() -> bool:
+    """Spawn the daemon detached from this terminal and wait for it to answer."""
+    if ping():
+        return True
+    LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with LOG_FILE.open("a", encoding="utf-8") as log:
+        subprocess.Popen(
+            [sys.executable, "-m", "sage.Core.daemon"],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+            start_new_session=True,
+        )
+    for _ in range(50):
+        if ping():
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def request(payload: dict, timeout: Optional[float] = None) -> dict:
+    """Send one request to this project's daemon and wait for the reply."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(SOCKET_FILE))
+        sock.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+        buffer = b""
+        while not buffer.endswith(b"\n"):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            buffer += chunk
+    return json.loads(buffer.decode("utf-8"))
+
+
+def ping() -> bool:
+    if not is_supported() or not SOCKET_FILE.exists():
+        return False
+    try:
+        return request({"op": "ping"}, timeout=1.0).get("ok", False)
+    except (OSError, ValueError):
+        return False
+
+
+class DaemonClient:
+    """Drop-in for Combiner that forwards turns to the project's daemon."""
+
+    def __init__(self):
+        self.session_id = uuid.uuid4().hex
+        self.last_error = None
+
+    def get_ai_response(self, user_prompt: str) -> str:
+        try:
+            reply = request({"op": "ask", "session": self.session_id, "prompt": user_prompt})
+        except OSError as e:
+            self.last_error = str(e)
+            return f"Error: Sage daemon unavailable ({e})"
+        self.last_error = reply.get("error")
+        return reply.get("response") or reply.get("error") or ""
+
+    def close(self):
+        try:
+            request({"op": "end_session", "session": self.session_id}, timeout=1.0)
+        except (OSError, ValueError):
+            pass
+
+
+if __name__ == "__main__":
+    serve()
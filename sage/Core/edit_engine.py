@@ -0,0 +1,208 @@
+import difflib
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Union
+
+from .content import sniff, SNIFF_BYTES
+
+
+# Only these end a line for the edit engine; str.splitlines() would also split on
+# form feeds, vertical tabs, \x1c-\x1e, \x85 and \u2028 and disagree about line numbers
+LINE_BREAK_RE = re.compile(r"\r\n|\n|\r")
+
+
+class EditError(Exception):
+    """An edit that can't be applied; the message says exactly why."""
+
+
+class Hunk:
+    """
+    Replace original lines start..end (1-based, inclusive) with `lines`.
+    end == start - 1 inserts before line `start` without replacing anything.
+    """
+
+    def __init__(self, start: int, end: int, lines: List[str]):
+        self.start = start
+        self.end = end
+        self.lines = lines
+
+    def __repr__(self):
+        return f"Hunk({self.start}-{self.end}, {len(self.lines)} lines)"
+
+
+def split_lines(text: str) -> List[str]:
+    """Lines of text without their endings, split only at \\n, \\r\\n and \\r like the edit engine."""
+    lines = LINE_BREAK_RE.split(text)
+    if lines[-1] == "":
+        lines.pop()
+    return lines
+
+
+def _content_lines(content) -> List[str]:
+    if isinstance(content, str):
+        return split_lines(content)
+    if isinstance(content, list):
+        return [str(line) for line in content]
+    raise EditError(f"content must be a list of lines or a string, got {type(content).__name__}")
+
+
+def parse_hunks(edit_data: Union[Dict, List[Dict]]) -> List[Hunk]:
+    """Hunks from an edit request: one {start, end, content} object or a list of them."""
+    items = edit_data if isinstance(edit_data, list) else [edit_data]
+    hunks = []
+    for number, item in enumerate(items, 1):
+        if not isinstance(item, dict):
+            raise EditError(f"hunk {number} is not an object")
+        start = item.get("start", 1)
+        end = item.get("end")
+        if not isinstance(start, int) or start < 1:
+            raise EditError(f"hunk {number}: start must be a line number >= 1, got {start!r}")
+        if end is not None and (not isinstance(end, int) or end < start - 1):
+            raise EditError(f"hunk {number}: end must be >= start - 1 (start - 1 inserts), got {end!r}")
+        hunks.append(Hunk(start, end, _content_lines(item.get("content", []))))
+    return hunks
+
+
+def check_overlaps(hunks: List[Hunk]) -> List[Hunk]:
+    """Hunks in file order; raises EditError if any two touch the same original line."""
+    # Stable sort keeps inserts at the same spot in the order they were given
+    ordered = sorted(hunks, key=lambda hunk: hunk.start)
+    for previous, hunk in zip(ordered, ordered[1:]):
+        if previous.end is None or hunk.start <= previous.end:
+            last = "end of file" if previous.end is None else previous.end
+            other = "end of file" if hunk.end is None else hunk.end
+            raise EditError(f"hunks overlap: lines {previous.start}-{last} and {hunk.start}-{other}")
+    return ordered
+
+
+def detect_newline(path: Path, encoding: str) -> str:
+    """The newline style of the first line ending in the file ("\\n" if none)."""
+    with path.open("r", encoding=encoding, errors="surrogateescape", newline="") as f:
+        for line in f:
+            for newline in ("\r\n", "\n", "\r"):
+                if line.endswith(newline):
+                    return newline
+            break
+    return "\n"
+
+
+def apply_hunks(path: Path, hunks: List[Hunk]) -> Dict:
+    """
+    Apply all hunks to `path` in one streaming pass. Line numbers refer to the
+    file as it is now; untouched lines are copied byte for byte, new lines use
+    the file's encoding and newline style, and the file is replaced atomically.
+    """
+    with path.open("rb") as f:
+        info = sniff(f.read(SNIFF_BYTES))
+    if info["binary"]:
+        raise EditError(f"{path} is {info['kind']}, not text")
+    encoding = info["encoding"] or "utf-8"
+    newline = detect_newline(path, encoding)
+    ordered = check_overlaps(hunks)
+
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding=encoding, errors="surrogateescape", newline="") as out, \
+                path.open("r", encoding=encoding, errors="surrogateescape", newline="") as src:
+            # Line endings are written lazily: a newline is owed after each new line and after an
+            # original line that had none, and paid only if more text follows (or the file had one)
+            state = {"owed": False}
+
+            def write(text: str, ended: bool):
+                if state["owed"]:
+                    out.write(newline)
+                out.write(text)
+                state["owed"] = not ended
+
+            pending = list(ordered)
+            number = 0
+            skip_until = 0
+            last_line_ended = True
+            for line in src:
+                number += 1
+                last_line_ended = line.endswith(("\n", "\r"))
+                while pending and pending[0].start == number:
+                    hunk = pending.pop(0)
+                    for new_line in hunk.lines:
+                        write(new_line, False)
+                    skip_until = float("inf") if hunk.end is None else hunk.end
+                if number <= skip_until:
+                    continue
+                write(line, last_line_ended)
+
+            if skip_until != float("inf") and skip_until > number:
+                raise EditError(f"hunk ends at line {skip_until} but {path} has only {number} lines")
+            for hunk in pending:
+                if hunk.start > number + 1 or (hunk.end is not None and hunk.end > number):
+                    raise EditError(f"hunk {hunk.start}-{hunk.end} is past the end of {path} ({number} lines)")
+                for new_line in hunk.lines:
+                    write(new_line, False)
+            if state["owed"] and last_line_ended:
+                out.write(newline)
+        shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return {
+        "hunks": len(ordered),
+        "removed": sum((number if h.end is None else h.end) - h.start + 1 for h in ordered),
+        "added": sum(len(h.lines) for h in ordered),
+        "lines": number,
+    }
+
+
+def _conflict(hunk: Hunk, base: List[str], current: List[str]) -> str:
+    """The parts of the base -> current diff that touch one hunk's lines."""
+    first = hunk.start - 1
+    last = len(base) if hunk.end is None else max(hunk.end, hunk.start)
+    kept, keep = [], False
+    for line in list(difflib.unified_diff(base, current, "your version", "file now", lineterm="", n=1))[2:]:
+        if line.startswith("@@"):
+            old = line.split()[1][1:].split(",")
+            start, count = int(old[0]), int(old[1]) if len(old) > 1 else 1
+            keep = start - 1 <= last and start - 1 + count >= first
+        if keep:
+            kept.append(line)
+    return "\n".join(kept[:40])
+
+
+def rebase_hunks(hunks: List[Hunk], base: List[str], current: List[str]) -> List[Hunk]:
+    """
+    Move hunks written against `base` onto `current`. A hunk survives only if
+    every line it replaces (or the spot it inserts at) is unchanged in `current`;
+    otherwise EditError carries a minimal diff of the conflicting region.
+    """
+    blocks = difflib.SequenceMatcher(None, base, current, autojunk=False).get_matching_blocks()
+    rebased = []
+    for hunk in check_overlaps(hunks):
+        first = hunk.start - 1
+        last = len(base) if hunk.end is None else hunk.end
+        moved = None
+        for a, b, size in blocks:
+            if hunk.end is not None and hunk.end < hunk.start:
+                # Insert: the spot must sit inside or at the edge of an unchanged block
+                if a <= first <= a + size and (size or a == len(base)):
+                    moved = Hunk(first - a + b + 1, first - a + b, hunk.lines)
+                    break
+            elif a <= first and last <= a + size:
+                if hunk.end is None and (a + size != len(base) or b + size != len(current)):
+                    break
+                moved = Hunk(first - a + b + 1, None if hunk.end is None else last - a + b, hunk.lines)
+                break
+        if moved is None:
+            raise EditError(f"lines {hunk.start}-{'end' if hunk.end is None else hunk.end} changed since your version:\n"
+                            + _conflict(hunk, base, current))
+        rebased.append(moved)
+    return rebased
+
+
+def edit_file(path: Path, edit_data: Union[Dict, List[Dict]]) -> Dict:
+    """Parse, validate and apply an edit request to `path`."""
+    if not path.exists():
+        raise EditError(f"file not found: {path}")
+    return apply_hunks(path, parse_hunks(edit_data))
@@ -0,0 +1,260 @@
+import json
+from pathlib import Path
+from typing import Dict, Optional
+
+from .config import get_settings
+
+RESERVED_KEYS = ("command", "text", "update")
+FORMATS = ("json", "compact")
+HEADER = "#sage-interface v1"
+# Explains the compact format to the model; sent right before the encoded interface
+FORMAT_NOTE = (
+    "The project interface below uses a compact format: a line ending in \"/\" opens a folder and "
+    "deeper indentation (2 spaces) is inside it. A file line is `name #index: summary <-dependents` "
+    "(dependents are comma-separated indices), optionally followed by ` ?request` as JSON; keys in it "
+    "starting with @ are other fields of the entry. A summary or name in double quotes is a JSON string. "
+    "`name =value` is a file without a summary. `@key value` lines are the special keys (value is JSON). "
+    "Your reply format is unchanged: full relative paths as keys. In reply objects you may shorten "
+    "summary/index/dependents/request to s/i/d/r."
+)
+SHORT_KEYS = {"s": "summary", "i": "index", "d": "dependents", "r": "request"}
+# Entry fields written inline; anything else rides in the ?{...} tail under an "@" prefix
+ENTRY_DEFAULTS = {"summary": "", "index": None, "dependents": [], "request": {}}
+# Tail key listing standard fields the entry didn't have, so decoding doesn't invent them
+MISSING_KEY = "@"
+
+
+def _quote(name: str) -> str:
+    """Names that would confuse the line format are written as JSON strings."""
+    if (not name or name != name.strip() or name.startswith(('"', "@", "#")) or name.endswith("/")
+            or " #" in name or " =" in name or "\n" in name or "\r" in name):
+        return json.dumps(name)
+    return name
+
+
+def _unquote(name: str) -> str:
+    return json.loads(name) if name.startswith('"') else name
+
+
+def _quote_summary(summary: str) -> str:
+    """Summaries that contain the line format's separators are written as JSON strings."""
+    if (summary != summary.strip() or summary.startswith(('"', "<-", "?{")) or "\n" in summary
+            or "\r" in summary or " #" in summary or " <-" in summary or " ?{" in summary):
+        return json.dumps(summary)
+    return summary
+
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _entry_line(name: str, value: Dict) -> str:
+    inline, tail = {}, {}
+    for key, item in value.items():
+        if ((key == "summary" and isinstance(item, str)) or (key == "index" and _is_int(item))
+                or (key == "dependents" and isinstance(item, list) and all(_is_int(d) for d in item))
+                or (key == "request" and isinstance(item, dict) and not any(k.startswith("@") for k in item))):
+            inline[key] = item
+        else:
+            tail["@" + key] = item
+    missing = [key for key in ENTRY_DEFAULTS if key not in value]
+    if missing:
+        tail[MISSING_KEY] = missing
+    line = f"{_quote(name)} #{inline.get('index', '')}:"
+    if inline.get("summary"):
+        line += " " + _quote_summary(inline["summary"])
+    if inline.get("dependents"):
+        line += " <-" + ",".join(str(d) for d in inline["dependents"])
+    tail = {**inline.get("request", {}), **tail}
+    if tail:
+        line += " ?" + json.dumps(tail, separators=(",", ":"), ensure_ascii=False)
+    return line
+
+
+def _parse_entry(rest: str) -> Dict:
+    """Inverse of _entry_line for the part after the name (starting at " #")."""
+    head, _, rest = rest[2:].partition(":")
+    entry = dict(ENTRY_DEFAULTS, dependents=[], request={})
+    entry["index"] = int(head) if head.lstrip("-").isdigit() else None
+    if rest.startswith(' "'):
+        summary, end = json.JSONDecoder().raw_decode(rest, 1)
+        entry["summary"], rest = summary, rest[end:]
+    else:
+        cuts = [at for at in (rest.find(" <-"), rest.find(" ?{")) if at != -1]
+        cut = min(cuts, default=len(rest))
+        entry["summary"], rest = rest[1:cut], rest[cut:]
+    if rest.startswith(" <-"):
+        dependents, _, rest = rest[3:].partition(" ")
+        entry["dependents"] = [int(d) for d in dependents.split(",") if d]
+        rest = " " + rest if rest else ""
+    if rest.startswith(" ?"):
+        tail = json.loads(rest[2:])
+        for key in tail.pop(MISSING_KEY, []):
+            entry.pop(key, None)
+        for key in [key for key in tail if key.startswith("@")]:
+            entry[key[1:]] = tail.pop(key)
+        if tail:
+            entry["request"] = tail
+    return entry
+
+
+def encode_interface(interface_data: Dict) -> str:
+    """Serialize an interface as a path trie with shared folder prefixes and minimal punctuation."""
+    tree: Dict = {}
+    for path, value in interface_data.items():
+        if path in RESERVED_KEYS:
+            continue
+        parts = path.split("/")
+        node = tree
+        for part in parts[:-1]:
+            node = node.setdefault(part + "/", {})
+        node[parts[-1]] = value
+
+    lines = [HEADER]
+
+    def emit(node: Dict, depth: int):
+        # Files before folders, each alphabetically, so the same tree always encodes the same way
+        for name in sorted(node, key=lambda key: (key.endswith("/"), key)):
+            value = node[name]
+            indent = "  " * depth
+            if name.endswith("/"):
+                lines.append(f"{indent}{_quote(name[:-1])}/")
+                emit(value, depth + 1)
+            elif isinstance(value, dict):
+                lines.append(indent + _entry_line(name, value))
+            elif isinstance(value, str) and "\n" not in value and "\r" not in value and not value.startswith("="):
+                lines.append(f"{indent}{_quote(name)} ={value}")
+            else:
+                # `==` marks a JSON value (non-strings, or strings the plain form can't hold)
+                lines.append(f"{indent}{_quote(name)} =={json.dumps(value, ensure_ascii=False)}")
+
+    emit(tree, 0)
+    for key in RESERVED_KEYS:
+        if key in interface_data:
+            lines.append(f"@{key} {json.dumps(interface_data[key], separators=(',', ':'), ensure_ascii=False)}")
+    return "\n".join(lines)
+
+
+def decode_interface(text: str) -> Dict:
+    """Inverse of encode_interface."""
+    data = {}
+    folders = []
+    for raw in text.splitlines():
+        if not raw.strip() or raw.startswith(HEADER):
+            continue
+        if raw.startswith("@"):
+            key, _, value = raw[1:].partition(" ")
+            data[key] = json.loads(value) if value else ""
+            continue
+        depth = (len(raw) - len(raw.lstrip(" "))) // 2
+        line = raw.lstrip(" ")
+        del folders[depth:]
+        if line.startswith('"'):
+            end = json.JSONDecoder().raw_decode(line)[1]
+            name, rest = _unquote(line[:end]), line[end:]
+        elif line.endswith("/") and " #" not in line and " =" not in line:
+            name, rest = line[:-1], "/"
+        else:
+            cut = min((i for i in (line.find(" #"), line.find(" =")) if i != -1), default=len(line))
+            name, rest = line[:cut], line[cut:]
+        if rest == "/":
+            folders.append(name)
+            continue
+        path = "/".join(folders + [name])
+        if rest.startswith(" =="):
+            data[path] = json.loads(rest[3:])
+        elif rest.startswith(" ="):
+            data[path] = rest[2:]
+        else:
+            data[path] = _parse_entry(rest)
+    return data
+
+
+def expand_short_keys(value):
+    """Expand s/i/d/r shorthand keys in a model reply back to the interface schema."""
+    if not isinstance(value, dict):
+        return value
+    if value and set(value) <= set(SHORT_KEYS) | set(SHORT_KEYS.values()):
+        return {SHORT_KEYS.get(key, key): item for key, item in value.items()}
+    return {key: expand_short_keys(item) for key, item in value.items()}
+
+
+def decode_reply(text: str) -> Optional[Dict]:
+    """Model reply (JSON, possibly with short keys, or a compact interface dump) as a dict; None if unparseable."""
+    cleaned = text.strip()
+    if cleaned.startswith("```"):
+        cleaned = cleaned.split("\n", 1)[1] if "\n" in cleaned else ""
+        cleaned = cleaned.rsplit("```", 1)[0].strip()
+    try:
+        return expand_short_keys(json.loads(cleaned))
+    except json.JSONDecodeError:
+        pass
+    if cleaned.startswith(HEADER):
+        try:
+            return decode_interface(cleaned)
+        except (ValueError, json.JSONDecodeError):
+            return None
+    return None
+
+
+def format_for_model(model: Optional[str] = None) -> str:
+    """Prompt format for a model: a PROMPT_FORMATS entry like `model=compact`, else PROMPT_FORMAT."""
+    from .bench import resolve_model
+
+    settings = get_settings()
+    model = model or resolve_model(settings.model)
+    for entry in settings.prompt_formats:
+        name, _, fmt = entry.rpartition("=")
+        if name.strip() == model and fmt.strip() in FORMATS:
+            return fmt.strip()
+    return settings.prompt_format if settings.prompt_format in FORMATS else "json"
+
+
+def interface_for_prompt(interface_data: Dict, model: Optional[str] = None) -> str:
+    """Interface text for a prompt in the model's configured format."""
+    if format_for_model(model) == "compact":
+        return f"{FORMAT_NOTE}\n{encode_interface(interface_data)}"
+    return json.dumps(interface_data, indent=2)
+
+
+def sample_interface(root: Path) -> Dict:
+    """A project's interface: Sage/interface.json if it has one, else built from local summaries."""
+    from sage.Starters.file_utils import is_ignored
+    from sage.Starters.common_ignors import common_ignores
+    from sage.Starters.local_summary import local_summaries
+    from sage.Starters.walker import walk_tree
+
+    interface_file = root / "Sage" / "interface.json"
+    if interface_file.exists():
+        return json.loads(interface_file.read_text(encoding="utf-8"))
+    patterns = [line.strip() for line in common_ignores if line.strip() and not line.startswith("#")]
+    files = sorted(path for path, _ in walk_tree(root, lambda rel: is_ignored(rel, patterns), with_stat=False))
+    results, importers = local_summaries(files, root)
+    indices = {path: index for index, path in enumerate(files, 1)}
+    data = {path: {"summary": results[path]["summary"], "index": indices[path],
+                   "dependents": sorted(indices[importer] for importer in importers[path]), "request": {}}
+            for path in files}
+    data.update({"command": {"summary": "", "terminal": "bash", "platform": "linux", "commands": []},
+                 "text": "place holder for your responce", "update": "yes/no"})
+    return data
+
+
+def bench_formats(interface_data: Dict) -> Dict:
+    """Characters and tokens of each prompt format for one interface, and whether compact round-trips."""
+    current = json.dumps(interface_data, indent=2)
+    compact = f"{FORMAT_NOTE}\n{encode_interface(interface_data)}"
+    return {
+        "files": sum(1 for key in interface_data if key not in RESERVED_KEYS),
+        "json": {"chars": len(current), "tokens": count_tokens(current)},
+        "compact": {"chars": len(compact), "tokens": count_tokens(compact)},
+        "round_trip": decode_interface(encode_interface(interface_data)) == interface_data,
+    }
+
+
+def count_tokens(text: str) -> int:
+    """Token count with tiktoken when installed, otherwise the usual ~4 characters per token estimate."""
+    try:
+        import tiktoken
+        return len(tiktoken.get_encoding("cl100k_base").encode(text))
+    except Exception:
+        return (len(text) + 3) // 4
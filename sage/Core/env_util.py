@@ -1,49 +1,51 @@
-from pathlib import Path
-import typer
 from rich.console import Console
+from .config import get_settings, ENV_FILE
 
 console = Console()
 
 def get_api_key():
-    """Get API key from .env file."""
-    # Check if .env exists and get API key
-    env_file = Path(".env")
-    if not env_file.exists():
-        console.print("[red]x Error: .env file not found[/red]")
-        return None
-    
-    # Load SAGE_API_KEY from .env
-    env_content = env_file.read_text(encoding="utf-8")
-    api_key = None
-    for line in env_content.splitlines():
-        if line.startswith("SAGE_API_KEY="):
-            api_key = line.split("=", 1)[1].strip()
-            break
-    
-    if not api_key:
-        console.print("[red]x Error: SAGE_API_KEY not found in .env file[/red]")
+    """Get API key from the cached project settings."""
+    settings = get_settings()
+    if not settings.api_key:
+        if not ENV_FILE.exists():
+            console.print("[red]x Error: .env file not found[/red]")
+        else:
+            console.print("[red]x Error: SAGE_API_KEY not found in .env file[/red]")
         return None
 
-    return api_key
+    return settings.api_key
+
+def get_backend_api_key(backend):
+    """API key to send to a backend: required (with an error if missing) or optional when it runs keyless."""
+    if backend.requires_api_key:
+        return get_api_key()
+    return get_settings().api_key
 
 def get_model():
-    """Get MODEL from .env file."""
-    # Check if .env exists
-    env_file = Path(".env")
-    if not env_file.exists():
-        console.print("[red]x Error: .env file not found[/red]")
+    """Get MODEL from the cached project settings, with MODEL=auto resolved to a benchmarked model."""
+    from .bench import resolve_model
+
+    settings = get_settings()
+    if not settings.model:
+        if not ENV_FILE.exists():
+            console.print("[red]x Error: .env file not found[/red]")
+        else:
+            console.print("[red]x Error: MODEL not found in .env file[/red]")
         return None
-    
-    # Load MODEL from .env
-    env_content = env_file.read_text(encoding="utf-8")
-    model = None
-    for line in env_content.splitlines():
-        if line.startswith("MODEL="):
-            model = line.split("=", 1)[1].strip()
-            break
-    
+
+    model = resolve_model(settings.model)
     if not model:
-        console.print("[red]x Error: MODEL not found in .env file[/red]")
-        return None
+        console.print("[red]x Error: MODEL=auto but no healthy benchmark results, run `sage bench-models`[/red]")
+    return model
+
+def get_env_value(key_name, default=None):
+    """Get an optional setting, falling back to default."""
+    return get_settings().get(key_name, default)
+
+def get_fallback_models():
+    """Get the ranked FALLBACK_MODELS chain (comma separated)."""
+    return get_settings().fallback_models
 
-    return model
\ No newline at end of file
+def get_hedge_deadline():
+    """Seconds to wait for a first token before hedging onto a backup model."""
+    return get_settings().hedge_deadline
@@ -0,0 +1,137 @@
+import queue
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from rich.console import Console
+
+from .scheduler import Cancellation
+
+console = Console()
+
+# Auth errors are tied to the key, not the model, so another model won't help
+NO_FALLBACK_STATUS = {401, 403}
+
+
+def _close_quietly(stream):
+    if stream is not None and hasattr(stream, "close"):
+        try:
+            stream.close()
+        except Exception:
+            pass
+
+
+class _Attempt:
+    """One streaming completion against a single model, run on its own thread."""
+
+    def __init__(self, model: str, create: Callable, events: queue.Queue):
+        self.model = model
+        self.create = create
+        self.events = events
+        self.cancelled = Cancellation()
+        self.stream = None
+        self.lock = threading.Lock()
+        self.parts = []
+        self.error = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def cancel(self):
+        """Stop this attempt now: a stalled provider won't send the chunk that would let _run notice."""
+        self.cancelled.set()
+        with self.lock:
+            stream = self.stream
+        _close_quietly(stream)
+
+    def _run(self):
+        stream = None
+        try:
+            stream = self.create(self.model, self.cancelled)
+            with self.lock:
+                self.stream = stream
+            first = True
+            for chunk in stream:
+                if self.cancelled.is_set():
+                    break
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content or ""
+                if delta and first:
+                    first = False
+                    self.events.put((self, "first_token"))
+                self.parts.append(delta)
+            if not self.cancelled.is_set():
+                self.events.put((self, "done"))
+        except Exception as e:
+            self.error = e
+            self.events.put((self, "error"))
+        finally:
+            # Closing the stream drops the connection so a losing provider stops generating
+            _close_quietly(stream)
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+
+def should_fall_back(error: Exception) -> bool:
+    """True unless the error would repeat on every model (bad or missing key)"""
+    return getattr(error, "status_code", None) not in NO_FALLBACK_STATUS
+
+
+def hedged_completion(create: Callable, models: List[str], deadline: float) -> Tuple[str, str]:
+    """
+    Run a streaming completion against models[0] and hedge onto the next model in
+    the chain whenever no attempt has produced a first token within `deadline`
+    seconds, or immediately when an attempt fails. The first attempt to finish
+    wins and the rest are cancelled. Returns (text, model).
+    """
+    if not models:
+        raise ValueError("No models configured")
+
+    events = queue.Queue()
+    pending = list(models)
+    running: List[_Attempt] = []
+    streaming = False
+    last_error: Optional[Exception] = None
+
+    def launch():
+        attempt = _Attempt(pending.pop(0), create, events)
+        running.append(attempt)
+        attempt.start()
+        return time.monotonic()
+
+    launched_at = launch()
+
+    while running:
+        timeout = None
+        if not streaming and pending:
+            timeout = max(0.0, deadline - (time.monotonic() - launched_at))
+        try:
+            attempt, kind = events.get(timeout=timeout)
+        except queue.Empty:
+            console.print(f"[dim]No first token after {deadline:g}s, hedging onto {pending[0]}[/dim]")
+            launched_at = launch()
+            continue
+
+        if kind == "first_token":
+            streaming = True
+        elif kind == "done":
+            for other in running:
+                if other is not attempt:
+                    other.cancel()
+            return attempt.text, attempt.model
+        elif kind == "error":
+            running.remove(attempt)
+            last_error = attempt.error
+            if not should_fall_back(attempt.error):
+                for other in running:
+                    other.cancel()
+                raise attempt.error
+            if pending and (not running or not streaming):
+                console.print(f"[dim]{attempt.model} failed ({attempt.error}), falling back to {pending[0]}[/dim]")
+                launched_at = launch()
+
+    raise last_error or RuntimeError("All models in the fallback chain failed")
@@ -0,0 +1,91 @@
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from rich.console import Console
+
+console = Console()
+
+INTERFACE_FILE = Path("Sage/interface.json")
+
+
+class InterfaceStore:
+    """
+    Single owner of Sage/interface.json. Reads are cached until the file's
+    mtime/size changes, and writes go through a temp file plus os.replace so
+    concurrent readers never see a half-written index.
+    """
+
+    def __init__(self, interface_file: Path = INTERFACE_FILE):
+        self.interface_file = interface_file
+        self._lock = threading.RLock()
+        self._stamp = None
+        self._data: Optional[Dict] = None
+        self.version = 0
+
+    def _current_stamp(self):
+        try:
+            stat = self.interface_file.stat()
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def exists(self) -> bool:
+        return self.interface_file.exists()
+
+    def load(self) -> Optional[Dict]:
+        """Return the interface, re-reading the file only when it changed on disk."""
+        with self._lock:
+            stamp = self._current_stamp()
+            if stamp is None:
+                return None
+            if stamp != self._stamp or self._data is None:
+                with self.interface_file.open("r", encoding="utf-8") as f:
+                    self._data = json.load(f)
+                self._stamp = stamp
+                self.version += 1
+            return self._data
+
+    def save(self, data: Dict, indent: int = 4, sort_keys: bool = False):
+        """Atomically replace the interface file with data."""
+        with self._lock:
+            self.interface_file.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.interface_file.parent, prefix=".interface.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=indent, sort_keys=sort_keys)
+                os.replace(tmp_path, self.interface_file)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+            self._data = data
+            self._stamp = self._current_stamp()
+            self.version += 1
+
+    def update(self, mutate: Callable[[Dict], None]) -> Optional[Dict]:
+        """Load, mutate in place and save under one lock so concurrent updates don't interleave."""
+        with self._lock:
+            data = self.load()
+            if data is None:
+                return None
+            data = json.loads(json.dumps(data))
+            mutate(data)
+            self.save(data)
+            return data
+
+
+_stores: Dict[str, InterfaceStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_interface_store(interface_file: Path = INTERFACE_FILE) -> InterfaceStore:
+    """Shared store per interface file path"""
+    key = os.path.abspath(interface_file)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = InterfaceStore(interface_file)
+        return _stores[key]
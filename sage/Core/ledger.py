@@ -0,0 +1,99 @@
+import difflib
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# A diff is only worth sending when it is this much smaller than the new content
+MAX_DIFF_RATIO = 0.5
+# Provided versions kept per file for rebasing stale edits
+MAX_FILE_VERSIONS = 4
+
+
+def content_hash(text: str) -> str:
+    """Short content hash used to name a file version in the conversation."""
+    return hashlib.sha1(text.encode("utf-8", "surrogatepass")).hexdigest()[:12]
+
+
+def file_version(path: Path) -> str:
+    """Short hash of a file's bytes on disk; the version the model quotes back with its edits."""
+    digest = hashlib.sha1()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+class LedgerEntry:
+    def __init__(self, version: str, turn: int, text: str):
+        self.version = version
+        self.turn = turn
+        self.text = text
+
+
+class ContextLedger:
+    """
+    Per-session record of which file versions the model already has in its
+    visible context, keyed by path and view (full file, a range, a skeleton).
+    Repeat provides become a short reference or a diff against what was sent.
+    Entries from the current turn are staged and only count once the turn has
+    made it into the prompt history (commit_turn); a failed turn discards them.
+    """
+
+    def __init__(self, max_diff_ratio: float = MAX_DIFF_RATIO):
+        self.max_diff_ratio = max_diff_ratio
+        self.turn = 0
+        self.entries: Dict[Tuple[str, str], LedgerEntry] = {}
+        # Latest version sent per path, whatever the view (edits are checked against it)
+        self.latest: Dict[str, LedgerEntry] = {}
+        self.staged: Dict[Tuple[str, str], LedgerEntry] = {}
+        # path -> {file version: its lines}, so edits against an older version can be rebased
+        self.file_versions: Dict[str, Dict[str, List[str]]] = {}
+
+    def send(self, path: str, view: str, text: str) -> str:
+        """What to put in the prompt for `text` (the content of `path` seen through `view`)."""
+        version = content_hash(text)
+        previous = self.staged.get((path, view)) or self.entries.get((path, view))
+        if previous is not None and previous.version == version:
+            return f"[unchanged since turn {previous.turn} (version {version}); see the content sent then]"
+        self.staged[(path, view)] = LedgerEntry(version, self.turn, text)
+        if previous is not None:
+            diff = "\n".join(difflib.unified_diff(
+                previous.text.splitlines(), text.splitlines(),
+                f"{path}@{previous.version}", f"{path}@{version}", lineterm="", n=2))
+            if len(diff) < self.max_diff_ratio * len(text):
+                return (f"[changed since turn {previous.turn}: version {previous.version} -> {version}; "
+                        f"diff against the content sent then]\n{diff}")
+        return text
+
+    def begin_turn(self, turn: int):
+        self.staged.clear()
+        self.turn = turn
+
+    def commit_turn(self):
+        """The turn is now part of the prompt history: its content counts as seen."""
+        for (path, view), entry in self.staged.items():
+            self.entries[(path, view)] = entry
+            self.latest[path] = entry
+        self.staged.clear()
+
+    def discard_turn(self):
+        """The turn never reached the model's history; forget what it would have sent."""
+        self.staged.clear()
+
+    def version_of(self, path: str) -> Optional[LedgerEntry]:
+        return self.latest.get(path)
+
+    def remember_file(self, path: str, version: str, lines: List[str]):
+        versions = self.file_versions.setdefault(path, {})
+        versions.pop(version, None)
+        versions[version] = lines
+        while len(versions) > MAX_FILE_VERSIONS:
+            versions.pop(next(iter(versions)))
+
+    def file_lines(self, path: str, version: str) -> Optional[List[str]]:
+        return self.file_versions.get(path, {}).get(version)
+
+    def forget_before(self, turn: int):
+        """Drop versions sent before `turn`, e.g. once those turns are trimmed from the prompt."""
+        self.entries = {key: entry for key, entry in self.entries.items() if entry.turn >= turn}
+        self.latest = {path: entry for path, entry in self.latest.items() if entry.turn >= turn}
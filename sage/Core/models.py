@@ -1,3 +1,8 @@
+from typing import Optional
+
+# Rough size of a token in characters, for fitting prompts into a context window
+CHARS_PER_TOKEN = 4
+
 models = [
         {
             "model": "google/gemini-2.0-flash-exp:free",
@@ -254,4 +259,20 @@ models = [
             "price": "$0",
             "context": "8,192"
         }
-    ]
\ No newline at end of file
+    ]
+
+
+def context_length(model: str) -> Optional[int]:
+    """Context window in tokens of a model listed above, else None."""
+    for entry in models:
+        if entry["model"] == model:
+            return int(entry["context"].replace(",", ""))
+    return None
+
+
+def context_chars(model: str, reserve_tokens: int = 0) -> int:
+    """Characters of prompt that fit in the model's context window, leaving reserve_tokens for the reply."""
+    from .config import get_settings
+
+    tokens = context_length(model) or get_settings().context_tokens
+    return max(0, (tokens - reserve_tokens) * CHARS_PER_TOKEN)
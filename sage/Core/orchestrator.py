@@ -4,26 +4,58 @@ from rich.console import Console
 from typing import Dict, Any
 import subprocess
 import os
+from .interface_store import get_interface_store
+from .content import ContentBudget, load_file, read_range, render, render_range
+from .skeleton import skeleton_for_prompt
+from .ledger import ContextLedger, file_version
+from .edit_engine import EditError, apply_hunks, parse_hunks, rebase_hunks
+from .patches import patch_file, read_lines
+from .snapshots import get_snapshot_store
+from .config import get_settings
 
 console = Console()
 
+# Requests that change files on disk (and so get recorded in a checkpoint)
+FILE_CHANGES = ("write", "edit", "patch", "replace", "delete", "rename")
+
 class Orchestrator:
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.interface_file = Path("Sage/interface.json")
+        self.interface_store = get_interface_store(self.interface_file)
+        # Where the next page of a cut-short provide starts, per file
+        self.pending_pages = {}
+        # File versions already in the model's context this session
+        self.ledger = ContextLedger()
     
     def process_ai_response(self, ai_response: Dict[str, Any]) -> dict:
+        # Everything this response changes on disk becomes one checkpoint, for undo/redo
+        store = get_snapshot_store()
+        checkpoint = store.begin() if store else None
         try:
             program_results = []
             actions_taken = False
+            # Caps how much file content one response can pull into the next prompt
+            budget = ContentBudget(get_settings().max_turn_bytes)
             
             for file_path, file_data in ai_response.items():
                 if file_path not in ["text", "command", "update"] and isinstance(file_data, dict):
                     request = file_data.get("request", {})
+                    if checkpoint is not None and any(key in request for key in FILE_CHANGES):
+                        checkpoint.record(file_path)
+                        if "rename" in request:
+                            checkpoint.record(str(self._rename_target(file_path, request["rename"])))
                     
                     if "provide" in request:
-                        file_content = self._read_file(file_path)
-                        program_results.append(f"File content for {file_path}:\n{file_content}")
+                        spec = request["provide"]
+                        if isinstance(spec, dict) and spec.get("page") == "next":
+                            # Each page is its own view, so pages aren't diffed against one another
+                            spec = self.pending_pages.get(file_path, spec)
+                        view = json.dumps(spec, sort_keys=True)
+                        file_content = self.ledger.send(file_path, view, self._read_file(file_path, budget, spec))
+                        version = self._remember_version(file_path)
+                        tag = f" (version {version})" if version else ""
+                        program_results.append(f"File content for {file_path}{tag}:\n{file_content}")
                         actions_taken = True
                     
                     elif "write" in request:
@@ -33,8 +65,13 @@ class Orchestrator:
                         actions_taken = True
                     
                     elif "edit" in request:
-                        result = self._edit_file(file_path, request["edit"])
-                        program_results.append(f"✓ {file_path} edited successfully" if result else f"❌ Failed to edit {file_path}")
+                        result, detail = self._edit_file(file_path, request["edit"], request.get("version"))
+                        program_results.append(f"✓ {file_path} edited successfully ({detail})" if result else f"❌ Failed to edit {file_path}: {detail}")
+                        actions_taken = True
+                    
+                    elif "patch" in request or "replace" in request:
+                        result, detail = self._patch_file(file_path, request)
+                        program_results.append(f"✓ {file_path} patched successfully ({detail})" if result else f"❌ Failed to patch {file_path}: {detail}")
                         actions_taken = True
                     
                     elif "delete" in request:
@@ -94,6 +131,12 @@ class Orchestrator:
                 "has_actions": True,
                 "results": f"❌ Error in orchestrator: {str(e)}"
             }
+        finally:
+            if checkpoint is not None and checkpoint.before:
+                label = ", ".join(checkpoint.before)
+                number = store.commit(checkpoint, label if len(label) <= 80 else label[:77] + "...")
+                if number:
+                    console.print(f"[dim]Checkpoint {number} saved (type undo to revert)[/dim]")
     
     def update_interface_json(self, new_interface_data: Dict[str, Any]):
         try:
@@ -105,8 +148,7 @@ class Orchestrator:
                 data_to_write["update"] = ""
                 # data_to_write["text"] = "place holder text for your response"
             # Write the exact AI response (with only update field changed) to the file
-            with open(self.interface_file, 'w', encoding='utf-8') as f:
-                json.dump(data_to_write, f, indent=2)
+            self.interface_store.save(data_to_write, indent=2)
             
             console.print("[green]✓ Interface JSON updated successfully[/green]")
             return True
@@ -114,34 +156,107 @@ class Orchestrator:
             console.print(f"[red]❌ Error updating interface JSON: {e}[/red]")
             return False
     
-    def _read_file(self, file_path: str) -> str:
+    def _read_file(self, file_path: str, budget: ContentBudget = None, spec: Dict = None) -> str:
         try:
             path = Path(file_path)
-            if path.exists():
-                return path.read_text(encoding='utf-8')
-            else:
+            if not path.exists():
                 return f"File not found: {file_path}"
+            spec = spec if isinstance(spec, dict) else {}
+            if spec.get("mode") == "skeleton":
+                return skeleton_for_prompt(path, budget)
+            if spec.get("page") == "next":
+                if file_path not in self.pending_pages:
+                    return f"No further pages pending for {file_path}"
+                spec = self.pending_pages[file_path]
+            ranged = any(key in spec for key in ("start", "end", "offset", "length"))
+            if not ranged:
+                loaded = load_file(path, budget)
+                # Whole text files that didn't fit are paged from the top instead of stubbed
+                if "content" in loaded or loaded.get("reason") not in ("too large", "turn budget exhausted"):
+                    self.pending_pages.pop(file_path, None)
+                    return render(loaded)
+                spec = {"start": 1}
+            result = read_range(
+                path,
+                start=spec.get("start"),
+                end=spec.get("end"),
+                offset=spec.get("offset"),
+                length=spec.get("length"),
+                budget=budget,
+            )
+            if "next_start" in result:
+                self.pending_pages[file_path] = {"start": result["next_start"], "end": spec.get("end")}
+            elif "next_offset" in result:
+                remaining = None
+                if spec.get("length") is not None:
+                    remaining = spec["length"] - (result["next_offset"] - result["offset"])
+                self.pending_pages[file_path] = {"offset": result["next_offset"], "length": remaining}
+            elif "content" in result:
+                self.pending_pages.pop(file_path, None)
+            else:
+                # Budget ran out before anything was read: retry the same range next turn
+                self.pending_pages[file_path] = spec
+            return render_range(result)
         except Exception as e:
             return f"Error reading file: {str(e)}"
     
-    def _edit_file(self, file_path: str, edit_data: Dict) -> bool:
+    def _remember_version(self, file_path: str):
+        """Version of the file as the model now sees it, kept for rebasing if it's small enough."""
+        path = Path(file_path)
+        try:
+            if not path.is_file():
+                return None
+            version = file_version(path)
+            if self.ledger.file_lines(file_path, version) is None and path.stat().st_size <= get_settings().rebase_max_bytes:
+                self.ledger.remember_file(file_path, version, read_lines(path))
+            return version
+        except (OSError, EditError):
+            return None
+
+    def _rebase(self, file_path: str, hunks: list, version: str) -> tuple:
+        """Hunks written against `version`, moved onto the file as it is now; returns (hunks, note)."""
+        path = Path(file_path)
+        current = file_version(path)
+        if current == version:
+            return hunks, ""
+        base = self.ledger.file_lines(file_path, version)
+        if base is None:
+            raise EditError(f"{file_path} changed since version {version} (now {current}) and that version is unknown; provide the file again")
+        rebased = rebase_hunks(hunks, base, read_lines(path))
+        return rebased, f", rebased from version {version} onto {current}"
+
+    def _edit_file(self, file_path: str, edit_data, version: str = None) -> tuple:
+        """Apply one hunk or a list of hunks in a single pass; returns (ok, detail for the model)."""
         try:
             path = Path(file_path)
             if not path.exists():
-                console.print(f"[red]❌ File not found for editing: {file_path}[/red]")
-                return False
-            
-            content = path.read_text(encoding='utf-8').splitlines()
-            start = edit_data.get("start", 1) - 1
-            end = edit_data.get("end", len(content))
-            new_content = edit_data.get("content", [])
-            updated_content = content[:start] + new_content + content[end:]
-            path.write_text("\n".join(updated_content), encoding='utf-8')
-            return True
+                raise EditError(f"file not found: {file_path}")
+            hunks, note = parse_hunks(edit_data), ""
+            if version:
+                hunks, note = self._rebase(file_path, hunks, version)
+            stats = apply_hunks(path, hunks)
+            new_version = self._remember_version(file_path)
+            return True, f"{stats['hunks']} hunk(s), -{stats['removed']} +{stats['added']} lines{note}; now version {new_version}"
+        except EditError as e:
+            console.print(f"[red]❌ Error editing {file_path}: {e}[/red]")
+            return False, str(e)
         except Exception as e:
             console.print(f"[red]❌ Error editing file: {e}[/red]")
-            return False
+            return False, str(e)
     
+    def _patch_file(self, file_path: str, request: Dict) -> tuple:
+        """Apply a unified diff ("patch") or search/replace blocks ("replace"); returns (ok, detail for the model)."""
+        try:
+            stats = patch_file(Path(file_path), patch=request.get("patch"), replace=request.get("replace"))
+            new_version = self._remember_version(file_path)
+            return True, f"{stats['hunks']} hunk(s), -{stats['removed']} +{stats['added']} lines; now version {new_version}"
+        except EditError as e:
+            console.print(f"[red]❌ Error patching {file_path}: {e}[/red]")
+            return False, str(e)
+        except Exception as e:
+            console.print(f"[red]❌ Error patching file: {e}[/red]")
+            return False, str(e)
+
     def _write_file(self, file_path: str, content: list) -> bool:
         try:
             path = Path(file_path)
@@ -165,15 +280,20 @@ class Orchestrator:
             console.print(f"[red]❌ Error deleting file: {e}[/red]")
             return False
     
+    def _rename_target(self, old_path: str, new_name: str) -> Path:
+        """A bare new name stays in the old file's folder; a path is taken as given."""
+        new_path = Path(new_name)
+        if new_path.parent == Path('.'):
+            new_path = Path(old_path).parent / new_name
+        return new_path
+
     def _rename_file(self, old_path: str, new_name: str) -> bool:
         try:
             old_path_obj = Path(old_path)
             if not old_path_obj.exists():
                 console.print(f"[red]❌ File to rename not found: {old_path}[/red]")
                 return False
-            new_path_obj = Path(new_name)
-            if new_path_obj.parent == Path('.'):
-                new_path_obj = old_path_obj.parent / new_name
+            new_path_obj = self._rename_target(old_path, new_name)
             new_path_obj.parent.mkdir(parents=True, exist_ok=True)
             old_path_obj.rename(new_path_obj)
             return True
@@ -0,0 +1,183 @@
+import difflib
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from .content import sniff, SNIFF_BYTES
+from .edit_engine import EditError, Hunk, apply_hunks, split_lines
+
+HUNK_HEADER_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+# How many lines of the closest region are shown when a block can't be found
+MAX_REPORT_LINES = 12
+
+
+class PatchError(EditError):
+    """A patch or search/replace block that doesn't match the file."""
+
+
+def _normalize(line: str) -> str:
+    return " ".join(line.split())
+
+
+def _as_lines(text: Union[str, List[str]]) -> List[str]:
+    return [str(line) for line in text] if isinstance(text, list) else split_lines(text)
+
+
+def read_lines(path: Path) -> List[str]:
+    """The file's lines (without endings), decoded the way the edit engine will write them."""
+    with path.open("rb") as f:
+        info = sniff(f.read(SNIFF_BYTES))
+    if info["binary"]:
+        raise PatchError(f"{path} is {info['kind']}, not text")
+    # Iterating with newline="" breaks lines exactly where apply_hunks counts them
+    with path.open("r", encoding=info["encoding"] or "utf-8", errors="surrogateescape", newline="") as f:
+        return [line.rstrip("\r\n") for line in f]
+
+
+class Matcher:
+    """
+    Finds blocks of lines in a file: exact matches first, then matches that
+    ignore whitespace differences. Candidates come from an index of first lines,
+    so a lookup costs about one comparison per occurrence of the block's first line.
+    """
+
+    def __init__(self, lines: List[str]):
+        self.lines = lines
+        self.normalized = [_normalize(line) for line in lines]
+        self.exact: Dict[str, List[int]] = {}
+        self.loose: Dict[str, List[int]] = {}
+        for i, line in enumerate(lines):
+            self.exact.setdefault(line, []).append(i)
+            self.loose.setdefault(self.normalized[i], []).append(i)
+
+    def candidates(self, block: List[str], after: int = 0) -> List[int]:
+        """0-based starts of every match of block, exact matches if there are any, else whitespace-insensitive."""
+        size = len(block)
+        matches = [i for i in self.exact.get(block[0], []) if i >= after and self.lines[i:i + size] == block]
+        if matches:
+            return matches
+        wanted = [_normalize(line) for line in block]
+        return [i for i in self.loose.get(wanted[0], []) if i >= after and self.normalized[i:i + size] == wanted]
+
+    def closest(self, block: List[str]) -> str:
+        """Where the block most nearly appears, with a diff, for failure reports."""
+        wanted = set(_normalize(line) for line in block)
+        size = len(block)
+        hits = [1 if line in wanted else 0 for line in self.normalized]
+        # Sliding count of lines that also occur in the block
+        window = best = sum(hits[:size])
+        best_start = 0
+        for start in range(1, len(hits) - size + 1):
+            window += hits[start + size - 1] - hits[start - 1]
+            if window > best:
+                best, best_start = window, start
+        if best == 0:
+            # No line matches outright: fall back to the line most like the block's first line
+            close = difflib.get_close_matches(_normalize(block[0]), self.normalized, n=1, cutoff=0.6)
+            if not close:
+                return "no similar lines found in the file"
+            best_start = self.normalized.index(close[0])
+        actual = self.lines[best_start:best_start + size]
+        diff = [line for line in list(difflib.unified_diff(block, actual, "expected", "file", lineterm="", n=1))[2:]
+                if not line.startswith("@@")]
+        return (f"closest match is lines {best_start + 1}-{best_start + len(actual)}:\n"
+                + "\n".join(diff[:MAX_REPORT_LINES]))
+
+
+def _pick(matches: List[int], hint: Optional[int], what: str) -> int:
+    if len(matches) == 1:
+        return matches[0]
+    if hint is None:
+        lines = ", ".join(str(i + 1) for i in matches[:10])
+        raise PatchError(f"{what} matches {len(matches)} places (lines {lines}); add an anchor or a line hint")
+    # Several matches: the one nearest to where the model said it was
+    return min(matches, key=lambda i: abs(i - (hint - 1)))
+
+
+def parse_unified_diff(diff: str) -> List[Dict]:
+    """Hunks of a unified diff as {"hint": old start line, "lines": [(tag, text), ...]}."""
+    hunks = []
+    for raw in split_lines(diff):
+        header = HUNK_HEADER_RE.match(raw)
+        if header:
+            hunks.append({"hint": int(header.group(1)), "lines": []})
+        elif raw.startswith(("--- ", "+++ ", "diff ", "index ")) and (not hunks or not hunks[-1]["lines"]):
+            continue
+        elif hunks and raw.startswith(("+", "-", " ")):
+            hunks[-1]["lines"].append((raw[0], raw[1:]))
+        elif hunks and raw == "":
+            # Editors and models often strip the space from empty context lines
+            hunks[-1]["lines"].append((" ", ""))
+        elif raw.startswith("\\"):
+            continue
+    if not hunks:
+        raise PatchError("patch has no @@ hunks")
+    return hunks
+
+
+def diff_hunks(lines: List[str], diff: str) -> List[Hunk]:
+    """Resolve a unified diff against the file, tolerating shifted line numbers and whitespace drift."""
+    matcher = Matcher(lines)
+    result = []
+    for number, hunk in enumerate(parse_unified_diff(diff), 1):
+        old = [text for tag, text in hunk["lines"] if tag != "+"]
+        if not old:
+            start = min(hunk["hint"], len(lines)) + 1 if hunk["hint"] else 1
+            result.append(Hunk(start, start - 1, [text for tag, text in hunk["lines"]]))
+            continue
+        matches = matcher.candidates(old)
+        if not matches:
+            raise PatchError(f"patch hunk {number} (@@ -{hunk['hint']}): context not found; {matcher.closest(old)}")
+        at = _pick(matches, hunk["hint"], f"patch hunk {number}")
+        # Context lines keep the file's own text, so a whitespace-insensitive match changes only +/- lines
+        new, position = [], at
+        for tag, text in hunk["lines"]:
+            if tag == " ":
+                new.append(lines[position])
+            elif tag == "+":
+                new.append(text)
+            if tag != "+":
+                position += 1
+        result.append(Hunk(at + 1, at + len(old), new))
+    return result
+
+
+def replace_hunks(lines: List[str], blocks: Union[Dict, List[Dict]]) -> List[Hunk]:
+    """
+    Resolve search/replace blocks: each "search" must match exactly once, or once
+    after its "anchor" line, or nearest to its "line" hint.
+    """
+    matcher = Matcher(lines)
+    result = []
+    for number, block in enumerate(blocks if isinstance(blocks, list) else [blocks], 1):
+        if not isinstance(block, dict) or "search" not in block:
+            raise PatchError(f"replace block {number} needs a \"search\"")
+        search = _as_lines(block["search"])
+        replacement = _as_lines(block.get("replace", []))
+        if not search:
+            raise PatchError(f"replace block {number}: search is empty")
+        after = 0
+        anchor = block.get("anchor")
+        if anchor:
+            anchors = [i for i, line in enumerate(lines) if anchor in line]
+            if not anchors:
+                raise PatchError(f"replace block {number}: anchor {anchor!r} not found")
+            after = anchors[0] + 1
+            matches = matcher.candidates(search, after)[:1]
+        else:
+            matches = matcher.candidates(search)
+        if not matches:
+            where = f" after the anchor (line {after})" if anchor else ""
+            raise PatchError(f"replace block {number}: search text not found{where}; {matcher.closest(search)}")
+        at = _pick(matches, block.get("line"), f"replace block {number}")
+        result.append(Hunk(at + 1, at + len(search), replacement))
+    return result
+
+
+def patch_file(path: Path, patch: Optional[str] = None, replace=None) -> Dict:
+    """Apply a unified diff or search/replace blocks to `path` through the edit engine."""
+    if not path.exists():
+        raise PatchError(f"file not found: {path}")
+    lines = read_lines(path)
+    hunks = diff_hunks(lines, patch) if patch is not None else replace_hunks(lines, replace)
+    return apply_hunks(path, hunks)
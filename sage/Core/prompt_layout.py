@@ -0,0 +1,113 @@
+import json
+import threading
+from typing import Dict, List, Optional
+
+from .encoding import interface_for_prompt
+
+RESERVED_KEYS = ("command", "text", "update")
+# Re-snapshot once the delta would be this large relative to the snapshot itself
+REFRESH_RATIO = 0.25
+
+
+class PromptLayout:
+    """
+    Builds each request as deterministically ordered segments so consecutive
+    requests share the longest possible prefix for provider prompt caching:
+    system prompt, versioned interface snapshot, session delta, earlier turns
+    of the session (append-only), then the current turn. The snapshot only
+    changes when the delta grows past REFRESH_RATIO.
+    """
+
+    def __init__(self, system_prompt: str, refresh_ratio: float = REFRESH_RATIO):
+        self.system_prompt = system_prompt
+        self.refresh_ratio = refresh_ratio
+        self.snapshot: Optional[Dict] = None
+        self.snapshot_text = ""
+        self.snapshot_model = None
+        self.version = 0
+        # (turn number, messages) of finished turns, oldest first
+        self.history: List[tuple] = []
+
+    def _take_snapshot(self, interface_data: Dict, model: Optional[str]):
+        # Sorted files, then the special keys, so equal interfaces always render identically
+        files = {key: interface_data[key] for key in sorted(interface_data) if key not in RESERVED_KEYS}
+        files.update({key: interface_data[key] for key in RESERVED_KEYS if key in interface_data})
+        self.snapshot = json.loads(json.dumps(files))
+        self.snapshot_text = interface_for_prompt(self.snapshot, model)
+        self.snapshot_model = model
+        self.version += 1
+
+    def delta(self, interface_data: Dict) -> Dict:
+        """Entries changed or added since the snapshot, plus removed paths."""
+        changed = {key: value for key, value in interface_data.items()
+                   if key not in RESERVED_KEYS and self.snapshot.get(key) != value}
+        removed = sorted(key for key in self.snapshot if key not in RESERVED_KEYS and key not in interface_data)
+        return {"changed": changed, "removed": removed}
+
+    def messages(self, interface_data: Dict, turn: List[Dict], model: Optional[str] = None) -> List[Dict]:
+        """
+        Messages for one request. Segments that stay byte-identical across requests
+        are marked with "cache": True for backends that take cache-control hints.
+        """
+        if self.snapshot is None or model != self.snapshot_model:
+            self._take_snapshot(interface_data, model)
+        delta = self.delta(interface_data)
+        delta_text = json.dumps(delta, separators=(",", ":"))
+        if len(delta_text) > self.refresh_ratio * max(1, len(self.snapshot_text)):
+            self._take_snapshot(interface_data, model)
+            delta = self.delta(interface_data)
+
+        messages = [
+            {"role": "system", "content": self.system_prompt, "cache": True},
+            {"role": "user", "content": f"Project Interface (snapshot v{self.version}):\n{self.snapshot_text}", "cache": True},
+        ]
+        if delta["changed"] or delta["removed"]:
+            messages.append({
+                "role": "user",
+                "content": f"Interface changes since snapshot v{self.version} (these override the snapshot):\n"
+                           + json.dumps(delta, indent=1),
+            })
+        for _, turn_messages in self.history:
+            messages.extend(turn_messages)
+        return messages + turn
+
+    def add_turn(self, turn_number: int, turn_messages: List[Dict]):
+        self.history.append((turn_number, turn_messages))
+
+    def trim_history(self, max_chars: int) -> int:
+        """Drop the oldest turns until history fits in max_chars; returns the oldest turn kept."""
+        sizes = [sum(len(m["content"]) for m in turn_messages) for _, turn_messages in self.history]
+        while self.history and sum(sizes) > max_chars:
+            self.history.pop(0)
+            sizes.pop(0)
+        return self.history[0][0] if self.history else float("inf")
+
+
+class CacheStats:
+    """Prompt-cache hits per model, from usage.prompt_tokens_details.cached_tokens."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.models: Dict[str, Dict[str, int]] = {}
+
+    def record(self, model: str, usage):
+        prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = (getattr(details, "cached_tokens", None) if details is not None else None) or 0
+        with self.lock:
+            stats = self.models.setdefault(model, {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0, "hits": 0})
+            stats["requests"] += 1
+            stats["prompt_tokens"] += prompt_tokens
+            stats["cached_tokens"] += cached
+            stats["hits"] += cached > 0
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self.lock:
+            return {
+                model: {**stats, "hit_ratio": round(stats["cached_tokens"] / stats["prompt_tokens"], 3)
+                        if stats["prompt_tokens"] else 0.0}
+                for model, stats in self.models.items()
+            }
+
+
+cache_stats = CacheStats()
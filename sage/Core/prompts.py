@@ -17,6 +17,25 @@ Reading a file:
     "request": {"provide": {}}
   }
 }
+Reading part of a file (1-based inclusive lines, or a byte range for huge single-line files):
+{
+  "src/big_module.py": {
+    "request": {"provide": {"start": 200, "end": 320}}
+  }
+}
+{
+  "dist/bundle.min.js": {
+    "request": {"provide": {"offset": 0, "length": 20000}}
+  }
+}
+Only the outline of a file (imports, classes, signatures, docstrings with line numbers), useful for planning before reading ranges:
+{
+  "src/big_module.py": {
+    "request": {"provide": {"mode": "skeleton"}}
+  }
+}
+Large results come back one page at a time with a "[more: ...]" note; ask for {"provide": {"page": "next"}} to continue.
+A file you already received this session may come back as "[unchanged since turn N ...]" (use the content from that turn) or as "[changed since turn N ...]" followed by a unified diff against it.
 Writing a new file:
 {
   "src/components/ui/button.tsx": {
@@ -29,6 +48,28 @@ Editing an existing file:
     "request": {"edit": {"start": 10, "end": 15, "content": ["new line 1", "new line 2"]}}
   }
 }
+Provided files are tagged "(version abc123...)". Put that version next to line-number edits ("request": {"edit": [...], "version": "abc123..."}) so they are moved onto the current lines if the user changed the file meanwhile, or rejected with a diff of what changed.
+Several edits to one file go in a single list of non-overlapping hunks. All line numbers refer to the file as you last saw it (don't shift them for earlier hunks); "end": start - 1 inserts before start:
+{
+  "src/main.py": {
+    "request": {"edit": [
+      {"start": 3, "end": 2, "content": ["import sys"]},
+      {"start": 120, "end": 124, "content": ["    return result"]}
+    ]}
+  }
+}
+For small changes prefer a patch, which costs far fewer tokens than rewriting lines. Either a unified diff (context lines must match the file; line numbers may be approximate):
+{
+  "src/main.py": {
+    "request": {"patch": "@@ -10,3 +10,3 @@\\n def main():\\n-    run()\\n+    run(debug=True)\\n     return 0\\n"}
+  }
+}
+or search/replace blocks, where "search" is whole lines that must appear exactly once (add "anchor": text of an earlier line to pick the first match after it):
+{
+  "src/main.py": {
+    "request": {"replace": [{"search": "    run()", "replace": "    run(debug=True)"}]}
+  }
+}
 Deleting a file:
 {
   "src/utils/helpers.js": {
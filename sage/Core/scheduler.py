@@ -0,0 +1,357 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional, Tuple
+
+from rich.console import Console
+
+console = Console()
+
+# Status codes that mean "try again later" rather than "this request is wrong"
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+THROTTLE_STATUS = {429, 503}
+
+
+def is_retryable(error: Exception) -> bool:
+    """True for rate limits, 5xx responses, timeouts and dropped connections"""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    # openai raises APIConnectionError / APITimeoutError without a status code
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def parse_retry_after(headers) -> Optional[float]:
+    """Seconds the server asked us to wait, from Retry-After or rate-limit reset headers"""
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    if headers.get("x-ratelimit-remaining") in ("0", 0):
+        reset = headers.get("x-ratelimit-reset")
+        try:
+            reset = float(reset)
+        except (TypeError, ValueError):
+            return None
+        # OpenRouter sends an epoch timestamp in milliseconds, others send seconds to wait
+        if reset > 1e12:
+            return max(0.0, reset / 1000 - time.time())
+        if reset > 1e9:
+            return max(0.0, reset - time.time())
+        return reset
+    return None
+
+
+def endpoint_key(base_url: str, api_key: Optional[str] = "") -> str:
+    """Limiter identity for one server and credential, so separate local servers get separate windows"""
+    return f"{base_url or ''}|{api_key or ''}"
+
+
+def _describe(key: str) -> str:
+    # Metrics show the server and the key's last few characters, never the whole key
+    base_url, _, api_key = key.rpartition("|")
+    api_key = f"...{api_key[-6:]}" if api_key else ""
+    return " ".join(part for part in (base_url, api_key) if part)
+
+
+class Cancellation(threading.Event):
+    """
+    An Event that also runs callbacks when set. The scheduler registers a way to
+    close the stream it is reading, so cancelling interrupts a stalled request
+    instead of waiting for its next chunk or its timeout.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._callbacks = []
+        self._callbacks_lock = threading.Lock()
+
+    def on_set(self, callback: Callable):
+        with self._callbacks_lock:
+            if not self.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def set(self):
+        super().set()
+        with self._callbacks_lock:
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+
+def _close(stream):
+    if hasattr(stream, "close"):
+        stream.close()
+
+
+class _Limiter:
+    """AIMD concurrency window for one (model, endpoint) pair"""
+
+    def __init__(self, initial: float, maximum: float):
+        self.limit = initial
+        self.maximum = maximum
+        self.in_flight = 0
+        self.waiting = 0
+        self.blocked_until = 0.0
+        self.throttled = 0
+
+    def can_start(self, now: float) -> bool:
+        return now >= self.blocked_until and self.in_flight < int(self.limit)
+
+    def on_success(self):
+        # Additive increase: roughly +1 slot per window of successful requests
+        self.limit = min(self.maximum, self.limit + 1.0 / max(self.limit, 1.0))
+
+    def on_throttle(self, wait: float):
+        # Multiplicative decrease, and nobody starts until the server's window reopens
+        self.throttled += 1
+        self.limit = max(1.0, self.limit / 2)
+        self.blocked_until = max(self.blocked_until, time.monotonic() + wait)
+
+
+class _HeldStream:
+    """
+    A streaming response that keeps its scheduler slot until the stream is
+    exhausted, fails or is closed. Errors raised mid-stream are classified like
+    errors at submit time, so a 429 after the first chunk still shrinks the window.
+    """
+
+    def __init__(self, scheduler: "RequestScheduler", limiter: _Limiter, stream, first):
+        self.scheduler = scheduler
+        self.limiter = limiter
+        self.stream = stream
+        self.first = first
+        self.done = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.done:
+            raise StopIteration
+        if self.first is not None:
+            chunk, self.first = self.first[0], None
+            return chunk
+        try:
+            return next(self.stream)
+        except StopIteration:
+            self._finish(None)
+            raise
+        except Exception as e:
+            self._finish(e)
+            raise
+
+    def close(self):
+        """Stop early (a cancelled hedge, say): drop the connection and free the slot. Safe from any thread."""
+        if self.done:
+            return
+        try:
+            _close(self.stream)
+        finally:
+            self._finish(None, completed=False)
+
+    def __del__(self):
+        if not self.done:
+            self._finish(None, completed=False)
+
+    def _finish(self, error: Optional[Exception], completed: bool = True):
+        # close() from a cancelling thread and the reader's own error can race; settle once
+        with self.scheduler._cond:
+            if self.done:
+                return
+            self.done = True
+        self.scheduler._settle(self.limiter, error, completed)
+        self.scheduler._release(self.limiter)
+
+
+class RequestScheduler:
+    """
+    Shared gate for every LLM call. Requests wait for a slot in a per-model,
+    per-key AIMD window, retryable failures back off with full jitter (or for
+    as long as Retry-After says), and counters are kept for `metrics()`.
+    """
+
+    def __init__(self, max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0,
+                 initial_concurrency: float = 2.0, max_concurrency: float = 16.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self._limiters: Dict[Tuple[str, str], _Limiter] = {}
+        self._cond = threading.Condition()
+        self.total_requests = 0
+        self.total_retries = 0
+        self.total_failures = 0
+
+    def _limiter(self, model: str, key: str) -> _Limiter:
+        ident = (model, key or "")
+        if ident not in self._limiters:
+            self._limiters[ident] = _Limiter(self.initial_concurrency, self.max_concurrency)
+        return self._limiters[ident]
+
+    def _acquire(self, limiter: _Limiter, cancel: Optional[threading.Event]):
+        with self._cond:
+            limiter.waiting += 1
+            try:
+                while True:
+                    if cancel is not None and cancel.is_set():
+                        raise RuntimeError("Request cancelled while queued")
+                    now = time.monotonic()
+                    if limiter.can_start(now):
+                        limiter.in_flight += 1
+                        return
+                    timeout = limiter.blocked_until - now if limiter.blocked_until > now else 0.5
+                    self._cond.wait(timeout=min(max(timeout, 0.01), 0.5))
+            finally:
+                limiter.waiting -= 1
+
+    def _release(self, limiter: _Limiter):
+        with self._cond:
+            limiter.in_flight -= 1
+            self._cond.notify_all()
+
+    def _settle(self, limiter: _Limiter, error: Optional[Exception], completed: bool = True):
+        """Feed the outcome of a finished stream back into its window"""
+        with self._cond:
+            if error is None:
+                if completed:
+                    limiter.on_success()
+                return
+            self.total_failures += 1
+            if getattr(error, "status_code", None) in THROTTLE_STATUS:
+                wait = parse_retry_after(getattr(getattr(error, "response", None), "headers", None))
+                limiter.on_throttle(wait if wait is not None else 0.0)
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter keeps a burst of throttled workers from retrying in lockstep
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def submit(self, fn: Callable, model: str = "", key: str = "",
+               cancel: Optional[threading.Event] = None, max_retries: Optional[int] = None):
+        """
+        Run fn() under the (model, key) window, retrying transient failures.
+        When fn() returns a stream, its first chunk is read here (so errors that
+        arrive with it are retried too) and the slot stays held until the
+        returned stream is exhausted or closed.
+        """
+        if max_retries is None:
+            max_retries = self.max_retries
+        with self._cond:
+            limiter = self._limiter(model, key)
+            self.total_requests += 1
+
+        attempt = 0
+        while True:
+            self._acquire(limiter, cancel)
+            try:
+                result = fn()
+                if hasattr(result, "__next__"):
+                    if isinstance(cancel, Cancellation):
+                        # A stalled first chunk would otherwise hold the slot until the request times out
+                        cancel.on_set(lambda stream=result: _close(stream))
+                    try:
+                        first = (next(result),)
+                    except StopIteration:
+                        first = None
+            except Exception as e:
+                self._release(limiter)
+                if cancel is not None and cancel.is_set():
+                    raise
+                if not is_retryable(e) or attempt >= max_retries:
+                    with self._cond:
+                        self.total_failures += 1
+                    raise
+                response = getattr(e, "response", None)
+                wait = parse_retry_after(getattr(response, "headers", None))
+                status = getattr(e, "status_code", None)
+                with self._cond:
+                    self.total_retries += 1
+                    if status in THROTTLE_STATUS:
+                        limiter.on_throttle(wait if wait is not None else 0.0)
+                if wait is None:
+                    wait = self._backoff(attempt)
+                wait = min(wait, self.max_delay)
+                console.print(f"[dim]{model or 'request'} failed ({status or type(e).__name__}), retrying in {wait:.1f}s[/dim]")
+                if cancel is not None and cancel.wait(wait):
+                    raise
+                if cancel is None:
+                    time.sleep(wait)
+                attempt += 1
+                continue
+            if hasattr(result, "__next__"):
+                if first is not None:
+                    held = _HeldStream(self, limiter, result, first)
+                    if isinstance(cancel, Cancellation):
+                        cancel.on_set(held.close)
+                    return held
+                result = iter(())
+            with self._cond:
+                limiter.on_success()
+            self._release(limiter)
+            return result
+
+    def metrics(self) -> dict:
+        """Snapshot of queue depth, in-flight requests and throttle counters"""
+        with self._cond:
+            now = time.monotonic()
+            per_model = {
+                f"{model} ({_describe(key)})" if _describe(key) else model: {
+                    "limit": round(limiter.limit, 2),
+                    "in_flight": limiter.in_flight,
+                    "queued": limiter.waiting,
+                    "throttled": limiter.throttled,
+                    "blocked_for": round(max(0.0, limiter.blocked_until - now), 1),
+                }
+                for (model, key), limiter in self._limiters.items()
+            }
+            return {
+                "queue_depth": sum(l.waiting for l in self._limiters.values()),
+                "in_flight": sum(l.in_flight for l in self._limiters.values()),
+                "requests": self.total_requests,
+                "retries": self.total_retries,
+                "failures": self.total_failures,
+                "throttled": sum(l.throttled for l in self._limiters.values()),
+                "models": per_model,
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> RequestScheduler:
+    """Process-wide scheduler shared by chat, summarization and any background work"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            from .config import get_settings
+
+            settings = get_settings()
+            _scheduler = RequestScheduler(
+                max_retries=settings.max_retries,
+                base_delay=settings.retry_base_delay,
+                max_delay=settings.retry_max_delay,
+                initial_concurrency=settings.initial_concurrency,
+                max_concurrency=settings.max_concurrency,
+            )
+        return _scheduler
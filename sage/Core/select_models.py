@@ -1,4 +1,3 @@
-import inquirer
 import os
 from rich.console import Console
 from pathlib import Path
@@ -9,6 +8,13 @@ MAIN_COLOR = "#8B5CF6"
 
 # Import models from your models.py
 from .models import models
+from .bench import load_bench_results, rank_models
+
+def ordered_models(bench_results=None):
+    """Models with benchmark results first, fastest time-to-first-token on top."""
+    bench_results = load_bench_results() if bench_results is None else bench_results
+    by_name = {model["model"]: model for model in models}
+    return [by_name[name] for name in rank_models(list(by_name), bench_results)]
 
 def save_model_to_env(model_name):
     """Save the selected model to .env file."""
@@ -45,9 +51,11 @@ def save_model_to_env(model_name):
 
 def display_model_page(page, page_size=10):
     """Display a page of models with pagination info and column titles."""
+    bench_results = load_bench_results()
+    sorted_models = ordered_models(bench_results)
     start_idx = page * page_size
     end_idx = start_idx + page_size
-    page_models = models[start_idx:end_idx]
+    page_models = sorted_models[start_idx:end_idx]
     
     total_pages = math.ceil(len(models) / page_size)
     
@@ -60,7 +68,7 @@ def display_model_page(page, page_size=10):
     console.print()
     
     # Display column titles
-    title_line = f"{'#':>3} {'               Models':<43} | {'Price':<8} | {'Context Window':>12}"
+    title_line = f"{'#':>3} {'               Models':<43} | {'Price':<8} | {'Context Window':>12} | {'TTFT':>6} | {'Tok/s':>6}"
     console.print(f"[bold {MAIN_COLOR}]{title_line}[/bold {MAIN_COLOR}]")
     console.print("[dim]" + "─" * len(title_line) + "[/dim]")
     
@@ -71,8 +79,11 @@ def display_model_page(page, page_size=10):
         model_display = model["model"][:40].ljust(40)
         price_display = model["price"].ljust(8)
         context_display = model["context"].rjust(12)
+        result = bench_results.get(model["model"]) or {}
+        ttft_display = f"{result['ttft']:.2f}s" if result.get("ttft") is not None else "-"
+        tps_display = f"{result['tps']:.0f}" if result.get("tps") is not None else "-"
         
-        display_text = f"{model_num:>3} {model_display} | {price_display} | {context_display}"
+        display_text = f"{model_num:>3} {model_display} | {price_display} | {context_display} | {ttft_display:>6} | {tps_display:>6}"
         choices.append((display_text, model["model"]))
     
     # Add navigation options
@@ -80,7 +91,7 @@ def display_model_page(page, page_size=10):
     if page > 0:
         choices.append(("← Previous Page", "prev_page"))
         navigation_added = True
-    if end_idx < len(models):
+    if end_idx < len(sorted_models):
         choices.append(("→ Next Page", "next_page"))
         navigation_added = True
     
@@ -109,6 +120,8 @@ def manual_model_input():
 
 def select_model():
     """Main model selection function with pagination."""
+    import inquirer
+
     page_size = 10
     current_page = 0
     
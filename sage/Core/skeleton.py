@@ -0,0 +1,196 @@
+import ast
+import hashlib
+import re
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from .config import get_settings
+from .content import ContentBudget, load_file, render
+
+PYTHON_SUFFIXES = {".py", ".pyi"}
+BRACE_SUFFIXES = {
+    ".c", ".h", ".cc", ".cpp", ".cxx", ".hpp", ".hh", ".cs", ".java", ".kt", ".kts",
+    ".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx", ".go", ".rs", ".swift", ".php", ".scala", ".dart",
+}
+# Braces opened by these keep their contents visible; every other brace is a body to hide
+CONTAINER_RE = re.compile(
+    r"\b(class|struct|interface|enum|namespace|impl|trait|union|object|module|record|protocol|extension)\b"
+    r"|^\s*extern\s+\"C\"|^\s*(export\s+)?(declare\s+)?(type|namespace)\s")
+MAX_LINE_CHARS = 160
+# Skeletons are small, so sources up to this multiple of MAX_FILE_BYTES are worth parsing
+SOURCE_FACTOR = 8
+
+_cache = {}
+_MAX_CACHED = 256
+
+
+def _first_line(doc: Optional[str]) -> Optional[str]:
+    if not doc:
+        return None
+    line = doc.strip().splitlines()[0].strip()
+    return line[:MAX_LINE_CHARS] if line else None
+
+
+def _python_skeleton(text: str) -> Optional[List[Tuple[int, str]]]:
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return None
+    rows = []
+    doc = _first_line(ast.get_docstring(tree))
+    if doc:
+        rows.append((1, f'"""{doc}"""'))
+
+    def emit(nodes, indent: str):
+        for node in nodes:
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                rows.append((node.lineno, indent + ast.unparse(node)))
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                for decorator in node.decorator_list:
+                    rows.append((decorator.lineno, f"{indent}@{ast.unparse(decorator)}"))
+                prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+                returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+                rows.append((node.lineno, f"{indent}{prefix} {node.name}({ast.unparse(node.args)}){returns}: ..."))
+                doc = _first_line(ast.get_docstring(node))
+                if doc:
+                    rows.append((node.body[0].lineno, f'{indent}    """{doc}"""'))
+            elif isinstance(node, ast.ClassDef):
+                for decorator in node.decorator_list:
+                    rows.append((decorator.lineno, f"{indent}@{ast.unparse(decorator)}"))
+                bases = [ast.unparse(base) for base in node.bases + node.keywords]
+                rows.append((node.lineno, f"{indent}class {node.name}" + (f"({', '.join(bases)})" if bases else "") + ":"))
+                doc = _first_line(ast.get_docstring(node))
+                if doc:
+                    rows.append((node.body[0].lineno, f'{indent}    """{doc}"""'))
+                emit(node.body, indent + "    ")
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                names = ", ".join(ast.unparse(target) for target in targets)
+                annotation = f": {ast.unparse(node.annotation)}" if isinstance(node, ast.AnnAssign) else ""
+                value = ast.unparse(node.value) if node.value is not None else ""
+                if len(value) > 60:
+                    value = "..."
+                rows.append((node.lineno, f"{indent}{names}{annotation}" + (f" = {value}" if value else "")))
+            elif isinstance(node, (ast.If, ast.Try)) and not indent:
+                # Module-level guards often hold imports or the entry point
+                if isinstance(node, ast.If):
+                    rows.append((node.lineno, f"if {ast.unparse(node.test)}:"))
+                else:
+                    rows.append((node.lineno, "try:"))
+                emit(node.body, "    ")
+
+    emit(tree.body, "")
+    return rows
+
+
+def _strip_code(line: str, in_comment: bool) -> Tuple[str, bool]:
+    """Line with strings blanked and comments removed, plus whether a block comment is still open."""
+    out = []
+    i = 0
+    while i < len(line):
+        if in_comment:
+            end = line.find("*/", i)
+            if end == -1:
+                return "".join(out), True
+            i = end + 2
+            in_comment = False
+            continue
+        ch = line[i]
+        if line.startswith("//", i):
+            break
+        if line.startswith("/*", i):
+            in_comment = True
+            i += 2
+            continue
+        if ch in "\"`" or (ch == "'" and re.match(r"'(\\.|[^\\'])'", line[i:i + 4])):
+            end = i + 1
+            while end < len(line) and line[end] != ch:
+                end += 2 if line[end] == "\\" else 1
+            out.append(ch + ch)
+            i = end + 1
+            continue
+        out.append(ch)
+        i += 1
+    return "".join(out), in_comment
+
+
+def _brace_skeleton(text: str) -> List[Tuple[int, str]]:
+    rows = []
+    stack = []  # one entry per open brace: True when its contents are shown
+    in_comment = False
+    doc = None
+    for number, raw in enumerate(text.splitlines(), 1):
+        stripped = raw.strip()
+        visible = all(stack)
+        was_comment = in_comment
+        code, in_comment = _strip_code(raw, in_comment)
+        code = code.strip()
+        if visible and not was_comment and stripped.startswith(("/**", "///", "//!")):
+            if doc is None:
+                doc = (number, raw.rstrip()[:MAX_LINE_CHARS])
+            continue
+        if not code:
+            continue
+        line = raw.rstrip()
+        if visible:
+            if doc is not None:
+                rows.append(doc)
+            hidden_open = False
+            for ch in code:
+                if ch == "{":
+                    shown = bool(CONTAINER_RE.search(code)) and all(stack)
+                    stack.append(shown)
+                    hidden_open = hidden_open or not shown
+                elif ch == "}" and stack:
+                    stack.pop()
+            if hidden_open and not all(stack):
+                line = line[:line.rfind("{") + 1] + " ... }" if "{" in line else line
+            rows.append((number, line[:MAX_LINE_CHARS]))
+        else:
+            for ch in code:
+                if ch == "{":
+                    stack.append(False)
+                elif ch == "}" and stack:
+                    stack.pop()
+        doc = None
+    return rows
+
+
+def skeletonize(path: str, text: str) -> Optional[str]:
+    """
+    Signature-only view of source text (imports, classes, signatures, docstrings
+    and constants, each prefixed with its line number), or None when the
+    language isn't supported. Results are cached per content hash.
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix not in PYTHON_SUFFIXES and suffix not in BRACE_SUFFIXES:
+        return None
+    key = (suffix in PYTHON_SUFFIXES, hashlib.sha1(text.encode("utf-8", "surrogatepass")).hexdigest())
+    if key in _cache:
+        return _cache[key]
+    rows = _python_skeleton(text) if suffix in PYTHON_SUFFIXES else _brace_skeleton(text)
+    skeleton = None
+    if rows is not None:
+        total = text.count("\n") + (0 if text.endswith("\n") or not text else 1)
+        width = len(str(total))
+        body = "\n".join(f"{number:>{width}}| {line}" for number, line in sorted(rows, key=lambda row: row[0]))
+        skeleton = f"[skeleton: {len(rows)} of {total} lines]\n{body}"
+    if len(_cache) >= _MAX_CACHED:
+        _cache.pop(next(iter(_cache)))
+    _cache[key] = skeleton
+    return skeleton
+
+
+def skeleton_for_prompt(path: Path, budget: Optional[ContentBudget] = None) -> str:
+    """Skeleton of a file for the prompt, falling back to the full (bounded) content for other languages."""
+    settings = get_settings()
+    loaded = load_file(path, max_bytes=settings.max_file_bytes * SOURCE_FACTOR)
+    skeleton = skeletonize(str(path), loaded["content"]) if "content" in loaded else None
+    if skeleton is None:
+        loaded = load_file(path, budget)
+        return render(loaded)
+    if budget is not None:
+        if len(skeleton) > budget.remaining:
+            return "[Not loaded: turn budget exhausted; request the skeleton again next turn]"
+        budget.consume(len(skeleton))
+    return skeleton
@@ -0,0 +1,242 @@
+import hashlib
+import json
+import os
+import tempfile
+import stat
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .config import get_settings
+
+SNAPSHOT_DIR = Path("Sage")
+# Blobs touched this recently are never collected: an open checkpoint may still need them
+GC_GRACE_SECONDS = 3600
+
+
+def _write_temp(path: Path, data: bytes, mode: Optional[int] = None) -> str:
+    """Write data next to path (with the given permission bits) and return the temp file's name."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path
+
+
+def _atomic_write(path: Path, data: bytes, mode: Optional[int] = None):
+    tmp_path = _write_temp(path, data, mode)
+    try:
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _mode(path: Path) -> Optional[int]:
+    try:
+        return stat.S_IMODE(path.stat().st_mode)
+    except OSError:
+        return None
+
+
+def _read(path: Path) -> Optional[bytes]:
+    try:
+        return path.read_bytes()
+    except (FileNotFoundError, IsADirectoryError):
+        # Folders aren't snapshotted; treat them like missing files
+        return None
+
+
+class Checkpoint:
+    """Files one turn is about to change, with the content and mode each had before the turn."""
+
+    def __init__(self, store: "SnapshotStore"):
+        self.store = store
+        # path -> object id before the turn (None: the file didn't exist)
+        self.before: Dict[str, Optional[str]] = {}
+        self.modes: Dict[str, Optional[int]] = {}
+
+    def record(self, path: str):
+        """Call before changing `path`; only the first call per path in a turn stores anything."""
+        if path not in self.before:
+            data = _read(Path(path))
+            self.before[path] = None if data is None else self.store.put(data)
+            self.modes[path] = None if data is None else _mode(Path(path))
+
+
+class SnapshotStore:
+    """
+    Content-addressed, zlib-compressed blobs under Sage/objects (identical
+    content is stored once) plus a list of per-turn checkpoints in
+    Sage/checkpoints.json. Each checkpoint only lists the files the turn
+    changed, as [before id, after id, before mode, after mode], so recording,
+    undo and redo cost O(changed files).
+    """
+
+    def __init__(self, root: Path = SNAPSHOT_DIR):
+        self.objects = root / "objects"
+        self.index_file = root / "checkpoints.json"
+        self._lock = threading.RLock()
+
+    def put(self, data: bytes) -> str:
+        oid = hashlib.sha1(data).hexdigest()
+        path = self.objects / oid[:2] / oid[2:]
+        if path.exists():
+            os.utime(path)
+        else:
+            _atomic_write(path, zlib.compress(data))
+        return oid
+
+    def get(self, oid: str) -> bytes:
+        return zlib.decompress((self.objects / oid[:2] / oid[2:]).read_bytes())
+
+    def _load(self) -> Dict:
+        data = _read(self.index_file)
+        return json.loads(data) if data else {"head": 0, "checkpoints": []}
+
+    def _save(self, index: Dict):
+        _atomic_write(self.index_file, json.dumps(index, indent=1).encode("utf-8"))
+
+    def begin(self) -> Checkpoint:
+        return Checkpoint(self)
+
+    def commit(self, checkpoint: Checkpoint, label: str) -> Optional[int]:
+        """Store the turn's changes as a checkpoint; returns its number, or None if nothing changed."""
+        changes = {}
+        for path, before in checkpoint.before.items():
+            data = _read(Path(path))
+            after = None if data is None else self.put(data)
+            if after != before:
+                changes[path] = [before, after, checkpoint.modes.get(path), None if data is None else _mode(Path(path))]
+        if not changes:
+            return None
+        with self._lock:
+            index = self._load()
+            # A new change after an undo discards what could have been redone
+            checkpoints = index["checkpoints"][:index["head"]]
+            discarded = len(index["checkpoints"]) - len(checkpoints)
+            number = (checkpoints[-1]["id"] + 1) if checkpoints else 1
+            checkpoints.append({"id": number, "time": time.time(), "label": label, "changes": changes})
+            limit = get_settings().max_checkpoints
+            if limit > 0 and len(checkpoints) > limit:
+                discarded += len(checkpoints) - limit
+                checkpoints = checkpoints[-limit:]
+            index["checkpoints"], index["head"] = checkpoints, len(checkpoints)
+            self._save(index)
+            if discarded:
+                self.collect_garbage(index)
+        return number
+
+    def _restore(self, changes: Dict, side: int) -> Dict[str, List[str]]:
+        """
+        Bring each changed file to one side of its change (0 before, 1 after),
+        skipping files edited since. All or nothing: every new version is written
+        to a temp file first, and files already swapped in are put back if a
+        later one fails, so the caller only moves the index after a full restore.
+        """
+        plan, skipped = [], []
+        for path, change in changes.items():
+            target, expected = change[side], change[1 - side]
+            modes = (change[2:4] + [None, None])[:2]
+            data = _read(Path(path))
+            current = None if data is None else hashlib.sha1(data).hexdigest()
+            if current == target:
+                continue
+            if current != expected:
+                # Changed again outside this checkpoint; overwriting would lose that work
+                skipped.append(path)
+                continue
+            mode = modes[side] if modes[side] is not None else _mode(Path(path))
+            plan.append((path, target, expected, mode, _mode(Path(path))))
+
+        staged = []
+        try:
+            for path, target, _, mode, _ in plan:
+                staged.append(None if target is None else _write_temp(Path(path), self.get(target), mode))
+        except BaseException:
+            for tmp_path in staged:
+                if tmp_path:
+                    os.unlink(tmp_path)
+            raise
+
+        applied = []
+        try:
+            for (path, target, expected, mode, previous_mode), tmp_path in zip(plan, staged):
+                if tmp_path is None:
+                    os.unlink(path)
+                else:
+                    os.replace(tmp_path, path)
+                applied.append((path, expected, previous_mode))
+        except BaseException:
+            for path, expected, previous_mode in reversed(applied):
+                if expected is None:
+                    os.unlink(path)
+                else:
+                    _atomic_write(Path(path), self.get(expected), previous_mode)
+            for tmp_path in staged[len(applied):]:
+                if tmp_path and os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+            raise
+        return {"restored": [path for path, _, _ in applied], "skipped": skipped}
+
+    def undo(self) -> Optional[Dict]:
+        with self._lock:
+            index = self._load()
+            if index["head"] == 0:
+                return None
+            checkpoint = index["checkpoints"][index["head"] - 1]
+            result = self._restore(checkpoint["changes"], 0)
+            index["head"] -= 1
+            self._save(index)
+            return {"checkpoint": checkpoint, **result}
+
+    def redo(self) -> Optional[Dict]:
+        with self._lock:
+            index = self._load()
+            if index["head"] >= len(index["checkpoints"]):
+                return None
+            checkpoint = index["checkpoints"][index["head"]]
+            result = self._restore(checkpoint["changes"], 1)
+            index["head"] += 1
+            self._save(index)
+            return {"checkpoint": checkpoint, **result}
+
+    def list(self) -> Dict:
+        with self._lock:
+            return self._load()
+
+    def collect_garbage(self, index: Dict):
+        """Delete objects no remaining checkpoint refers to."""
+        live = {oid for checkpoint in index["checkpoints"] for change in checkpoint["changes"].values()
+                for oid in change[:2] if oid}
+        if not self.objects.exists():
+            return
+        cutoff = time.time() - GC_GRACE_SECONDS
+        for folder in self.objects.iterdir():
+            for blob in folder.iterdir():
+                if folder.name + blob.name not in live and blob.stat().st_mtime < cutoff:
+                    blob.unlink()
+
+
+_store: Optional[SnapshotStore] = None
+_store_lock = threading.Lock()
+
+
+def get_snapshot_store() -> Optional[SnapshotStore]:
+    """The project's snapshot store, or None when SNAPSHOTS is off."""
+    global _store
+    if not get_settings().snapshots:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = SnapshotStore()
+        return _store
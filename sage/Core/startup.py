@@ -0,0 +1,59 @@
+import re
+import statistics
+import subprocess
+import sys
+from typing import List, Tuple
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """Parse `-X importtime` output into (module, self_us, cumulative_us, depth) rows."""
+    rows = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            # importtime indents nested imports by two spaces per level
+            rows.append((module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return rows
+
+
+def measure_import_time(module: str = "sage.cli") -> Tuple[float, List[Tuple[str, int, int, int]]]:
+    """Import `module` in a fresh interpreter; return (milliseconds, importtime rows)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+    rows = parse_importtime(result.stderr)
+    total = next((cumulative for name, _, cumulative, _ in rows if name == module), 0)
+    return total / 1000, rows
+
+
+def bench_startup(module: str = "sage.cli", runs: int = 5) -> dict:
+    """Median cold import time over several runs plus the heaviest top-level imports."""
+    timings, rows = [], []
+    for _ in range(runs):
+        elapsed, rows = measure_import_time(module)
+        timings.append(elapsed)
+    # importtime prints children before their parent, so collect depth-1 rows
+    # until the module's own depth-0 row closes the group
+    children, group = [], []
+    for name, _, cumulative, depth in rows:
+        if depth == 1:
+            group.append((name, cumulative / 1000))
+        elif depth == 0:
+            if name == module:
+                children = group
+            group = []
+    children.sort(key=lambda row: row[1], reverse=True)
+    return {
+        "module": module,
+        "median_ms": statistics.median(timings),
+        "min_ms": min(timings),
+        "max_ms": max(timings),
+        "heaviest": children[:10],
+    }
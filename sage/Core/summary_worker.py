@@ -0,0 +1,190 @@
+import itertools
+import os
+import queue
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+from rich.console import Console
+
+from .config import get_settings
+from .interface_store import get_interface_store
+
+console = Console()
+
+# Files the user just changed jump ahead of the initial summarization backlog
+URGENT = (float("-inf"), 0.0)
+
+
+class SummaryWorker:
+    """
+    Background thread that summarizes files with the model in priority order and
+    hot-swaps each batch into Sage/interface.json. It serves both the initial
+    backlog (most imported, then most recently modified first) and files the
+    watcher reports as changed.
+    """
+
+    def __init__(self, batch_size: int = 8, interface_file: Path = Path("Sage/interface.json")):
+        self.queue: "queue.PriorityQueue[Tuple[tuple, int, str]]" = queue.PriorityQueue()
+        self.batch_size = batch_size
+        self.interface_file = interface_file
+        self.stopped = threading.Event()
+        self.lock = threading.Lock()
+        self.queued = set()
+        self.total = 0
+        self.done = 0
+        self._order = itertools.count()
+        # One client for the worker's lifetime, created on the first batch and closed on stop
+        self.client = None
+        self.client_lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        if not self.thread.is_alive():
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        if not self.thread.is_alive():
+            self._close_client()
+        # Otherwise _run closes it once the batch in progress finishes
+
+    def _get_client(self, backend, api_key):
+        with self.client_lock:
+            if self.client is None:
+                self.client = backend.create_client(api_key)
+            return self.client
+
+    def _close_client(self):
+        with self.client_lock:
+            client, self.client = self.client, None
+        if client is not None and hasattr(client, "close"):
+            try:
+                client.close()
+            except Exception:
+                pass
+
+    def enqueue(self, path: str, priority: tuple = URGENT):
+        with self.lock:
+            if path in self.queued:
+                return
+            self.queued.add(path)
+            self.total += 1
+        self.queue.put((priority, next(self._order), path))
+
+    def progress(self) -> Tuple[int, int]:
+        """(files summarized, files queued) since the worker started."""
+        with self.lock:
+            return self.done, self.total
+
+    def queue_unsummarized(self) -> int:
+        """
+        Write local summaries for every unsummarized file right away and queue the
+        ones that still need the model (all of them when LOCAL_SUMMARIES is off).
+        Returns how many were queued.
+        """
+        from sage.Starters.AI_summerize import local_pass, RESERVED_KEYS
+
+        store = get_interface_store(self.interface_file)
+        interface_data = store.load() or {}
+        if get_settings().local_summaries:
+            summaries, to_model, centrality = local_pass(interface_data)
+        else:
+            summaries, centrality = {}, {}
+            to_model = [path for path, value in interface_data.items()
+                        if path not in RESERVED_KEYS and value in ("file", "unsummarized")]
+
+        def apply(data):
+            for path, summary in summaries.items():
+                if path in data:
+                    data[path] = summary
+
+        if summaries:
+            store.update(apply)
+        for path in to_model:
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                mtime = 0.0
+            self.enqueue(path, (-centrality.get(path, 0), -mtime))
+        return len(to_model)
+
+    def _run(self):
+        try:
+            self._loop()
+        finally:
+            self._close_client()
+
+    def _loop(self):
+        while not self.stopped.is_set():
+            try:
+                batch = [self.queue.get(timeout=0.5)[2]]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait()[2])
+                except queue.Empty:
+                    break
+            with self.lock:
+                self.queued.difference_update(batch)
+            try:
+                self._summarize(batch)
+            except Exception as e:
+                console.print(f"[dim]Background summarization failed: {e}[/dim]")
+            finally:
+                with self.lock:
+                    self.done += len(batch)
+
+    def _summarize(self, paths):
+        from .backends import get_backend
+        from .bench import resolve_model
+        from sage.Starters.AI_summerize import plan_batches, summarize_paths, merge_summary
+
+        store = get_interface_store(self.interface_file)
+        interface_data = store.load() or {}
+        paths = [path for path in paths if path in interface_data and Path(path).is_file()]
+        if not paths:
+            return
+        settings = get_settings()
+        backend = get_backend()
+        model = resolve_model(settings.model)
+        if not model or (backend.requires_api_key and not settings.api_key):
+            return
+        client = self._get_client(backend, settings.api_key)
+        summaries = {}
+        # A queue batch can still be too big for a small context window
+        for batch in plan_batches(paths, model, interface_data):
+            summaries.update(summarize_paths(client, model, batch, interface_data, backend))
+
+        def merge(data):
+            valid = {value["index"] for value in data.values() if isinstance(value, dict) and "index" in value}
+            for path, summary in summaries.items():
+                # Skip files deleted while we were waiting on the model
+                if path in data:
+                    data[path] = merge_summary(data[path], summary, valid)
+
+        if summaries:
+            store.update(merge)
+
+
+_worker: Optional[SummaryWorker] = None
+_worker_lock = threading.Lock()
+
+
+def get_summary_worker(create: bool = True) -> Optional[SummaryWorker]:
+    """The process-wide summary worker, started on first use."""
+    global _worker
+    with _worker_lock:
+        if _worker is None and create:
+            _worker = SummaryWorker(batch_size=max(1, get_settings().summary_batch)).start()
+        return _worker
+
+
+def stop_summary_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is not None:
+            _worker.stop()
+            _worker = None
@@ -0,0 +1,365 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from rich.console import Console
+
+from .config import get_settings
+from .interface_store import get_interface_store
+from .summary_worker import SummaryWorker, get_summary_worker, stop_summary_worker
+
+console = Console()
+
+RESERVED_KEYS = ("command", "text", "update")
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _load_ignore_patterns(root: Path):
+    from sage.Starters.file_utils import load_ignore_patterns
+    from sage.Starters.common_ignors import common_ignores
+
+    patterns = load_ignore_patterns(root / "Sage" / ".sageignore") or [p for p in common_ignores if p]
+    # Our own writes to Sage/ must never feed back into the watcher
+    return patterns + ["Sage/"]
+
+
+class _Debouncer:
+    """Collects touched paths and flushes them once events have been quiet for `delay` seconds."""
+
+    def __init__(self, delay: float, flush: Callable[[Set[str], Set[str]], None]):
+        self.delay = delay
+        self.flush = flush
+        self.paths: Set[str] = set()
+        self.dirs: Set[str] = set()
+        self.last_event = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, path: str, is_dir: bool = False):
+        with self.lock:
+            (self.dirs if is_dir else self.paths).add(path)
+            self.last_event = time.monotonic()
+
+    def maybe_flush(self):
+        with self.lock:
+            if not (self.paths or self.dirs) or time.monotonic() - self.last_event < self.delay:
+                return
+            paths, dirs = self.paths, self.dirs
+            self.paths, self.dirs = set(), set()
+        self.flush(paths, dirs)
+
+
+class _InotifyBackend:
+    """Recursive inotify watches through ctypes; raises OSError when unavailable."""
+
+    def __init__(self, root: Path, ignored: Callable[[str], bool], debouncer: _Debouncer):
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name or not hasattr(os, "uname") or os.uname().sysname != "Linux":
+            raise OSError("inotify not available")
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.root = root
+        self.ignored = ignored
+        self.debouncer = debouncer
+        self.watches: Dict[int, str] = {}
+        try:
+            self._add_tree("")
+        except BaseException:
+            # e.g. ENOSPC from max_user_watches: don't leak the descriptor on the way out
+            os.close(self.fd)
+            raise
+
+    def _add_watch(self, rel_dir: str):
+        path = str(self.root / rel_dir) if rel_dir else str(self.root)
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        self.watches[wd] = rel_dir
+
+    def _add_tree(self, rel_dir: str, report_files: bool = False):
+        """Watch rel_dir and every non-ignored directory below it."""
+        stack = [rel_dir]
+        while stack:
+            current = stack.pop()
+            self._add_watch(current)
+            try:
+                entries = list(os.scandir(self.root / current if current else self.root))
+            except OSError:
+                continue
+            for entry in entries:
+                rel = f"{current}/{entry.name}" if current else entry.name
+                if self.ignored(rel):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(rel)
+                elif report_files:
+                    self.debouncer.add(rel)
+
+    def poll(self, timeout: float):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", "surrogateescape")
+            offset += length
+            self._handle(wd, mask, name)
+
+    def _handle(self, wd: int, mask: int, name: str):
+        if mask & IN_Q_OVERFLOW:
+            # The kernel dropped events; reconcile the whole tree once
+            self.debouncer.add("", is_dir=True)
+            return
+        if mask & IN_IGNORED:
+            self.watches.pop(wd, None)
+            return
+        parent = self.watches.get(wd)
+        if parent is None or not name:
+            return
+        rel = f"{parent}/{name}" if parent else name
+        if self.ignored(rel):
+            return
+        if mask & IN_ISDIR:
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                # Files can land in a new directory before its watch exists, so report them now
+                try:
+                    self._add_tree(rel, report_files=True)
+                except OSError:
+                    pass
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self.debouncer.add(rel, is_dir=True)
+            return
+        self.debouncer.add(rel)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _PollingBackend:
+    """Portable fallback: compares (mtime, size) snapshots of the tree every interval."""
+
+    def __init__(self, root: Path, ignored: Callable[[str], bool], debouncer: _Debouncer, interval: float):
+        self.root = root
+        self.ignored = ignored
+        self.debouncer = debouncer
+        self.interval = interval
+        self.snapshot = self._scan()
+        self.next_scan = time.monotonic() + interval
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        stack = [""]
+        while stack:
+            current = stack.pop()
+            try:
+                entries = list(os.scandir(self.root / current if current else self.root))
+            except OSError:
+                continue
+            for entry in entries:
+                rel = f"{current}/{entry.name}" if current else entry.name
+                if self.ignored(rel):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(rel)
+                    else:
+                        stat = entry.stat(follow_symlinks=False)
+                        snapshot[rel] = (stat.st_mtime_ns, stat.st_size)
+                except OSError:
+                    continue
+        return snapshot
+
+    def poll(self, timeout: float):
+        now = time.monotonic()
+        if now < self.next_scan:
+            time.sleep(min(timeout, self.next_scan - now))
+            return
+        current = self._scan()
+        for path in current.keys() | self.snapshot.keys():
+            if current.get(path) != self.snapshot.get(path):
+                self.debouncer.add(path)
+        self.snapshot = current
+        self.next_scan = time.monotonic() + self.interval
+
+    def close(self):
+        pass
+
+
+def apply_changes(paths: Set[str], dirs: Set[str], root: Path = Path("."), ignored=None,
+                  interface_file: Path = Path("Sage/interface.json")) -> Dict[str, Set[str]]:
+    """
+    Reconcile touched paths against the disk and update the interface in place.
+    Returns {"added", "removed", "modified"} path sets.
+    """
+    store = get_interface_store(interface_file)
+    changes = {"added": set(), "removed": set(), "modified": set()}
+    if ignored is None:
+        patterns = _load_ignore_patterns(root)
+        from sage.Starters.file_utils import is_ignored
+        ignored = lambda rel: is_ignored(rel, patterns)
+
+    def mutate(data):
+        touched = set(paths)
+        for directory in dirs:
+            prefix = f"{directory}/" if directory else ""
+            # Directory removed or overflowed: check every file we know under it
+            touched.update(key for key in data if key not in RESERVED_KEYS and key.startswith(prefix))
+            if (root / directory).is_dir():
+                for dirpath, dirnames, filenames in os.walk(root / directory):
+                    rel_dir = os.path.relpath(dirpath, root).replace("\\", "/")
+                    rel_dir = "" if rel_dir == "." else rel_dir
+                    dirnames[:] = [d for d in dirnames if not ignored(f"{rel_dir}/{d}" if rel_dir else d)]
+                    touched.update(f"{rel_dir}/{f}" if rel_dir else f for f in filenames)
+        for path in touched:
+            if path in RESERVED_KEYS or ignored(path):
+                continue
+            if (root / path).is_file():
+                if path not in data:
+                    data[path] = "file"
+                    changes["added"].add(path)
+                else:
+                    changes["modified"].add(path)
+            elif path in data:
+                del data[path]
+                changes["removed"].add(path)
+
+    if store.exists():
+        store.update(mutate)
+    return changes
+
+
+class FileWatcher:
+    """Keeps Sage/interface.json in step with the working tree from a background thread."""
+
+    def __init__(self, root: Path = Path("."), debounce: float = 0.5, poll_interval: float = 2.0,
+                 backend: str = "auto", resummarize: Optional[SummaryWorker] = None):
+        from sage.Starters.file_utils import is_ignored
+
+        self.root = root
+        patterns = _load_ignore_patterns(root)
+        self.ignored = lambda rel: is_ignored(rel, patterns)
+        self.debouncer = _Debouncer(debounce, self._flush)
+        self.resummarize = resummarize
+        self.stopped = threading.Event()
+        self.backend_name = backend
+        self.backend = None
+        self.poll_interval = poll_interval
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _create_backend(self):
+        if self.backend_name in ("auto", "inotify"):
+            try:
+                return _InotifyBackend(self.root, self.ignored, self.debouncer)
+            except OSError as e:
+                if self.backend_name == "inotify":
+                    raise
+                console.print(f"[dim]inotify unavailable ({e}), polling every {self.poll_interval:g}s[/dim]")
+        return _PollingBackend(self.root, self.ignored, self.debouncer, self.poll_interval)
+
+    def start(self):
+        self.backend = self._create_backend()
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+
+    def _run(self):
+        try:
+            while not self.stopped.is_set():
+                try:
+                    self.backend.poll(0.2)
+                except Exception as e:
+                    self._poll_failed(e)
+                try:
+                    self.debouncer.maybe_flush()
+                except Exception as e:
+                    console.print(f"[dim]Watcher could not apply changes: {e}[/dim]")
+        finally:
+            self.backend.close()
+
+    def _poll_failed(self, error: Exception):
+        """Keep watching after a failed poll: switch from inotify to polling, or wait and retry."""
+        if isinstance(self.backend, _PollingBackend):
+            console.print(f"[dim]Watcher poll failed ({error}), retrying in {self.poll_interval:g}s[/dim]")
+            self.stopped.wait(self.poll_interval)
+            return
+        console.print(f"[dim]inotify watcher failed ({error}), polling every {self.poll_interval:g}s[/dim]")
+        try:
+            self.backend.close()
+        except OSError:
+            pass
+        self.backend = _PollingBackend(self.root, self.ignored, self.debouncer, self.poll_interval)
+        # Events may have been lost in between; reconcile the whole tree once
+        self.debouncer.add("", is_dir=True)
+
+    def _flush(self, paths: Set[str], dirs: Set[str]):
+        try:
+            store = get_interface_store()
+            before = store.load() or {}
+            changes = apply_changes(paths, dirs, self.root, self.ignored)
+        except Exception as e:
+            console.print(f"[dim]Watcher could not update the interface: {e}[/dim]")
+            return
+        if not self.resummarize:
+            return
+        # Only keep summaries fresh if the project was summarized in the first place
+        summarized = any(isinstance(v, dict) for k, v in before.items() if k not in RESERVED_KEYS)
+        for path in changes["added"]:
+            if summarized:
+                self.resummarize.enqueue(path)
+        for path in changes["modified"]:
+            if isinstance(before.get(path), dict):
+                self.resummarize.enqueue(path)
+
+
+def start_watching(root: Path = Path(".")) -> Optional[FileWatcher]:
+    """Start the watcher (feeding the shared summary worker) if enabled in settings."""
+    settings = get_settings()
+    if not settings.watch or not get_interface_store().exists():
+        return None
+    worker = get_summary_worker()
+    watcher = FileWatcher(root, settings.watch_debounce, settings.watch_poll_interval,
+                          settings.watch_backend, resummarize=worker)
+    try:
+        return watcher.start()
+    except OSError as e:
+        console.print(f"[yellow]⚠️ File watcher disabled: {e}[/yellow]")
+        return None
+
+
+def stop_watching(watcher: Optional[FileWatcher]):
+    if watcher is None:
+        return
+    watcher.stop()
+    stop_summary_worker()
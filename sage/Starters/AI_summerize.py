@@ -1,7 +1,14 @@
 from pathlib import Path
 import json
+import os
 from rich.console import Console
-from .prompts import system_prompt
+from .prompts import system_prompt, partial_summary_prompt
+from sage.Core.scheduler import endpoint_key, get_scheduler
+from sage.Core.backends import get_backend
+from sage.Core.config import get_settings
+from sage.Core.content import ContentBudget
+from sage.Core.models import context_chars
+from .chunked_summary import chunk_limit, content_for_summary
 
 console = Console()
 
@@ -10,37 +17,40 @@ MAIN_COLOR = "#8B5CF6"
 ACCENT_COLOR = "#ffffff"        
 USER_COLOR = "#1D5ACA"   
 
-def analyze_and_summarize(client, model_name, interface_data):
+# Reply tokens for one batch of summaries, and prompt characters each file adds besides
+# its content (section heading, stub description)
+SUMMARY_REPLY_TOKENS = 4000
+FILE_OVERHEAD = 200
+
+def analyze_and_summarize(client, model_name, interface_data, backend=None):
+    backend = backend or get_backend()
     # Step 1: initial analysis
-    summaries = _analyze_structure(client, model_name, interface_data)
+    summaries = _analyze_structure(client, model_name, interface_data, backend)
     
     # Step 2: check files needing content review
     files_needing_content = _get_files_needing_content(summaries)
     
     if files_needing_content:
         console.print(f"[{MAIN_COLOR}]Providing content for {len(files_needing_content)} files...[/]")
-        summaries = _provide_content_and_reanalyze(client, model_name, summaries, files_needing_content)
+        summaries = _provide_content_and_reanalyze(client, model_name, summaries, files_needing_content, backend)
     
     return summaries
 
 
-def _analyze_structure(client, model_name, interface_data):    
+def _analyze_structure(client, model_name, interface_data, backend):    
     full_prompt = f"{system_prompt}\n\nProject Structure:\n{json.dumps(interface_data, indent=2)}\n\nProvide your analysis as JSON:"
     # console.print(f"[yellow]SENDING TO AI:\n{full_prompt}[/yellow]")
     try:
-        completion = client.chat.completions.create(
-            extra_headers={
-                "HTTP-Referer": "https://your-site.com",
-                "X-Title": "Sage CLI",
-            },
+        completion = get_scheduler().submit(lambda: client.chat.completions.create(
             model=model_name,
             messages=[
                 {"role": "system", "content": "You are an expert code analyzer. Provide clear, concise summaries of code files."},
                 {"role": "user", "content": full_prompt}
             ],
             temperature=0.3,
-            max_tokens=4000
-        )
+            max_tokens=SUMMARY_REPLY_TOKENS,
+            **backend.request_options(json_mode=True)
+        ), model=model_name, key=endpoint_key(backend.base_url, getattr(client, "api_key", "")))
         
         response_text = completion.choices[0].message.content.strip()
         json_str = _extract_json(response_text)
@@ -58,14 +68,17 @@ def _get_files_needing_content(summaries):
     console.print(f"[white]Found {len(files)} files needing content review[/]")
     return files
 
-def _provide_content_and_reanalyze(client, model_name, summaries, files_needing_content):
+def _provide_content_and_reanalyze(client, model_name, summaries, files_needing_content, backend):
     file_contents = {}
+    # Binary, huge or minified files become short stubs and the whole review is capped by
+    # MAX_TURN_BYTES and by what the context window has left next to the current summaries
+    room = context_chars(model_name, SUMMARY_REPLY_TOKENS) - len(json.dumps(summaries, indent=2)) - 1000
+    budget = ContentBudget(max(0, min(get_settings().max_turn_bytes, room)))
     for file_path in files_needing_content:
         path_obj = Path(file_path)
         if path_obj.exists():
             try:
-                content = path_obj.read_text(encoding="utf-8", errors="ignore")
-                file_contents[file_path] = content
+                file_contents[file_path] = content_for_summary(client, model_name, path_obj, budget, backend)
                 console.print(f"[{MAIN_COLOR}]✓ Read content for {file_path}[/]")
             except Exception as e:
                 console.print(f"[{ACCENT_COLOR}]⚠ Could not read {file_path}: {e}[/]")
@@ -87,19 +100,16 @@ def _provide_content_and_reanalyze(client, model_name, summaries, files_needing_
     full_prompt = f"{content_review_prompt}\n\nCurrent Summaries:\n{json.dumps(summaries, indent=2)}\n\nFile Contents:\n{json.dumps(file_contents, indent=2)}\n\nProvide updated COMPLETE summaries as JSON:"
     
     try:
-        completion = client.chat.completions.create(
-            extra_headers={
-                "HTTP-Referer": "https://your-site.com",
-                "X-Title": "Sage CLI",
-            },
+        completion = get_scheduler().submit(lambda: client.chat.completions.create(
             model=model_name,
             messages=[
                 {"role": "system", "content": "You are an expert code analyzer. Update file summaries based on actual content."},
                 {"role": "user", "content": full_prompt}
             ],
             temperature=0.3,
-            max_tokens=4000
-        )
+            max_tokens=SUMMARY_REPLY_TOKENS,
+            **backend.request_options(json_mode=True)
+        ), model=model_name, key=endpoint_key(backend.base_url, getattr(client, "api_key", "")))
         
         response_text = completion.choices[0].message.content.strip()
         updated_summaries = json.loads(_extract_json(response_text))
@@ -120,3 +130,185 @@ def _extract_json(text):
 
 
 
+
+RESERVED_KEYS = ("command", "text", "update")
+
+
+def next_free_index(interface_data):
+    """One past the highest index already used by a summarized file"""
+    used = [v["index"] for k, v in interface_data.items()
+            if k not in RESERVED_KEYS and isinstance(v, dict) and isinstance(v.get("index"), int)]
+    return max(used, default=0) + 1
+
+
+def summarize_paths(client, model_name, paths, interface_data, backend=None):
+    """Summarize only `paths`, keeping every other file's summary and index untouched."""
+    backend = backend or get_backend()
+    # Keep indices of files that had them; new files continue the numbering
+    next_index = next_free_index(interface_data)
+    indices = {}
+    for path in paths:
+        value = interface_data.get(path)
+        if isinstance(value, dict) and isinstance(value.get("index"), int):
+            indices[path] = value["index"]
+        else:
+            indices[path] = next_index
+            next_index += 1
+
+    known = []
+    for path, value in interface_data.items():
+        if path in RESERVED_KEYS:
+            continue
+        index = indices.get(path) or (value.get("index") if isinstance(value, dict) else None)
+        if index is not None:
+            known.append(f"{index} {path}")
+    for path in paths:
+        if path not in interface_data:
+            known.append(f"{indices[path]} {path}")
+
+    header = f"{partial_summary_prompt}\n\nKnown files:\n" + "\n".join(known)
+    # File content gets what the context window has left after the prompt and the file list
+    room = context_chars(model_name, SUMMARY_REPLY_TOKENS) - len(header) - sum(len(path) + FILE_OVERHEAD for path in paths)
+    budget = ContentBudget(max(0, min(get_settings().max_turn_bytes, room)))
+    sections = []
+    for path in paths:
+        content = content_for_summary(client, model_name, Path(path), budget, backend)
+        sections.append(f"### {path} (index {indices[path]})\n{content}")
+
+    full_prompt = (header + "\n\nFiles to summarize:\n" + "\n\n".join(sections) + "\n\nProvide the JSON:")
+    try:
+        completion = get_scheduler().submit(lambda: client.chat.completions.create(
+            model=model_name,
+            messages=[
+                {"role": "system", "content": "You are an expert code analyzer. Provide clear, concise summaries of code files."},
+                {"role": "user", "content": full_prompt}
+            ],
+            temperature=0.3,
+            max_tokens=SUMMARY_REPLY_TOKENS,
+            **backend.request_options(json_mode=True)
+        ), model=model_name, key=endpoint_key(backend.base_url, getattr(client, "api_key", "")))
+        summaries = json.loads(_extract_json(completion.choices[0].message.content.strip()))
+    except Exception as e:
+        console.print(f"[red]Error summarizing {len(paths)} changed files: {e}[/red]")
+        return {}
+
+    results = {}
+    for path in paths:
+        summary = summaries.get(path)
+        if isinstance(summary, dict):
+            summary["index"] = indices[path]
+            summary["request"] = {}
+            summary.setdefault("dependents", [])
+            results[path] = summary
+    return results
+
+
+def plan_batches(paths, model_name, interface_data):
+    """
+    Split paths into batches of at most SUMMARY_BATCH files whose content fits the
+    model's context window next to the prompt and the list of known files.
+    """
+    settings = get_settings()
+    listing = len(partial_summary_prompt) + sum(len(path) + 8 for path in interface_data if path not in RESERVED_KEYS)
+    room = max(1, min(settings.max_turn_bytes, context_chars(model_name, SUMMARY_REPLY_TOKENS) - listing))
+    # Files past one chunk are summarized in parts, so they never cost more than a chunk
+    limit = chunk_limit(model_name)
+    batches, current, used = [], [], 0
+    for path in paths:
+        try:
+            cost = min(os.path.getsize(path), limit) + len(path) + FILE_OVERHEAD
+        except OSError:
+            cost = len(path) + FILE_OVERHEAD
+        if current and (len(current) >= max(1, settings.summary_batch) or used + cost > room):
+            batches.append(current)
+            current, used = [], 0
+        current.append(path)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def local_pass(interface_data):
+    """
+    Summarize unsummarized files locally. Returns (summaries, to_model, centrality):
+    summaries for every pending file with its final index, the paths whose local
+    summary is low-confidence or widely imported, and importer counts per path.
+    """
+    from .local_summary import local_summaries, needs_model
+
+    settings = get_settings()
+    files = sorted(path for path in interface_data if path not in RESERVED_KEYS)
+    pending = [path for path in files if interface_data[path] in ("file", "unsummarized")]
+    if not pending:
+        return {}, [], {}
+    results, importers = local_summaries(files, workers=settings.summary_workers)
+
+    # Fix every index up front so concurrent model batches agree on them
+    indices = {path: value["index"] for path, value in interface_data.items()
+               if path not in RESERVED_KEYS and isinstance(value, dict) and isinstance(value.get("index"), int)}
+    next_index = next_free_index(interface_data)
+    for path in pending:
+        if path not in indices:
+            indices[path] = next_index
+            next_index += 1
+
+    summaries = {}
+    for path in pending:
+        summaries[path] = {
+            "summary": results[path]["summary"],
+            "index": indices[path],
+            "dependents": sorted(indices[importer] for importer in importers[path] if importer in indices),
+            "request": {},
+        }
+    centrality = {path: len(importers[path]) for path in files}
+    to_model = [path for path in pending
+                if needs_model(results[path], centrality[path],
+                               settings.local_summary_confidence, settings.central_imports)]
+
+    if settings.dedupe and len(to_model) > 1:
+        from .dedupe import find_clusters, describe_difference
+
+        # One model summary per cluster of near-duplicates; the rest point at it
+        copies = set()
+        for cluster in find_clusters(to_model, threshold=settings.dedupe_threshold):
+            representative = cluster[0]
+            for path in cluster[1:]:
+                summaries[path]["summary"] = (f"Like {representative} (index {indices[representative]}), "
+                                              f"differs in {describe_difference(representative, path)}.")
+                copies.add(path)
+        to_model = [path for path in to_model if path not in copies]
+    return summaries, to_model, centrality
+
+
+def merge_summary(previous, summary, valid_indices):
+    """Model summary with the dependents found locally (in `previous`) kept alongside its own."""
+    dependents = {d for d in summary.get("dependents", []) if isinstance(d, int) and d in valid_indices}
+    if isinstance(previous, dict):
+        dependents |= set(previous.get("dependents", []))
+    summary["dependents"] = sorted(dependents)
+    return summary
+
+
+def summarize_with_local_pass(client, model_name, interface_data, backend=None):
+    """
+    Summarize unsummarized files locally first and only send the model files whose
+    local summary is low-confidence or that many other files import.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    settings = get_settings()
+    summaries, to_model, _ = local_pass(interface_data)
+    console.print(f"[{MAIN_COLOR}]Summarized {len(summaries) - len(to_model)} files locally; "
+                  f"sending {len(to_model)} to the model[/]")
+    if not to_model:
+        return summaries
+
+    indexed = {**interface_data, **summaries}
+    valid = {value["index"] for value in indexed.values() if isinstance(value, dict) and "index" in value}
+    batches = plan_batches(to_model, model_name, indexed)
+    with ThreadPoolExecutor(max_workers=max(1, min(len(batches), int(settings.max_concurrency)))) as pool:
+        for model_summaries in pool.map(lambda paths: summarize_paths(client, model_name, paths, indexed, backend), batches):
+            for path, summary in model_summaries.items():
+                summaries[path] = merge_summary(summaries[path], summary, valid)
+    return summaries
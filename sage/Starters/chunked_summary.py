@@ -0,0 +1,190 @@
+from pathlib import Path
+import ast
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Tuple
+from rich.console import Console
+from sage.Core.scheduler import endpoint_key, get_scheduler
+from sage.Core.backends import get_backend
+from sage.Core.config import get_settings
+from sage.Core.content import ContentBudget, sniff, SNIFF_BYTES
+from sage.Core.models import context_chars
+from sage.Core.skeleton import skeleton_for_prompt
+
+console = Console()
+
+MAIN_COLOR = "#8B5CF6"
+# Partial summaries merged per reduce call; more than this are reduced in rounds
+REDUCE_FANOUT = 20
+# Python files up to this many chunks are parsed whole; bigger ones are streamed by blank-line blocks
+AST_CHUNK_LIMIT = 64
+# Reply tokens for one chunk or reduce summary
+CHUNK_REPLY_TOKENS = 300
+
+chunk_prompt = """You are summarizing one part of a larger source file so the parts can be merged later.
+Reply with 1-3 plain sentences (no JSON, no code) saying what this part defines or does, naming key classes, functions and imports."""
+reduce_prompt = """You are given summaries of consecutive parts of one file, in order.
+Reply with one or two plain sentences (no JSON, no code) describing what the whole file does."""
+
+Chunk = Tuple[int, int, str]
+
+
+def _group(pieces: Iterator[Chunk], max_chars: int) -> Iterator[Chunk]:
+    """Merge consecutive (start, end, text) pieces into chunks of at most max_chars, splitting oversized pieces by line."""
+    start, end, parts, size = None, None, [], 0
+    for piece_start, piece_end, text in pieces:
+        if len(text) > max_chars:
+            if parts:
+                yield start, end, "".join(parts)
+                start, parts, size = None, [], 0
+            lines = text.splitlines(keepends=True)
+            line_no = piece_start
+            buffer, buffer_start = [], piece_start
+            for line in lines:
+                if buffer and sum(map(len, buffer)) + len(line) > max_chars:
+                    yield buffer_start, line_no - 1, "".join(buffer)
+                    buffer, buffer_start = [], line_no
+                buffer.append(line[:max_chars])
+                line_no += 1
+            if buffer:
+                yield buffer_start, piece_end, "".join(buffer)
+            continue
+        if parts and size + len(text) > max_chars:
+            yield start, end, "".join(parts)
+            start, parts, size = None, [], 0
+        if start is None:
+            start = piece_start
+        end = piece_end
+        parts.append(text)
+        size += len(text)
+    if parts:
+        yield start, end, "".join(parts)
+
+
+def _blank_line_blocks(path: Path, encoding: str) -> Iterator[Chunk]:
+    """Stream a file as blocks separated by blank lines, without reading it whole."""
+    with path.open("r", encoding=encoding, errors="replace") as f:
+        block, block_start = [], 1
+        for number, line in enumerate(f, 1):
+            block.append(line)
+            if not line.strip():
+                yield block_start, number, "".join(block)
+                block, block_start = [], number + 1
+        if block:
+            yield block_start, block_start + len(block) - 1, "".join(block)
+
+
+def _ast_pieces(text: str) -> List[Chunk]:
+    """Top-level statements of a module (with decorators and the gaps before them) as pieces."""
+    tree = ast.parse(text)
+    lines = text.splitlines(keepends=True)
+    pieces = []
+    previous_end = 0
+    for node in tree.body:
+        first = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+        start = previous_end + 1
+        end = max(node.end_lineno or first, first)
+        pieces.append((start, end, "".join(lines[start - 1:end])))
+        previous_end = end
+    if previous_end < len(lines):
+        pieces.append((previous_end + 1, len(lines), "".join(lines[previous_end:])))
+    return pieces
+
+
+def split_chunks(path: Path, max_chars: int) -> Iterator[Chunk]:
+    """
+    Yield (first_line, last_line, text) chunks of at most max_chars, split at
+    class/function boundaries for Python and at blank lines otherwise.
+    """
+    with path.open("rb") as f:
+        encoding = sniff(f.read(SNIFF_BYTES))["encoding"] or "utf-8"
+    if path.suffix in (".py", ".pyi") and path.stat().st_size <= max_chars * AST_CHUNK_LIMIT:
+        try:
+            text = path.read_text(encoding=encoding, errors="replace")
+            yield from _group(iter(_ast_pieces(text)), max_chars)
+            return
+        except (SyntaxError, ValueError):
+            pass
+    yield from _group(_blank_line_blocks(path, encoding), max_chars)
+
+
+def _complete(client, model_name, backend, system: str, user: str) -> str:
+    completion = get_scheduler().submit(lambda: client.chat.completions.create(
+        model=model_name,
+        messages=[{"role": "system", "content": system}, {"role": "user", "content": user}],
+        temperature=0.2,
+        max_tokens=CHUNK_REPLY_TOKENS,
+        **backend.request_options()
+    ), model=model_name, key=endpoint_key(backend.base_url, getattr(client, "api_key", "")))
+    return completion.choices[0].message.content.strip()
+
+
+def chunk_limit(model_name: str) -> int:
+    """SUMMARY_CHUNK_BYTES, shrunk so one chunk and its prompt fit the model's context window."""
+    fits = context_chars(model_name, CHUNK_REPLY_TOKENS) - len(chunk_prompt) - 200
+    return max(1000, min(get_settings().summary_chunk_bytes, fits))
+
+
+def _reduce(client, model_name, backend, path: str, partials: List[str]) -> str:
+    while len(partials) > 1:
+        groups = [partials[i:i + REDUCE_FANOUT] for i in range(0, len(partials), REDUCE_FANOUT)]
+        partials = [
+            _complete(client, model_name, backend, reduce_prompt,
+                      f"File: {path}\n\n" + "\n".join(f"Part {i + 1}: {text}" for i, text in enumerate(group)))
+            for group in groups
+        ]
+    return partials[0] if partials else ""
+
+
+def summarize_large_file(client, model_name, path: Path, backend=None) -> str:
+    """
+    Summarize a file of any size: chunks are summarized concurrently (with a
+    bounded number in memory at once) and the partial summaries reduced into one.
+    """
+    backend = backend or get_backend()
+    settings = get_settings()
+    workers = max(1, int(settings.max_concurrency))
+    name = str(path).replace("\\", "/")
+    partials = []
+    in_flight = deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for first, last, text in split_chunks(path, chunk_limit(model_name)):
+            in_flight.append(pool.submit(_complete, client, model_name, backend, chunk_prompt,
+                                         f"File: {name}, lines {first}-{last}\n\n{text}"))
+            # Keep at most two chunks per worker waiting, so memory stays bounded
+            while len(in_flight) >= workers * 2:
+                partials.append(in_flight.popleft().result())
+        while in_flight:
+            partials.append(in_flight.popleft().result())
+    return _reduce(client, model_name, backend, name, partials)
+
+
+def content_for_summary(client, model_name, path: Path, budget: ContentBudget, backend=None) -> str:
+    """
+    What a summarization prompt gets for one file: its skeleton or content when
+    that fits in one chunk, otherwise a summary built chunk by chunk.
+    """
+    limit = chunk_limit(model_name)
+    try:
+        size = path.stat().st_size
+    except OSError:
+        return skeleton_for_prompt(path, budget)
+    if size <= limit:
+        return skeleton_for_prompt(path, budget)
+    # A skeleton of a big module is often small enough on its own
+    text = skeleton_for_prompt(path, ContentBudget(limit + 1))
+    if text.startswith("[skeleton:") and len(text) <= limit:
+        budget.consume(len(text))
+        return text
+    with path.open("rb") as f:
+        if sniff(f.read(SNIFF_BYTES))["binary"]:
+            return skeleton_for_prompt(path, budget)
+    console.print(f"[{MAIN_COLOR}]Summarizing {path} in chunks ({size // 1024} KB)...[/]")
+    try:
+        summary = summarize_large_file(client, model_name, path, backend)
+    except Exception as e:
+        console.print(f"[red]Error summarizing {path} in chunks: {e}[/red]")
+        return skeleton_for_prompt(path, budget)
+    text = f"[file too large to include; summary built from its parts]\n{summary}"
+    budget.consume(len(text))
+    return text
@@ -0,0 +1,111 @@
+from pathlib import Path
+import difflib
+import random
+import re
+import zlib
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # pure-Python fallback below
+    np = None
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+# Files with fewer shingles than this are too small to call near-duplicates
+MIN_SHINGLES = 8
+PRIME = (1 << 31) - 1
+MAX_BYTES = 512 * 1024
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+# Fixed seed: signatures must be comparable across runs and processes
+_rng = random.Random(0x5A6E)
+_A = [_rng.randrange(1, PRIME) for _ in range(NUM_PERM)]
+_B = [_rng.randrange(0, PRIME) for _ in range(NUM_PERM)]
+
+
+def shingles(text: str) -> set:
+    """Hashed token n-grams of a file's text."""
+    tokens = TOKEN_RE.findall(text)
+    if len(tokens) < SHINGLE_SIZE:
+        return set()
+    return {zlib.crc32(" ".join(tokens[i:i + SHINGLE_SIZE]).encode("utf-8")) % PRIME
+            for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+
+
+def signature(values: set) -> List[int]:
+    """MinHash signature: the minimum of each of NUM_PERM hash permutations over the shingles."""
+    if np is not None:
+        x = np.fromiter(values, dtype=np.uint64, count=len(values))
+        a = np.array(_A, dtype=np.uint64)[:, None]
+        b = np.array(_B, dtype=np.uint64)[:, None]
+        # a, b and x are all below 2**31, so a * x + b fits in 64 bits
+        return ((a * x + b) % PRIME).min(axis=1).tolist()
+    return [min((a * x + b) % PRIME for x in values) for a, b in zip(_A, _B)]
+
+
+def similarity(first: List[int], second: List[int]) -> float:
+    """Estimated Jaccard similarity of the two files' shingle sets."""
+    return sum(x == y for x, y in zip(first, second)) / NUM_PERM
+
+
+def _read_text(path: Path) -> Optional[str]:
+    try:
+        if path.stat().st_size > MAX_BYTES:
+            return None
+        data = path.read_bytes()
+    except OSError:
+        return None
+    if b"\0" in data[:8192]:
+        return None
+    return data.decode("utf-8", errors="replace")
+
+
+def find_clusters(paths, root: Path = Path("."), threshold: float = 0.8) -> List[List[str]]:
+    """
+    Group near-duplicate text files with MinHash + LSH banding. Returns clusters
+    of two or more paths, each sorted so its first path is the representative.
+    """
+    signatures = {}
+    for path in sorted(paths):
+        text = _read_text(root / path)
+        values = shingles(text) if text is not None else set()
+        if len(values) >= MIN_SHINGLES:
+            signatures[path] = signature(values)
+
+    # Files sharing any band bucket become candidates; only verified pairs are joined
+    parent = {path: path for path in signatures}
+
+    def find(path):
+        while parent[path] != path:
+            parent[path] = parent[parent[path]]
+            path = parent[path]
+        return path
+
+    for band in range(BANDS):
+        buckets: Dict[tuple, List[str]] = {}
+        for path, sig in signatures.items():
+            buckets.setdefault(tuple(sig[band * ROWS:(band + 1) * ROWS]), []).append(path)
+        for members in buckets.values():
+            for other in members[1:]:
+                if find(other) != find(members[0]) and similarity(signatures[members[0]], signatures[other]) >= threshold:
+                    parent[find(other)] = find(members[0])
+
+    clusters: Dict[str, List[str]] = {}
+    for path in signatures:
+        clusters.setdefault(find(path), []).append(path)
+    return [sorted(members) for members in clusters.values() if len(members) > 1]
+
+
+def describe_difference(representative: str, path: str, root: Path = Path(".")) -> str:
+    """Short "differs in ..." note for a near-duplicate of representative."""
+    first = (_read_text(root / representative) or "").splitlines()
+    second = (_read_text(root / path) or "").splitlines()
+    changed = [line.strip() for line in difflib.unified_diff(first, second, lineterm="", n=0)
+               if line.startswith("+") and not line.startswith("+++") and line[1:].strip()]
+    if not changed:
+        return "whitespace or removed lines only"
+    example = changed[0][1:].strip()[:60]
+    return f"{len(changed)} line{'s' if len(changed) != 1 else ''}, e.g. `{example}`"
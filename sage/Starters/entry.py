@@ -6,11 +6,14 @@ import platform
 import os
 import subprocess
 from rich.console import Console
-from rich.prompt import Prompt
-import inquirer
 from sage.Core.select_models import select_model
 from .terminals import terminals
 from .common_ignors import common_ignores
+from .file_utils import load_ignore_patterns, is_ignored, load_file_hashes, save_file_hashes
+from .walker import walk_tree
+from .git_index import find_git_dir, git_file_records, blob_sha
+from sage.Core.config import get_settings
+from sage.Core.interface_store import get_interface_store
 
 console = Console()
 
@@ -20,6 +23,8 @@ ACCENT_COLOR = "#ffffff"
 USER_COLOR = "#1D5ACA"   
 
 def get_terminal_choice():
+    import inquirer
+
     questions = [
         inquirer.List(
             'terminal',
@@ -170,49 +175,55 @@ def setup_sage(root_path: Path = Path(".")):
         console.print(f"[{MAIN_COLOR}]Found[/] {sageignore_file}")
 
     # Load ignore patterns
-    ignore_patterns = []
+    ignore_patterns = load_ignore_patterns(sageignore_file)
     if sageignore_file.exists():
-        with sageignore_file.open("r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith("#"):
-                    ignore_patterns.append(line)
         console.print(f"[{MAIN_COLOR}]Loaded {len(ignore_patterns)} ignore patterns[/]")
 
     # Collect flattened file structure with relative paths
-    def should_ignore(item_path: Path) -> bool:
+    def should_ignore(relative_path: str) -> bool:
         # Check if item matches any ignore pattern
-        relative_path = item_path.relative_to(root_path)
-        for pattern in ignore_patterns:
-            pattern = pattern.rstrip('/')
-            # Simple pattern matching - you might want to make this more robust
-            if str(relative_path).startswith(pattern) or pattern in str(relative_path):
-                return True
-        return False
-
-    def get_flattened_structure(path: Path, base_path: Path = None):
-        if base_path is None:
-            base_path = path
-        
-        flattened = {}
-        
-        for item in path.iterdir():
-            # Skip if item matches ignore patterns
-            if should_ignore(item):
-                continue
-                
-            if item.is_dir():
-                # Recursively get files from directories
-                flattened.update(get_flattened_structure(item, base_path))
-            else:
-                # Get relative path from base directory
-                relative_path = item.relative_to(base_path)
-                flattened[str(relative_path).replace('\\', '/')] = "file"
-        
-        return flattened
+        return is_ignored(relative_path, ignore_patterns)
 
-    # Scan the parent directory (root_path) and get flattened structure
-    flattened_files = get_flattened_structure(root_path)
+    settings = get_settings()
+    flattened_files = {}
+    file_hashes = {}
+    use_git = settings.file_source == "git" or (settings.file_source == "auto" and find_git_dir(root_path))
+    if use_git:
+        # Tracked files come straight from .git/index (with blob SHAs), untracked ones honor .gitignore
+        for relative_path, _, sha in git_file_records(root_path, should_ignore, settings.walk_workers):
+            flattened_files[relative_path] = "file"
+            if sha:
+                file_hashes[relative_path] = sha
+        console.print(f"[{MAIN_COLOR}]Read file list from the git index[/]")
+    else:
+        # Scan the parent directory (root_path) in parallel and get flattened structure
+        flattened_files = {
+            relative_path: "file"
+            for relative_path, _ in walk_tree(root_path, should_ignore, settings.walk_workers, with_stat=False)
+        }
+
+    # Files whose blob SHA hasn't changed keep the summary they already had
+    hashes_file = sage_dir / "file_hashes.json"
+    previous_hashes = load_file_hashes(hashes_file)
+    previous_interface = get_interface_store(interface_file).load() if interface_file.exists() else None
+    reused = 0
+    for relative_path in list(flattened_files):
+        old_value = (previous_interface or {}).get(relative_path)
+        if not isinstance(old_value, dict) or relative_path not in previous_hashes:
+            continue
+        sha = file_hashes.get(relative_path)
+        if sha is None:
+            # Stat data changed since staging: hash it ourselves, only for files worth keeping
+            try:
+                sha = file_hashes[relative_path] = blob_sha((root_path / relative_path).read_bytes())
+            except OSError:
+                continue
+        if previous_hashes[relative_path] == sha:
+            flattened_files[relative_path] = old_value
+            reused += 1
+    save_file_hashes(hashes_file, file_hashes)
+    if reused:
+        console.print(f"[{MAIN_COLOR}]Kept {reused} summaries for unchanged files[/]")
 
     # Detect platform and let user select terminal
     detected_platform = detect_platform()
@@ -234,8 +245,7 @@ def setup_sage(root_path: Path = Path(".")):
     }
 
     # Create/update interface.json inside Sage folder
-    with interface_file.open("w", encoding="utf-8") as f:
-        json.dump(complete_interface, f, indent=4, sort_keys=True)
+    get_interface_store(interface_file).save(complete_interface, indent=4, sort_keys=True)
 
     console.print(f"[{MAIN_COLOR}]{'Updated' if is_sage_installed else 'Created'}[/] {interface_file} with flattened file structure")
     console.print(f"[{MAIN_COLOR}]Recorded {len(flattened_files)} files[/]")
@@ -1,6 +1,38 @@
 from pathlib import Path
 import json
 
+def load_ignore_patterns(sageignore_file: Path):
+    """Read non-empty, non-comment lines from .sageignore"""
+    ignore_patterns = []
+    if sageignore_file.exists():
+        with sageignore_file.open("r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    ignore_patterns.append(line)
+    return ignore_patterns
+
+def is_ignored(relative_path: str, ignore_patterns) -> bool:
+    """Check if a project-relative path matches any ignore pattern"""
+    relative_path = relative_path.replace("\\", "/")
+    for pattern in ignore_patterns:
+        pattern = pattern.rstrip('/')
+        # Simple pattern matching - you might want to make this more robust
+        if relative_path.startswith(pattern) or pattern in relative_path:
+            return True
+    return False
+
+def load_file_hashes(hashes_file: Path):
+    """Path -> git blob SHA recorded at the last setup"""
+    try:
+        return json.loads(hashes_file.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def save_file_hashes(hashes_file: Path, file_hashes):
+    hashes_file.parent.mkdir(parents=True, exist_ok=True)
+    hashes_file.write_text(json.dumps(file_hashes, indent=2, sort_keys=True), encoding="utf-8")
+
 def mark_files_unsummarized(data):
     """Recursively mark all files as unsummarized"""
     for key, value in data.items():
@@ -0,0 +1,261 @@
+import hashlib
+import os
+import re
+import struct
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .walker import walk_tree
+
+_HEADER = struct.Struct(">4sII")
+# ctime s/ns, mtime s/ns, dev, ino, mode, uid, gid, size, sha1, flags
+_ENTRY = struct.Struct(">IIIIIIIIII20sH")
+_GITLINK_MODE = 0o160000
+
+
+class IndexEntry:
+    """One tracked file from .git/index with the stat data git cached for it."""
+
+    __slots__ = ("path", "mtime_ns", "ctime_ns", "size", "mode", "ino", "sha")
+
+    def __init__(self, path: str, mtime_ns: int, ctime_ns: int, size: int, mode: int, ino: int, sha: str):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.ctime_ns = ctime_ns
+        self.size = size
+        self.mode = mode
+        self.ino = ino
+        self.sha = sha
+
+    def matches(self, stat: os.stat_result) -> bool:
+        """True if the working-tree file still looks like what git hashed (same test as git's racy check)"""
+        # The index stores 32-bit sizes and second + nanosecond mtimes
+        return (stat.st_size & 0xFFFFFFFF) == self.size and stat.st_mtime_ns // 1_000_000_000 == self.mtime_ns // 1_000_000_000 \
+            and (self.mtime_ns % 1_000_000_000 == 0 or stat.st_mtime_ns == self.mtime_ns)
+
+
+def find_git_dir(root: Path) -> Optional[Path]:
+    """The repository's git dir, following `gitdir:` files used by worktrees and submodules."""
+    dot_git = root / ".git"
+    if dot_git.is_dir():
+        return dot_git
+    if dot_git.is_file():
+        text = dot_git.read_text(encoding="utf-8").strip()
+        if text.startswith("gitdir:"):
+            git_dir = Path(text[len("gitdir:"):].strip())
+            return git_dir if git_dir.is_absolute() else (root / git_dir).resolve()
+    return None
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    # git's offset varint used by index v4 path compression
+    byte = data[pos]
+    pos += 1
+    value = byte & 0x7F
+    while byte & 0x80:
+        byte = data[pos]
+        pos += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, pos
+
+
+def read_git_index(git_dir: Path) -> List[IndexEntry]:
+    """Parse .git/index (versions 2, 3 and 4) without running git."""
+    data = (git_dir / "index").read_bytes()
+    signature, version, count = _HEADER.unpack_from(data, 0)
+    if signature != b"DIRC" or version not in (2, 3, 4):
+        raise ValueError(f"Unsupported git index (signature {signature!r}, version {version})")
+
+    entries = {}
+    pos = _HEADER.size
+    previous_path = b""
+    for _ in range(count):
+        start = pos
+        (ctime_s, ctime_ns, mtime_s, mtime_ns, _dev, ino, mode, _uid, _gid, size,
+         sha, flags) = _ENTRY.unpack_from(data, pos)
+        pos += _ENTRY.size
+        if version >= 3 and flags & 0x4000:
+            pos += 2  # extended flags (skip-worktree, intent-to-add)
+
+        if version == 4:
+            strip, pos = _read_varint(data, pos)
+            end = data.index(b"\0", pos)
+            path = previous_path[:len(previous_path) - strip] + data[pos:end]
+            pos = end + 1
+        else:
+            end = data.index(b"\0", pos)
+            path = data[pos:end]
+            # Entries are NUL-padded to a multiple of 8 bytes
+            pos = start + ((end - start + 8) & ~7)
+        previous_path = path
+
+        if mode == _GITLINK_MODE:
+            continue  # submodule commit, not a file in this tree
+        name = path.decode("utf-8", "surrogateescape")
+        stage = (flags >> 12) & 0x3
+        # During a merge conflict keep a single entry per path
+        if name in entries and stage != 0:
+            continue
+        entries[name] = IndexEntry(
+            name,
+            mtime_s * 1_000_000_000 + mtime_ns,
+            ctime_s * 1_000_000_000 + ctime_ns,
+            size,
+            mode,
+            ino,
+            sha.hex(),
+        )
+    return list(entries.values())
+
+
+def blob_sha(data: bytes) -> str:
+    """Git's blob id for data, so untracked files hash the same way tracked ones do"""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def _translate(pattern: str) -> str:
+    """Translate one gitignore glob into a regex over '/'-separated relative paths."""
+    out = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "*":
+            if pattern[i:i + 3] == "**/":
+                out.append("(?:.*/)?")
+                i += 3
+                continue
+            if pattern[i:i + 2] == "**":
+                out.append(".*")
+                i += 2
+                continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end
+        elif c == "\\" and i + 1 < len(pattern):
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+class GitIgnore:
+    """Matches paths against .gitignore files and .git/info/exclude with git's precedence rules."""
+
+    def __init__(self, root: Path, git_dir: Optional[Path] = None):
+        self.root = root
+        # base directory -> [(regex, negated, dir_only)] in file order
+        self.rules: Dict[str, List[Tuple[re.Pattern, bool, bool]]] = {}
+        self._loaded = set()
+        if git_dir is not None:
+            self._add_file("", git_dir / "info" / "exclude")
+        self._load_dir("")
+
+    def _add_file(self, base: str, path: Path):
+        try:
+            lines = path.read_text(encoding="utf-8", errors="ignore").splitlines()
+        except OSError:
+            return
+        rules = self.rules.setdefault(base, [])
+        for line in lines:
+            line = line.rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            # A slash anywhere but the end anchors the pattern to the .gitignore's directory
+            anchored = "/" in line
+            line = line.lstrip("/")
+            regex = _translate(line)
+            if not anchored:
+                regex = f"(?:.*/)?{regex}"
+            rules.append((re.compile(f"^{regex}$"), negated, dir_only))
+
+    def _load_dir(self, rel_dir: str):
+        if rel_dir in self._loaded:
+            return
+        self._loaded.add(rel_dir)
+        self._add_file(rel_dir, (self.root / rel_dir / ".gitignore") if rel_dir else self.root / ".gitignore")
+
+    def _match(self, rel: str, is_dir: bool) -> Optional[bool]:
+        """Last matching rule wins; deeper .gitignore files override shallower ones."""
+        parts = rel.split("/")
+        result = None
+        for depth in range(len(parts)):
+            base = "/".join(parts[:depth])
+            self._load_dir(base)
+            sub = "/".join(parts[depth:])
+            for regex, negated, dir_only in self.rules.get(base, ()):
+                if dir_only and not is_dir:
+                    continue
+                if regex.match(sub):
+                    result = not negated
+        return result
+
+    def is_ignored(self, rel: str, is_dir: bool = False) -> bool:
+        rel = rel.rstrip("/")
+        # A file inside an ignored directory can't be re-included, as in git
+        parts = rel.split("/")
+        for depth in range(1, len(parts)):
+            if self._match("/".join(parts[:depth]), True):
+                return True
+        return bool(self._match(rel, is_dir))
+
+
+def git_file_records(root: Path, extra_ignored=lambda rel: False, workers: Optional[int] = None
+                     ) -> Iterator[Tuple[str, Optional[os.stat_result], Optional[str]]]:
+    """
+    Enumerate a git repository's files as (path, stat, blob_sha): tracked files
+    straight from .git/index, then untracked files that .gitignore doesn't exclude.
+    The sha is git's cached blob id when the file is unchanged since it was staged,
+    otherwise None (callers hash lazily with blob_sha if they need one).
+    """
+    git_dir = find_git_dir(root)
+    if git_dir is None:
+        raise FileNotFoundError("not a git repository")
+    tracked = {}
+    for entry in read_git_index(git_dir):
+        if extra_ignored(entry.path):
+            continue
+        try:
+            stat = os.stat(root / entry.path)
+        except OSError:
+            continue  # deleted in the working tree but not yet staged
+        tracked[entry.path] = entry
+        yield entry.path, stat, entry.sha if entry.matches(stat) else None
+
+    gitignore = GitIgnore(root, git_dir)
+    tracked_dirs = set()
+    for path in tracked:
+        parts = path.split("/")[:-1]
+        for depth in range(1, len(parts) + 1):
+            tracked_dirs.add("/".join(parts[:depth]))
+
+    def ignored(rel: str) -> bool:
+        is_dir = rel.endswith("/")
+        rel = rel.rstrip("/")
+        if rel == ".git" or extra_ignored(rel + ("/" if is_dir else "")):
+            return True
+        if not is_dir and rel in tracked:
+            return True  # already reported from the index
+        # Ignored directories holding tracked files still need walking for untracked siblings
+        return gitignore.is_ignored(rel, is_dir) and rel not in tracked_dirs
+
+    for rel, stat in walk_tree(root, ignored, workers, with_stat=True):
+        yield rel, stat, None
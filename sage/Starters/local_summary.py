@@ -0,0 +1,281 @@
+from pathlib import Path
+import ast
+import json
+import multiprocessing
+import os
+import re
+import tomllib
+from concurrent.futures import ProcessPoolExecutor
+from sage.Core.content import sniff, SNIFF_BYTES
+
+# Files over this size are described from their head only
+READ_LIMIT = 256 * 1024
+
+LOCKFILES = {
+    "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock", "Pipfile.lock", "Cargo.lock",
+    "composer.lock", "Gemfile.lock", "go.sum", "uv.lock", "bun.lockb", "flake.lock", "mix.lock",
+}
+KNOWN_FILES = {
+    ".gitignore": "Git ignore rules.",
+    ".gitattributes": "Git attributes configuration.",
+    ".dockerignore": "Docker build context ignore rules.",
+    ".editorconfig": "Editor formatting settings.",
+    ".env": "Environment variables.",
+    ".env.example": "Example environment variables.",
+    ".npmrc": "npm configuration.",
+    ".nvmrc": "Node.js version pin.",
+    ".python-version": "Python version pin.",
+    ".prettierrc": "Prettier formatting configuration.",
+    "Dockerfile": "Docker image build instructions.",
+    "docker-compose.yml": "Docker Compose service definitions.",
+    "docker-compose.yaml": "Docker Compose service definitions.",
+    "Makefile": "Make build targets.",
+    "Procfile": "Process types for the hosting platform.",
+    "MANIFEST.in": "Python source distribution manifest.",
+    "tsconfig.json": "TypeScript compiler configuration.",
+    "requirements.txt": "Python dependency list.",
+}
+ASSET_KINDS = {
+    ".png": "Image", ".jpg": "Image", ".jpeg": "Image", ".gif": "Image", ".webp": "Image", ".ico": "Icon",
+    ".svg": "Vector image", ".bmp": "Image", ".avif": "Image",
+    ".woff": "Font", ".woff2": "Font", ".ttf": "Font", ".otf": "Font", ".eot": "Font",
+    ".mp3": "Audio", ".wav": "Audio", ".ogg": "Audio", ".mp4": "Video", ".webm": "Video", ".mov": "Video",
+    ".pdf": "PDF document", ".zip": "Archive", ".gz": "Archive", ".tar": "Archive",
+}
+CONFIG_SUFFIXES = {".json", ".yaml", ".yml", ".toml", ".ini", ".cfg", ".conf", ".properties", ".xml"}
+DOC_SUFFIXES = {".md", ".rst", ".txt", ".adoc"}
+SCRIPT_SUFFIXES = {
+    ".js": "JavaScript", ".jsx": "JavaScript (JSX)", ".mjs": "JavaScript", ".cjs": "JavaScript",
+    ".ts": "TypeScript", ".tsx": "TypeScript (TSX)", ".go": "Go", ".rs": "Rust", ".java": "Java",
+    ".kt": "Kotlin", ".c": "C", ".h": "C header", ".cpp": "C++", ".hpp": "C++ header", ".cs": "C#",
+    ".rb": "Ruby", ".php": "PHP", ".swift": "Swift", ".sh": "Shell script", ".css": "Stylesheet",
+    ".scss": "Stylesheet", ".html": "HTML page", ".vue": "Vue component", ".svelte": "Svelte component",
+}
+JS_IMPORT_RE = re.compile(r"""(?:\bfrom\s+|\bimport\s*\(?\s*|\brequire\s*\(\s*)["']([^"']+)["']""")
+C_INCLUDE_RE = re.compile(r'^\s*#\s*include\s+"([^"]+)"', re.MULTILINE)
+EXPORT_RE = re.compile(
+    r"^\s*(?:export\s+(?:default\s+)?(?:async\s+)?(?:function\*?|class|const|let|interface|type|enum)\s+(\w+)"
+    r"|(?:pub(?:\(crate\))?\s+)(?:fn|struct|enum|trait)\s+(\w+)"
+    r"|public\s+(?:static\s+)?(?:final\s+)?(?:abstract\s+)?(?:class|interface|enum|record)\s+(\w+)"
+    r"|func\s+(?:\([^)]*\)\s*)?([A-Z]\w*))", re.MULTILINE)
+
+
+def _size_text(size: int) -> str:
+    return f"{size} B" if size < 1024 else f"{size / 1024:.0f} KB" if size < 1024 * 1024 else f"{size / 1024 / 1024:.1f} MB"
+
+
+def _names(items, limit: int = 5) -> str:
+    items = list(items)
+    text = ", ".join(items[:limit])
+    return text + (f" and {len(items) - limit} more" if len(items) > limit else "")
+
+
+def _python_summary(text: str):
+    """Summary, confidence and imported module names of a Python file."""
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return "Python module (does not parse).", 0.3, []
+    imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = "." * node.level + (node.module or "")
+            imports.append(base)
+            imports.extend(f"{base}.{alias.name}" if node.module else base + alias.name for alias in node.names)
+    classes = [n.name for n in tree.body if isinstance(n, ast.ClassDef) and not n.name.startswith("_")]
+    functions = [n.name for n in tree.body
+                 if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef)) and not n.name.startswith("_")]
+    constants = [target.id for n in tree.body if isinstance(n, (ast.Assign, ast.AnnAssign))
+                 for target in (n.targets if isinstance(n, ast.Assign) else [n.target])
+                 if isinstance(target, ast.Name) and not target.id.startswith("_")]
+    doc = ast.get_docstring(tree)
+    if doc and doc.strip():
+        return doc.strip().splitlines()[0].strip(), 0.85, imports
+    parts = []
+    if classes:
+        parts.append(f"classes {_names(classes)}")
+    if functions:
+        parts.append(f"functions {_names(functions)}")
+    if not parts and constants:
+        parts.append(f"data {_names(constants)}")
+    if not parts:
+        if not tree.body:
+            return "Empty Python module.", 0.9, imports
+        return "Python script.", 0.3, imports
+    # Names alone rarely say what the module is for
+    return f"Python module defining {' and '.join(parts)}.", 0.45, imports
+
+
+def _manifest_summary(name: str, text: str):
+    try:
+        if name == "package.json":
+            data = json.loads(text)
+            description = data.get("description") or ""
+            deps = len(data.get("dependencies", {})) + len(data.get("devDependencies", {}))
+            return f"npm package manifest for {data.get('name', 'the project')}" + (
+                f": {description}" if description else "") + f" ({deps} dependencies).", 0.95
+        if name in ("pyproject.toml", "Cargo.toml"):
+            data = tomllib.loads(text)
+            project = data.get("project") or data.get("package") or data.get("tool", {}).get("poetry", {})
+            description = project.get("description") or ""
+            kind = "Python project" if name == "pyproject.toml" else "Rust crate"
+            return f"{kind} metadata for {project.get('name', 'the project')}" + (
+                f": {description}" if description else "") + ".", 0.95
+        if name == "go.mod":
+            module = text.split("\n", 1)[0].replace("module", "").strip()
+            return f"Go module definition for {module}.", 0.95
+    except (ValueError, tomllib.TOMLDecodeError, AttributeError):
+        pass
+    return None
+
+
+def summarize_local(root: str, relative_path: str) -> dict:
+    """
+    Cheap deterministic summary of one file: {"summary", "confidence", "imports"}.
+    Confidence is how sure we are that the summary is good enough without the model.
+    """
+    path = Path(root) / relative_path
+    name = path.name
+    suffix = path.suffix.lower()
+    result = {"summary": "", "confidence": 0.0, "imports": []}
+    try:
+        size = path.stat().st_size
+        with path.open("rb") as f:
+            data = f.read(READ_LIMIT)
+    except OSError:
+        result.update(summary="Unreadable file.", confidence=0.2)
+        return result
+
+    if name in LOCKFILES:
+        result.update(summary=f"Dependency lockfile ({_size_text(size)}).", confidence=0.98)
+        return result
+    if suffix in ASSET_KINDS:
+        result.update(summary=f"{ASSET_KINDS[suffix]} asset ({suffix[1:].upper()}, {_size_text(size)}).", confidence=0.95)
+        return result
+    if size == 0:
+        result.update(summary="Empty file.", confidence=0.95)
+        return result
+    info = sniff(data[:SNIFF_BYTES])
+    if info["binary"]:
+        result.update(summary=f"Binary file ({info['kind']}, {_size_text(size)}).", confidence=0.9)
+        return result
+    if info["kind"] == "minified text":
+        result.update(summary=f"Minified or generated {suffix[1:] or 'text'} bundle ({_size_text(size)}).", confidence=0.85)
+        return result
+    text = data.decode(info["encoding"] or "utf-8", errors="replace")
+
+    manifest = _manifest_summary(name, text) if size <= READ_LIMIT else None
+    if manifest:
+        result["summary"], result["confidence"] = manifest
+    elif name in KNOWN_FILES:
+        result.update(summary=KNOWN_FILES[name], confidence=0.9)
+    elif name.upper().startswith(("LICENSE", "COPYING")):
+        result.update(summary="License text.", confidence=0.95)
+    elif suffix in (".py", ".pyi"):
+        result["summary"], result["confidence"], result["imports"] = _python_summary(text)
+        if size > READ_LIMIT:
+            result["confidence"] = min(result["confidence"], 0.4)
+    elif suffix in DOC_SUFFIXES:
+        heading = next((line.lstrip("#= ").strip() for line in text.splitlines() if line.strip()), "")
+        result.update(summary=f"Documentation: {heading[:100]}." if heading else "Documentation.", confidence=0.75)
+    elif suffix in CONFIG_SUFFIXES:
+        keys = []
+        if suffix == ".json":
+            try:
+                parsed = json.loads(text)
+                keys = list(parsed) if isinstance(parsed, dict) else []
+            except ValueError:
+                pass
+        else:
+            keys = re.findall(r"^\[?([A-Za-z_][\w.-]*)\]?\s*[:=\]]", text, re.MULTILINE)
+        label = f"{suffix[1:].upper()} configuration"
+        result.update(summary=f"{label} (keys: {_names(dict.fromkeys(keys))})." if keys else f"{label}.", confidence=0.7)
+    elif suffix in SCRIPT_SUFFIXES:
+        language = SCRIPT_SUFFIXES[suffix]
+        exports = [next(group for group in match if group) for match in EXPORT_RE.findall(text)]
+        result["imports"] = JS_IMPORT_RE.findall(text) + C_INCLUDE_RE.findall(text)
+        if exports:
+            result.update(summary=f"{language} source exporting {_names(dict.fromkeys(exports))}.", confidence=0.45)
+        else:
+            result.update(summary=f"{language} source ({_size_text(size)}).", confidence=0.3)
+    else:
+        result.update(summary=f"{suffix[1:].upper() or 'Plain'} text file ({_size_text(size)}).", confidence=0.4)
+    return result
+
+
+def _python_module_names(path: str):
+    """Dotted names a Python file can be imported as."""
+    parts = path[:-3].split("/") if path.endswith(".py") else path[:-4].split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    # Allow imports rooted at any parent (src/ layouts, scripts run from subfolders)
+    return [".".join(parts[i:]) for i in range(len(parts)) if parts[i:]]
+
+
+def resolve_imports(results: dict) -> dict:
+    """Importing files for every file: path -> set of paths that import it."""
+    modules = {}
+    for path in results:
+        if path.endswith((".py", ".pyi")):
+            for name in _python_module_names(path):
+                modules.setdefault(name, path)
+    paths = set(results)
+    importers = {path: set() for path in results}
+    for path, result in results.items():
+        for spec in result.get("imports", []):
+            target = None
+            if path.endswith((".py", ".pyi")):
+                name = spec
+                if spec.startswith("."):
+                    level = len(spec) - len(spec.lstrip("."))
+                    package = path.split("/")[:-level]
+                    name = ".".join(package + [spec.lstrip(".")]).strip(".")
+                target = modules.get(name)
+            elif spec.startswith("."):
+                base = os.path.normpath(os.path.join(os.path.dirname(path), spec)).replace("\\", "/")
+                for candidate in (base, *(base + ext for ext in (".ts", ".tsx", ".js", ".jsx", ".mjs")),
+                                  *(f"{base}/index{ext}" for ext in (".ts", ".tsx", ".js", ".jsx"))):
+                    if candidate in paths:
+                        target = candidate
+                        break
+            else:
+                candidate = os.path.normpath(os.path.join(os.path.dirname(path), spec)).replace("\\", "/")
+                target = candidate if candidate in paths else None
+            if target and target != path:
+                importers[target].add(path)
+    return importers
+
+
+def _summarize_chunk(root: str, paths):
+    return [(path, summarize_local(root, path)) for path in paths]
+
+
+def _pool_context():
+    # The summary worker and spinner threads may already be running, and forking a
+    # multi-threaded process can deadlock; forkserver/spawn start workers clean
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def local_summaries(paths, root: Path = Path("."), workers: int = 0):
+    """Summarize `paths` locally across a process pool. Returns (results, importers)."""
+    paths = list(paths)
+    workers = workers or os.cpu_count() or 1
+    results = {}
+    if workers <= 1 or len(paths) < 64:
+        results.update(_summarize_chunk(str(root), paths))
+    else:
+        # A few chunks per worker keeps pickling overhead low and the load balanced
+        size = max(16, len(paths) // (workers * 4))
+        chunks = [paths[i:i + size] for i in range(0, len(paths), size)]
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as pool:
+            for chunk in pool.map(_summarize_chunk, [str(root)] * len(chunks), chunks):
+                results.update(chunk)
+    return results, resolve_imports(results)
+
+
+def needs_model(result: dict, centrality: int, min_confidence: float, central_imports: int) -> bool:
+    """Whether a file should still go to the model after the local pass."""
+    return result["confidence"] < min_confidence or centrality >= central_imports
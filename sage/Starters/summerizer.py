@@ -6,10 +6,13 @@ from rich.spinner import Spinner
 from rich.live import Live
 from rich.text import Text
 from rich.panel import Panel
-from openai import OpenAI
-from sage.Starters.env_utils import get_api_key, get_model
+from sage.Core.backends import get_backend
+from sage.Starters.env_utils import get_backend_api_key, get_model
 from sage.Starters.file_utils import mark_files_unsummarized, update_interface_with_summaries
-from sage.Starters.AI_summerize import analyze_and_summarize
+from sage.Starters.AI_summerize import analyze_and_summarize, summarize_with_local_pass
+from sage.Core.config import get_settings
+from sage.Core.summary_worker import get_summary_worker
+from sage.Core.interface_store import get_interface_store
 
 console = Console()
 
@@ -39,14 +42,15 @@ def create_fancy_loading_display():
     return spinner, panel
 
 def summarize_files(interface_file: Path = Path("Sage/interface.json")):
-    api_key = get_api_key()
-    if not api_key:
+    backend = get_backend()
+    api_key = get_backend_api_key(backend)
+    if backend.requires_api_key and not api_key:
         return
     
     # Get model from environment
+    # get_model() resolves MODEL=auto and reports what's missing
     model_name = get_model()
     if not model_name:
-        console.print("[red]Error: MODEL not found in .env file[/red]")
         return
     
     if not interface_file.exists():
@@ -56,47 +60,55 @@ def summarize_files(interface_file: Path = Path("Sage/interface.json")):
     choice = typer.prompt("Do you want to let Sage access and understand your file structure (y/n)", default="y")
     if choice.strip().lower() not in ["y", "yes"]:
         console.print(f"[{ACCENT_COLOR}]Skipping file summarization...[/]")
-        with interface_file.open("r", encoding="utf-8") as f:
-            interface_data = json.load(f)
-        mark_files_unsummarized(interface_data)
-        with interface_file.open("w", encoding="utf-8") as f:
-            json.dump(interface_data, f, indent=4)
+        get_interface_store(interface_file).update(mark_files_unsummarized)
         console.print(f"[{MAIN_COLOR}]Marked all files as 'unsummarized'[/]")
         return
     
-    console.print(f"[{MAIN_COLOR}]Starting file summarization with OpenRouter ({model_name})...[/]")
+    console.print(f"[{MAIN_COLOR}]Starting file summarization with {backend.name} ({model_name})...[/]")
     
+    if get_settings().background_summaries:
+        # Local summaries land immediately; the model's arrive while the user chats, through
+        # the worker's own client
+        queued = get_summary_worker().queue_unsummarized()
+        if queued:
+            console.print(f"[{MAIN_COLOR}]Summarizing {queued} files in the background. You can start chatting now.[/]")
+        else:
+            console.print(f"[green]✓ File summarization complete![/green]")
+        return
+
     try:
-        # Initialize OpenAI client with OpenRouter
-        client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=api_key,
-        )
+        client = backend.create_client(api_key)
         console.print(f"[{MAIN_COLOR}]Using model: {model_name}[/]")
     except Exception as e:
-        console.print(f"[red]Error configuring OpenRouter client: {e}[/red]")
+        console.print(f"[red]Error configuring {backend.name} client: {e}[/red]")
         return
-    
+
     with interface_file.open("r", encoding="utf-8") as f:
         interface_data = json.load(f)
-    
+
     # Create and display the enhanced loading animation
     spinner, loading_panel = create_fancy_loading_display()
     
-    with Live(
-        loading_panel, 
-        console=console, 
-        refresh_per_second=10,
-        transient=True
-    ) as live:
-        # Run the summarization process while showing the loader
-        final_summaries = analyze_and_summarize(client, model_name, interface_data)
+    try:
+        with Live(
+            loading_panel, 
+            console=console, 
+            refresh_per_second=10,
+            transient=True
+        ) as live:
+            # Run the summarization process while showing the loader
+            if get_settings().local_summaries:
+                final_summaries = summarize_with_local_pass(client, model_name, interface_data, backend)
+            else:
+                final_summaries = analyze_and_summarize(client, model_name, interface_data, backend)
+    finally:
+        if hasattr(client, "close"):
+            client.close()
     
     # Update interface with summaries
     update_interface_with_summaries(interface_data, final_summaries)
     
-    with interface_file.open("w", encoding="utf-8") as f:
-        json.dump(interface_data, f, indent=4)
+    get_interface_store(interface_file).save(interface_data)
     
     console.print(f"[green]✓ File summarization complete![/green]")
     console.print(f"[white]Updated interface.json with summaries[/]")
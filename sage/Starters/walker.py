@@ -0,0 +1,135 @@
+import os
+import queue
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Tuple
+
+_DONE = object()
+
+
+class _Walk:
+    """
+    Directory walk spread over a thread pool. Each worker owns a deque of
+    directories: it pops its own newest entry (depth-first, warm dentry cache)
+    and steals the oldest entry of another worker when it runs dry, so one deep
+    subtree can't leave the other workers idle. Directory-ness comes from the
+    d_type cached by os.scandir, so only files pay for a stat.
+    """
+
+    def __init__(self, root: Path, ignored: Callable[[str], bool], workers: int, with_stat: bool):
+        self.root = str(root)
+        self.ignored = ignored
+        self.with_stat = with_stat
+        self.deques = [deque() for _ in range(workers)]
+        self.deques[0].append("")
+        self.pending = 1
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+        self.stop = threading.Event()
+        # Bounded so a slow consumer applies back-pressure instead of buffering the whole tree
+        self.out: "queue.Queue" = queue.Queue(maxsize=4096)
+        self.seen_links = set()
+        self.threads = [threading.Thread(target=self._work, args=(i,), daemon=True) for i in range(workers)]
+
+    def _next_dir(self, me: int) -> Optional[str]:
+        try:
+            return self.deques[me].pop()
+        except IndexError:
+            pass
+        for offset in range(1, len(self.deques)):
+            try:
+                return self.deques[(me + offset) % len(self.deques)].popleft()
+            except IndexError:
+                continue
+        return None
+
+    def _emit(self, record) -> bool:
+        while not self.stop.is_set():
+            try:
+                self.out.put(record, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _scan(self, me: int, rel_dir: str):
+        path = os.path.join(self.root, rel_dir) if rel_dir else self.root
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                    try:
+                        is_dir = entry.is_dir()
+                        # Directories are offered to the filter with a trailing '/'
+                        if self.ignored(f"{rel}/" if is_dir else rel):
+                            continue
+                        if is_dir and entry.is_symlink():
+                            # Follow directory links once; a cycle would otherwise never end
+                            real = os.path.realpath(entry.path)
+                            with self.lock:
+                                if real in self.seen_links:
+                                    continue
+                                self.seen_links.add(real)
+                        if is_dir:
+                            with self.lock:
+                                self.pending += 1
+                            self.deques[me].append(rel)
+                            continue
+                        stat = entry.stat() if self.with_stat else None
+                    except OSError:
+                        continue
+                    if not self._emit((rel, stat)):
+                        return
+        except OSError:
+            pass
+
+    def _work(self, me: int):
+        try:
+            while not self.stop.is_set():
+                rel_dir = self._next_dir(me)
+                if rel_dir is None:
+                    with self.idle:
+                        if self.pending == 0:
+                            self.idle.notify_all()
+                            return
+                        self.idle.wait(0.01)
+                    continue
+                self._scan(me, rel_dir)
+                with self.idle:
+                    self.pending -= 1
+                    if self.pending == 0:
+                        self.idle.notify_all()
+        finally:
+            self._emit(_DONE)
+
+    def __iter__(self):
+        for thread in self.threads:
+            thread.start()
+        finished = 0
+        try:
+            while finished < len(self.threads):
+                record = self.out.get()
+                if record is _DONE:
+                    finished += 1
+                    continue
+                yield record
+        finally:
+            # Consumer stopped early (or finished): release any blocked workers
+            self.stop.set()
+
+
+def default_workers() -> int:
+    # Walking is latency bound, not CPU bound, so oversubscribe the cores
+    return min(32, (os.cpu_count() or 1) * 4)
+
+
+def walk_tree(root: Path, ignored: Callable[[str], bool] = lambda rel: False,
+              workers: Optional[int] = None, with_stat: bool = True) -> Iterator[Tuple[str, Optional[os.stat_result]]]:
+    """
+    Stream (relative_path, stat) for every non-ignored file under root, using a
+    work-stealing thread pool over directories. Paths use '/' separators and
+    `ignored` sees directories with a trailing '/'.
+    With with_stat=False no per-file stat is made and stat is None.
+    """
+    yield from _Walk(root, ignored, max(1, workers or default_workers()), with_stat)
@@ -1,22 +1,38 @@
 import typer
+from pathlib import Path
+from typing import List, Optional
 from rich.console import Console
-from sage.Starters.entry import setup_sage
-from sage.Starters.summerizer import summarize_files
-from sage.Core.chat import chat
 
 console = Console()
 app = typer.Typer()
 MAIN_COLOR = "#8B5CF6" 
 
-@app.command()
-def main():
+@app.callback(invoke_without_command=True)
+def start(ctx: typer.Context):
     """Sage CLI - Complete project setup and analysis"""
+    if ctx.invoked_subcommand is not None:
+        return
     console.print(f"[{MAIN_COLOR}]Sage CLI[/{MAIN_COLOR}]")
+    from sage.Core import daemon
+    if daemon.ping():
+        # A warm daemon already holds the index, summaries and connections
+        from sage.Core.chat import chat
+        console.print("Attached to the running Sage daemon.")
+        client = daemon.DaemonClient()
+        try:
+            chat(client)
+        finally:
+            client.close()
+        return
     console.print("Welcome! Setting up and analyzing your project now...")
+    # Heavy modules (openai, inquirer, prompt_toolkit) load only once they're needed
+    from sage.Starters.entry import setup_sage
+    from sage.Starters.summerizer import summarize_files
+    from sage.Core.chat import chat
     try:
         # Setup Sage
         setup_sage()
-        # Summarize files
+        # Summarize files (queued in the background unless BACKGROUND_SUMMARIES=false)
         summarize_files()
         # Start chat interface
         chat()
@@ -25,5 +41,151 @@ def main():
     except Exception as e:
         console.print(f"[red]Error:[/red] {e}")
 
+@app.command("run")
+def run_command(
+    prompt: Optional[str] = typer.Option(None, "--prompt", "-p", help="Prompt to send"),
+    prompt_file: Optional[Path] = typer.Option(None, help="Read the prompt from a file"),
+    manifest: Optional[Path] = typer.Option(None, help="JSON / JSON Lines / text file with many prompts"),
+    workers: int = typer.Option(4, help="Parallel workers for --manifest"),
+):
+    """Headless mode: answer prompts without any interactive steps and print JSON results."""
+    import json
+    import sys
+    from sage.Core.batch import load_manifest, route_console_to_stderr, run_batch
+
+    route_console_to_stderr()
+    if manifest:
+        tasks = load_manifest(manifest)
+    elif prompt is not None:
+        tasks = [{"id": "1", "prompt": prompt}]
+    elif prompt_file:
+        tasks = [{"id": "1", "prompt": prompt_file.read_text(encoding="utf-8")}]
+    elif not sys.stdin.isatty():
+        tasks = [{"id": "1", "prompt": sys.stdin.read()}]
+    else:
+        console.print("[red]Error:[/red] give --prompt, --prompt-file, --manifest or pipe a prompt on stdin")
+        raise typer.Exit(code=2)
+
+    failures = 0
+    try:
+        # One JSON object per line, in completion order
+        for result in run_batch(tasks, workers=workers):
+            failures += not result["ok"]
+            sys.stdout.write(json.dumps(result) + "\n")
+            sys.stdout.flush()
+    except RuntimeError as e:
+        console.print(f"[red]Error:[/red] {e}")
+        raise typer.Exit(code=1)
+    if failures:
+        raise typer.Exit(code=1)
+
+@app.command("daemon")
+def daemon_command(action: str = typer.Argument("status", help="start | stop | status | serve")):
+    """Manage the per-project background daemon that keeps Sage warm."""
+    from sage.Core import daemon
+
+    if not daemon.is_supported():
+        console.print("[red]Error:[/red] the daemon needs Unix domain sockets, which this platform lacks")
+        raise typer.Exit(code=1)
+    if action == "serve":
+        daemon.serve()
+    elif action == "start":
+        if daemon.start_background():
+            console.print(f"[green]✓ Sage daemon running[/green] [dim]({daemon.SOCKET_FILE})[/dim]")
+        else:
+            console.print(f"[red]Error:[/red] daemon did not start, see {daemon.LOG_FILE}")
+            raise typer.Exit(code=1)
+    elif action == "stop":
+        if daemon.ping():
+            daemon.request({"op": "shutdown"}, timeout=5.0)
+            console.print("[green]✓ Sage daemon stopped[/green]")
+        else:
+            console.print("[yellow]No Sage daemon running for this project[/yellow]")
+    elif action == "status":
+        if not daemon.ping():
+            console.print("[yellow]No Sage daemon running for this project[/yellow]")
+            return
+        status = daemon.request({"op": "status"}, timeout=5.0)
+        console.print(f"[{MAIN_COLOR}]pid[/] {status['pid']}  [{MAIN_COLOR}]uptime[/] {status['uptime']}s  "
+                      f"[{MAIN_COLOR}]sessions[/] {status['sessions']}  [{MAIN_COLOR}]requests[/] {status['requests']}  "
+                      f"[{MAIN_COLOR}]files[/] {status['files']}")
+    else:
+        console.print(f"[red]Error:[/red] unknown action '{action}'")
+        raise typer.Exit(code=2)
+
+@app.command("bench-models")
+def bench_models_command(
+    models: Optional[List[str]] = typer.Argument(None, help="Models to benchmark (default: MODEL, FALLBACK_MODELS and the top of the model list)"),
+    runs: int = typer.Option(3, help="Requests per model"),
+    top: int = typer.Option(5, help="How many models from the built-in list to include by default"),
+):
+    """Measure latency, throughput, JSON validity and error rate per model."""
+    from sage.Core.bench import bench_models
+    from sage.Core.config import get_settings
+    from sage.Core.models import models as known_models
+
+    if not models:
+        settings = get_settings()
+        models = [settings.model] + settings.fallback_models + [m["model"] for m in known_models[:top]]
+        models = list(dict.fromkeys(m for m in models if m and m.lower() != "auto"))
+
+    if not models:
+        console.print("[red]Error:[/red] no models to benchmark; set MODEL or pass model names")
+        raise typer.Exit(code=1)
+
+    results = bench_models(models, runs)
+    if not results:
+        console.print("[red]Error:[/red] nothing was benchmarked; SAGE_API_KEY is not set for this backend")
+        raise typer.Exit(code=1)
+    console.print(f"[bold {MAIN_COLOR}]{'Model':<45} {'TTFT':>7} {'Tok/s':>7} {'JSON':>6} {'Errors':>7}[/]")
+    for model, result in sorted(results.items(), key=lambda item: item[1]["ttft"] if item[1]["ttft"] is not None else float("inf")):
+        ttft = f"{result['ttft']:.2f}s" if result["ttft"] is not None else "-"
+        tps = f"{result['tps']:.0f}" if result["tps"] is not None else "-"
+        console.print(f"{model[:45]:<45} {ttft:>7} {tps:>7} {result['json_rate']:>6.0%} {result['error_rate']:>7.0%}")
+    console.print("[dim]Saved to Sage/model_bench.json[/dim]")
+
+@app.command("bench-startup")
+def bench_startup_command(
+    runs: int = typer.Option(5, help="Fresh interpreters to time"),
+    budget_ms: Optional[float] = typer.Option(None, help="Fail if the median import time exceeds this (default: STARTUP_BUDGET_MS or 150)"),
+):
+    """Time cold `import sage.cli` with -X importtime and check it against the budget."""
+    from sage.Core.startup import bench_startup
+    from sage.Core.config import get_settings
+
+    if budget_ms is None:
+        budget_ms = get_settings().startup_budget_ms
+
+    report = bench_startup(runs=runs)
+    console.print(f"[{MAIN_COLOR}]import sage.cli[/] median {report['median_ms']:.1f}ms "
+                  f"(min {report['min_ms']:.1f}ms, max {report['max_ms']:.1f}ms, budget {budget_ms:.0f}ms)")
+    for name, elapsed in report["heaviest"]:
+        console.print(f"  {elapsed:8.1f}ms  {name}")
+    if report["median_ms"] > budget_ms:
+        console.print(f"[red]✗ Cold start is over budget by {report['median_ms'] - budget_ms:.1f}ms[/red]")
+        raise typer.Exit(code=1)
+    console.print("[green]✓ Cold start within budget[/green]")
+
+@app.command("bench-prompt")
+def bench_prompt_command(
+    roots: Optional[List[Path]] = typer.Argument(None, help="Project folders to measure (default: current folder)"),
+):
+    """Compare prompt tokens of the JSON and compact interface formats on sample projects."""
+    from rich.table import Table
+    from sage.Core.encoding import sample_interface, bench_formats
+
+    table = Table(header_style=f"bold {MAIN_COLOR}")
+    for column in ("Project", "Files", "JSON tokens", "Compact tokens", "Saved", "Round-trip"):
+        table.add_column(column)
+    for root in roots or [Path(".")]:
+        report = bench_formats(sample_interface(root))
+        saved = 1 - report["compact"]["tokens"] / max(1, report["json"]["tokens"])
+        table.add_row(str(root), str(report["files"]), str(report["json"]["tokens"]),
+                      str(report["compact"]["tokens"]), f"{saved:.0%}", "✓" if report["round_trip"] else "✗")
+    console.print(table)
+
+def main():
+    app()
+
 if __name__ == "__main__":
-    app()
\ No newline at end of file
+    main()
@@ -0,0 +1,30 @@
+from sage.Core.backends import OpenAICompatibleBackend, OpenRouterBackend, get_backend
+from sage.Core.env_util import get_backend_api_key
+
+
+def test_keyless_backend_still_sends_a_configured_key(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SAGE_BACKEND", "openai")
+    monkeypatch.setenv("SAGE_API_KEY", "secret")
+    assert get_backend_api_key(get_backend()) == "secret"
+    monkeypatch.delenv("SAGE_API_KEY")
+    assert get_backend_api_key(get_backend()) is None
+
+
+def test_backends_keep_their_own_defaults(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SAGE_BACKEND", "openai")
+    backend = get_backend()
+    assert backend.timeout == OpenAICompatibleBackend.default_timeout
+    assert backend.max_connections == OpenAICompatibleBackend.default_max_connections
+    assert OpenAICompatibleBackend.default_timeout != OpenRouterBackend.default_timeout
+
+
+def test_explicit_settings_override_backend_defaults(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SAGE_BACKEND", "openai")
+    monkeypatch.setenv("SAGE_REQUEST_TIMEOUT", "5")
+    monkeypatch.setenv("SAGE_JSON_MODE", "false")
+    backend = get_backend()
+    assert backend.timeout == 5.0 and backend.supports_json_mode is False
+    assert backend.connect_timeout == OpenAICompatibleBackend.default_connect_timeout
@@ -0,0 +1,64 @@
+from typer.testing import CliRunner
+
+from sage.cli import app
+from sage.Core.api import OpenRouterClient
+from sage.Core.bench import save_bench_results
+from sage.Core.encoding import format_for_model
+from sage.Core.env_util import get_model
+from sage.Core.summary_worker import SummaryWorker
+
+SLOW_FIRST = {
+    "slow": {"ttft": 5.0, "tps": 10, "error_rate": 0.0},
+    "fast": {"ttft": 0.5, "tps": 10, "error_rate": 0.0},
+}
+
+
+def _project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SAGE_BACKEND", "mock")
+    monkeypatch.setenv("SAGE_MODEL", "m1")
+    monkeypatch.setenv("SAGE_FALLBACK_MODELS", "slow,fast")
+    save_bench_results(SLOW_FIRST)
+
+
+def test_fallback_chain_keeps_the_configured_order(tmp_path, monkeypatch):
+    _project(tmp_path, monkeypatch)
+    assert OpenRouterClient().fallback_models == ["slow", "fast"]
+
+
+def test_fallback_chain_is_ranked_on_opt_in(tmp_path, monkeypatch):
+    _project(tmp_path, monkeypatch)
+    monkeypatch.setenv("SAGE_RANK_FALLBACKS", "true")
+    assert OpenRouterClient().fallback_models == ["fast", "slow"]
+
+
+def test_bench_models_fails_without_a_key(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SAGE_BACKEND", "openrouter")
+    monkeypatch.delenv("SAGE_API_KEY", raising=False)
+    result = CliRunner().invoke(app, ["bench-models", "m1", "--runs", "1"])
+    assert result.exit_code == 1
+    assert "Saved to" not in result.output
+
+
+def test_model_auto_is_resolved_everywhere_the_model_is_read(tmp_path, monkeypatch):
+    _project(tmp_path, monkeypatch)
+    monkeypatch.setenv("SAGE_MODEL", "auto")
+    monkeypatch.setenv("SAGE_PROMPT_FORMATS", "fast=compact")
+    assert get_model() == "fast"
+    assert OpenRouterClient().model == "fast"
+    assert format_for_model() == "compact"
+
+    seen = []
+    monkeypatch.setattr("sage.Starters.AI_summerize.summarize_paths",
+                        lambda client, model, paths, data, backend: seen.append(model) or {})
+    (tmp_path / "a.py").write_text("x = 1\n")
+    (tmp_path / "Sage" / "interface.json").write_text('{"a.py": "unsummarized"}')
+    SummaryWorker()._summarize(["a.py"])
+    assert seen == ["fast"]
+
+
+def test_model_auto_without_results_is_an_error(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SAGE_MODEL", "auto")
+    assert get_model() is None
@@ -0,0 +1,21 @@
+from sage.Core import chat as chat_module
+from sage.Core.backends import MockBackend, MockClient
+
+
+def test_chat_uses_one_client_for_every_turn(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SAGE_BACKEND", "mock")
+    monkeypatch.setenv("SAGE_MODEL", "m1")
+    monkeypatch.setenv("SAGE_WATCH", "false")
+    created = []
+    real_create = MockBackend.create_client
+    monkeypatch.setattr(MockBackend, "create_client",
+                        lambda self, api_key: created.append(1) or real_create(self, api_key))
+    closed = []
+    monkeypatch.setattr(MockClient, "close", lambda self: closed.append(1), raising=False)
+    messages = iter(["first", "second", "third", ""])
+    monkeypatch.setattr(chat_module, "_get_user_input", lambda: next(messages))
+    monkeypatch.setattr(chat_module, "display_chat_ready", lambda: None)
+
+    chat_module.chat()
+    assert len(created) == 1 and len(closed) == 1
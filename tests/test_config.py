@@ -0,0 +1,35 @@
+from pathlib import Path
+
+from sage.Core import config
+from sage.Core.config import get_settings
+
+
+def _unreadable(monkeypatch):
+    def read_text(self, *args, **kwargs):
+        if self.name == ".env":
+            raise PermissionError(13, "Permission denied")
+        return real_read_text(self, *args, **kwargs)
+
+    real_read_text = Path.read_text
+    monkeypatch.setattr(Path, "read_text", read_text)
+
+
+def test_unreadable_env_file_keeps_the_cached_settings(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / ".env").write_text("MODEL=first\n")
+    assert get_settings().model == "first"
+    (tmp_path / ".env").write_text("MODEL=second-model\n")
+    _unreadable(monkeypatch)
+    assert get_settings().model == "first"
+    monkeypatch.undo()
+    monkeypatch.chdir(tmp_path)
+    assert get_settings().model == "second-model"
+
+
+def test_unreadable_env_file_without_a_cache_gives_defaults(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(config._cache, "settings", None)
+    monkeypatch.setitem(config._cache, "stamp", None)
+    (tmp_path / ".env").write_text("MODEL=first\n")
+    _unreadable(monkeypatch)
+    assert get_settings().model is None
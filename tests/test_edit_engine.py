@@ -0,0 +1,70 @@
+import os
+import stat
+
+import pytest
+
+from sage.Core.edit_engine import EditError, Hunk, apply_hunks, edit_file, parse_hunks
+
+
+def _write(tmp_path, data: bytes):
+    path = tmp_path / "f.txt"
+    path.write_bytes(data)
+    return path
+
+
+def test_several_hunks_use_original_line_numbers(tmp_path):
+    path = _write(tmp_path, b"1\n2\n3\n4\n5\n")
+    apply_hunks(path, [Hunk(4, 4, ["four"]), Hunk(2, 2, ["two", "two b"])])
+    assert path.read_bytes() == b"1\ntwo\ntwo b\n3\nfour\n5\n"
+
+
+def test_insert_delete_and_append(tmp_path):
+    path = _write(tmp_path, b"a\nb\nc\n")
+    apply_hunks(path, [Hunk(1, 0, ["top"]), Hunk(2, 2, []), Hunk(4, 3, ["end"])])
+    assert path.read_bytes() == b"top\na\nc\nend\n"
+
+
+def test_crlf_and_missing_final_newline_are_kept(tmp_path):
+    path = _write(tmp_path, b"a\r\nb\r\nc")
+    apply_hunks(path, [Hunk(2, 2, ["B"])])
+    assert path.read_bytes() == b"a\r\nB\r\nc"
+    apply_hunks(path, [Hunk(4, 3, ["d"])])
+    assert path.read_bytes() == b"a\r\nB\r\nc\r\nd"
+
+
+def test_open_ended_hunk_replaces_to_end_of_file(tmp_path):
+    path = _write(tmp_path, b"a\nb\nc\n")
+    edit_file(path, {"start": 2, "content": "x\ny"})
+    assert path.read_bytes() == b"a\nx\ny\n"
+
+
+def test_overlapping_hunks_are_rejected(tmp_path):
+    path = _write(tmp_path, b"a\nb\nc\n")
+    with pytest.raises(EditError, match="overlap"):
+        apply_hunks(path, [Hunk(1, 2, ["x"]), Hunk(2, 3, ["y"])])
+    assert path.read_bytes() == b"a\nb\nc\n"
+
+
+def test_hunk_past_the_end_leaves_the_file_alone(tmp_path):
+    path = _write(tmp_path, b"a\nb\n")
+    with pytest.raises(EditError, match="only 2 lines|past the end"):
+        apply_hunks(path, [Hunk(2, 5, ["x"])])
+    assert path.read_bytes() == b"a\nb\n"
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".tmp")] == []
+
+
+def test_bad_requests_are_reported(tmp_path):
+    with pytest.raises(EditError, match="start"):
+        parse_hunks({"start": 0})
+    with pytest.raises(EditError, match="end"):
+        parse_hunks({"start": 5, "end": 2})
+    binary = _write(tmp_path, b"\x00\x01\x02")
+    with pytest.raises(EditError, match="not text"):
+        edit_file(binary, {"start": 1, "end": 1, "content": ["x"]})
+
+
+def test_file_mode_is_preserved(tmp_path):
+    path = _write(tmp_path, b"#!/bin/sh\necho hi\n")
+    path.chmod(0o755)
+    apply_hunks(path, [Hunk(2, 2, ["echo bye"])])
+    assert stat.S_IMODE(path.stat().st_mode) == 0o755
@@ -0,0 +1,70 @@
+import json
+
+from sage.Core.encoding import decode_interface, decode_reply, encode_interface, bench_formats
+
+
+def _entry(summary="", index=1, dependents=None, request=None):
+    return {"summary": summary, "index": index, "dependents": dependents or [], "request": request or {}}
+
+
+def test_round_trip_plain_tree():
+    data = {
+        "README.md": _entry("Project readme", 1),
+        "src/app.py": _entry("Entry point", 2, [3]),
+        "src/util/io.py": _entry("File helpers", 3, [2], {"provide": {}}),
+        "assets/logo.png": "file",
+        "notes.txt": "unsummarized",
+        "command": {"summary": "", "terminal": "bash", "platform": "linux", "commands": []},
+        "text": "place holder",
+        "update": "no",
+    }
+    assert decode_interface(encode_interface(data)) == data
+
+
+def test_round_trip_summaries_with_separators():
+    summaries = [
+        "first line\nsecond line",
+        "uses a ?{json} tail",
+        "points <-1 back",
+        "has # and #tags",
+        "ends with a slash/",
+        '"quoted" start',
+        "<-leading arrow",
+        "  padded  ",
+        "",
+    ]
+    data = {f"f{i}.py": _entry(summary, i + 1, [1, 2]) for i, summary in enumerate(summaries)}
+    encoded = encode_interface(data)
+    assert len(encoded.splitlines()) == len(data) + 1
+    assert decode_interface(encoded) == data
+
+
+def test_round_trip_odd_names_and_values():
+    data = {
+        "dir #1/a =b.py": _entry("x", 1),
+        "weird/\"name\"": _entry("y", 2),
+        " spaced.py": "file",
+        "multi.txt": "line\nbreak",
+        "eq.txt": "=starts with equals",
+        "num.txt": 5,
+    }
+    assert decode_interface(encode_interface(data)) == data
+
+
+def test_unknown_and_missing_keys_survive():
+    data = {
+        "a.py": {"summary": "s", "index": 1, "dependents": [], "request": {}, "owner": "team", "tags": ["x"]},
+        "b.py": {"summary": "only a summary"},
+        "c.py": {"summary": "s", "index": None, "dependents": ["x"], "request": {"@odd": 1}},
+    }
+    assert decode_interface(encode_interface(data)) == data
+
+
+def test_bench_reports_lossless_round_trip():
+    data = {"a.py": _entry("summary with ?{braces} and\nnewline", 1)}
+    assert bench_formats(data)["round_trip"] is True
+
+
+def test_decode_reply_short_keys_and_fences():
+    reply = "```json\n" + json.dumps({"a.py": {"s": "x", "i": 1, "d": [], "r": {"provide": {}}}}) + "\n```"
+    assert decode_reply(reply) == {"a.py": _entry("x", 1, [], {"provide": {}})}
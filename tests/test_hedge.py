@@ -0,0 +1,75 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from sage.Core.hedge import hedged_completion
+from sage.Core.scheduler import RequestScheduler
+
+
+def _chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class _StalledStream:
+    """Sends `before` chunks, then blocks until closed, like a provider that stopped talking."""
+
+    def __init__(self, before):
+        self.before = list(before)
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.before:
+            return _chunk(self.before.pop(0))
+        if not self.closed.wait(30):
+            raise AssertionError("stream was never closed")
+        raise ConnectionError("connection closed")
+
+    def close(self):
+        self.closed.set()
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_stalled_primary_is_closed_and_its_slot_freed():
+    scheduler = RequestScheduler()
+    stalled = _StalledStream([])
+    streams = {"slow": lambda: stalled, "fast": lambda: iter([_chunk("done")])}
+
+    def create(model, cancel):
+        return scheduler.submit(streams[model], model=model, key="k", cancel=cancel)
+
+    assert hedged_completion(create, ["slow", "fast"], 0.05) == ("done", "fast")
+    assert _wait_for(stalled.closed.is_set)
+    assert _wait_for(lambda: scheduler.metrics()["models"]["slow (...k)"]["in_flight"] == 0)
+
+
+def test_cancelled_mid_stream_attempt_frees_its_slot():
+    scheduler = RequestScheduler()
+    stalled = _StalledStream(["partial"])
+    release_fast = threading.Event()
+
+    def fast():
+        release_fast.wait(5)
+        yield _chunk("done")
+
+    streams = {"slow": lambda: stalled, "fast": fast}
+
+    def create(model, cancel):
+        if model == "slow":
+            # slow has streamed its first token; now let fast answer and win
+            threading.Timer(0.1, release_fast.set).start()
+        return scheduler.submit(streams[model], model=model, key="k", cancel=cancel)
+
+    # With a zero deadline both start before any first token arrives
+    text, model = hedged_completion(create, ["fast", "slow"], 0.0)
+    assert model == "fast"
+    assert _wait_for(stalled.closed.is_set)
+    assert _wait_for(lambda: scheduler.metrics()["models"]["slow (...k)"]["in_flight"] == 0)
@@ -0,0 +1,66 @@
+from sage.Core.ledger import ContextLedger
+from sage.Core.orchestrator import Orchestrator
+
+TEXT = "\n".join(f"line {i}" for i in range(100))
+
+
+def test_repeat_of_committed_content_is_a_reference():
+    ledger = ContextLedger()
+    ledger.begin_turn(1)
+    assert ledger.send("a.py", "{}", TEXT) == TEXT
+    ledger.commit_turn()
+    ledger.begin_turn(2)
+    assert ledger.send("a.py", "{}", TEXT).startswith("[unchanged since turn 1")
+
+
+def test_small_change_is_sent_as_a_diff():
+    ledger = ContextLedger()
+    ledger.begin_turn(1)
+    ledger.send("a.py", "{}", TEXT)
+    ledger.commit_turn()
+    ledger.begin_turn(2)
+    sent = ledger.send("a.py", "{}", TEXT.replace("line 50", "line fifty"))
+    assert sent.startswith("[changed since turn 1")
+    assert "+line fifty" in sent and "-line 50" in sent
+
+
+def test_discarded_turn_is_not_remembered():
+    ledger = ContextLedger()
+    ledger.begin_turn(1)
+    ledger.send("a.py", "{}", TEXT)
+    ledger.discard_turn()
+    ledger.begin_turn(2)
+    assert ledger.send("a.py", "{}", TEXT) == TEXT
+
+
+def test_new_turn_drops_leftover_staged_entries():
+    ledger = ContextLedger()
+    ledger.begin_turn(1)
+    ledger.send("a.py", "{}", TEXT)
+    ledger.begin_turn(2)
+    assert ledger.send("a.py", "{}", TEXT) == TEXT
+
+
+def test_forget_before_resends_in_full():
+    ledger = ContextLedger()
+    ledger.begin_turn(1)
+    ledger.send("a.py", "{}", TEXT)
+    ledger.commit_turn()
+    ledger.forget_before(2)
+    ledger.begin_turn(2)
+    assert ledger.send("a.py", "{}", TEXT) == TEXT
+
+
+def test_pages_are_separate_views(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SAGE_MAX_TURN_BYTES", "2000")
+    (tmp_path / "big.txt").write_text("".join(f"line number {i}\n" for i in range(2000)))
+    orchestrator = Orchestrator("key")
+    orchestrator.ledger.begin_turn(1)
+    first = orchestrator.process_ai_response({"big.txt": {"request": {"provide": {"start": 1}}}})["results"]
+    second = orchestrator.process_ai_response({"big.txt": {"request": {"provide": {"page": "next"}}}})["results"]
+    assert "line number 0" in first
+    assert "[changed since" not in second and "[unchanged since" not in second
+    assert "line number 0\n" not in second
+    views = sorted(view for path, view in orchestrator.ledger.staged)
+    assert len(views) == 2 and '{"start": 1}' in views
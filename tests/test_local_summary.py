@@ -0,0 +1,24 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from sage.Starters import local_summary
+from sage.Starters.local_summary import local_summaries
+
+
+def test_process_pool_does_not_fork(tmp_path, monkeypatch):
+    paths = []
+    for i in range(80):
+        (tmp_path / f"m{i}.py").write_text(f'"""Module {i}."""\nimport os\n')
+        paths.append(f"m{i}.py")
+    methods = []
+
+    def pool(*args, **kwargs):
+        context = kwargs.get("mp_context")
+        methods.append(context.get_start_method() if context else None)
+        return ProcessPoolExecutor(*args, **kwargs)
+
+    monkeypatch.setattr(local_summary, "ProcessPoolExecutor", pool)
+    results, _ = local_summaries(paths, root=tmp_path, workers=2)
+    # The summary worker thread may already be running: forking then can deadlock
+    assert methods and methods[0] in ("forkserver", "spawn")
+    assert set(results) == set(paths)
+    assert results["m3.py"]["summary"].startswith("Module 3")
@@ -0,0 +1,77 @@
+import pytest
+
+from sage.Core.patches import Matcher, PatchError, patch_file, read_lines, replace_hunks
+
+SOURCE = "def a():\n    return 1\n\n\ndef b():\n    return 2\n"
+
+
+def _write(tmp_path, text=SOURCE):
+    path = tmp_path / "m.py"
+    path.write_text(text)
+    return path
+
+
+def test_unified_diff_with_shifted_line_numbers(tmp_path):
+    path = _write(tmp_path, "# header\n# more\n" + SOURCE)
+    patch = "--- a/m.py\n+++ b/m.py\n@@ -5,2 +5,2 @@\n def b():\n-    return 2\n+    return 3\n"
+    patch_file(path, patch=patch)
+    assert path.read_text() == "# header\n# more\n" + SOURCE.replace("return 2", "return 3")
+
+
+def test_unified_diff_tolerates_whitespace_drift_in_context(tmp_path):
+    path = _write(tmp_path)
+    patch = "@@ -1,2 +1,2 @@\n def  a():\n-  return 1\n+    return 10\n"
+    patch_file(path, patch=patch)
+    # Context lines keep the file's own spacing
+    assert path.read_text().startswith("def a():\n    return 10\n")
+
+
+def test_unified_diff_with_unknown_context_fails_with_closest_match(tmp_path):
+    path = _write(tmp_path)
+    with pytest.raises(PatchError, match="closest match"):
+        patch_file(path, patch="@@ -1,2 +1,2 @@\n def a():\n-    return 5\n+    return 6\n")
+    assert path.read_text() == SOURCE
+
+
+def test_search_replace_block(tmp_path):
+    path = _write(tmp_path)
+    patch_file(path, replace={"search": "def b():\n    return 2", "replace": "def b():\n    return 20"})
+    assert path.read_text() == SOURCE.replace("return 2", "return 20")
+
+
+def test_ambiguous_search_needs_an_anchor_or_hint(tmp_path):
+    lines = ["x = 1", "y = 2", "x = 1"]
+    with pytest.raises(PatchError, match="matches 2 places"):
+        replace_hunks(lines, {"search": "x = 1", "replace": "x = 0"})
+    assert replace_hunks(lines, {"search": "x = 1", "replace": "x = 0", "anchor": "y ="})[0].start == 3
+    assert replace_hunks(lines, {"search": "x = 1", "replace": "x = 0", "line": 3})[0].start == 3
+
+
+def test_missing_anchor_and_empty_search_are_reported():
+    with pytest.raises(PatchError, match="anchor"):
+        replace_hunks(["a"], {"search": "a", "anchor": "nope"})
+    with pytest.raises(PatchError, match="empty"):
+        replace_hunks(["a"], {"search": ""})
+
+
+def test_matcher_prefers_exact_matches():
+    matcher = Matcher(["  a", "a", "b"])
+    assert matcher.candidates(["a"]) == [1]
+    assert matcher.candidates(["a  "]) == [0, 1]
+
+
+def test_form_feed_does_not_shift_line_numbers(tmp_path):
+    path = tmp_path / "m.py"
+    path.write_bytes(b"a\n\x0cx = 0\nb\nc\n")
+    assert read_lines(path) == ["a", "\x0cx = 0", "b", "c"]
+    patch_file(path, replace={"search": "b", "replace": "B"})
+    assert path.read_bytes() == b"a\n\x0cx = 0\nB\nc\n"
+    patch_file(path, patch="@@ -3,2 +3,2 @@\n B\n-c\n+C\n")
+    assert path.read_bytes() == b"a\n\x0cx = 0\nB\nC\n"
+
+
+def test_search_text_with_a_form_feed_is_one_line(tmp_path):
+    path = tmp_path / "m.py"
+    path.write_bytes(b"a\n\x0cx = 0\nb\n")
+    patch_file(path, replace={"search": "\x0cx = 0", "replace": "\x0cx = 1"})
+    assert path.read_bytes() == b"a\n\x0cx = 1\nb\n"
@@ -0,0 +1,69 @@
+import pytest
+
+from sage.Core.edit_engine import EditError, Hunk, rebase_hunks
+from sage.Core.orchestrator import Orchestrator
+
+BASE = ["a", "b", "c", "d", "e"]
+
+
+def test_hunk_moves_past_lines_inserted_above():
+    current = ["new 1", "new 2"] + BASE
+    [hunk] = rebase_hunks([Hunk(4, 4, ["D"])], BASE, current)
+    assert (hunk.start, hunk.end, hunk.lines) == (6, 6, ["D"])
+
+
+def test_insert_point_follows_its_block():
+    current = ["a", "b", "c", "d", "e", "f"]
+    [hunk] = rebase_hunks([Hunk(6, 5, ["tail"])], BASE, current)
+    assert (hunk.start, hunk.end) == (6, 5)
+    [hunk] = rebase_hunks([Hunk(2, 1, ["x"])], BASE, ["z"] + BASE)
+    assert (hunk.start, hunk.end) == (3, 2)
+
+
+def test_edit_of_a_changed_line_is_a_conflict():
+    current = ["a", "B", "c", "d", "e"]
+    with pytest.raises(EditError, match="changed since your version") as error:
+        rebase_hunks([Hunk(2, 3, ["x"])], BASE, current)
+    assert "+B" in str(error.value)
+
+
+def test_open_ended_hunk_needs_an_unchanged_tail():
+    [hunk] = rebase_hunks([Hunk(4, None, ["x"])], BASE, ["top"] + BASE)
+    assert (hunk.start, hunk.end) == (5, None)
+    with pytest.raises(EditError):
+        rebase_hunks([Hunk(4, None, ["x"])], BASE, BASE + ["appended"])
+
+
+def test_orchestrator_rebases_an_edit_against_a_stale_version(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "f.txt"
+    path.write_text("\n".join(BASE) + "\n")
+    orchestrator = Orchestrator("key")
+    version = orchestrator._remember_version("f.txt")
+    path.write_text("header\n" + "\n".join(BASE) + "\n")
+
+    ok, detail = orchestrator._edit_file("f.txt", {"start": 3, "end": 3, "content": ["C"]}, version)
+    assert ok and "rebased from version" in detail
+    assert path.read_text() == "header\na\nb\nC\nd\ne\n"
+
+
+def test_orchestrator_refuses_an_unknown_stale_version(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "f.txt").write_text("a\n")
+    ok, detail = Orchestrator("key")._edit_file("f.txt", {"start": 1, "end": 1, "content": ["b"]}, "000000000000")
+    assert not ok and "provide the file again" in detail
+    assert (tmp_path / "f.txt").read_text() == "a\n"
+
+
+def test_rebase_counts_form_feeds_as_part_of_a_line(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "f.py"
+    path.write_bytes(b"a\n\x0cx = 0\nb\nc\n")
+    orchestrator = Orchestrator("key")
+    version = orchestrator._remember_version("f.py")
+    # The new line lands between the form feed and the edited line
+    path.write_bytes(b"a\n\x0cx = 0\nnew\nb\nc\n")
+
+    ok, detail = orchestrator._edit_file("f.py", {"start": 3, "end": 3, "content": ["B"]}, version)
+    assert ok and "rebased from version" in detail
+    assert path.read_bytes() == b"a\n\x0cx = 0\nnew\nB\nc\n"
@@ -0,0 +1,65 @@
+from sage.Core.scheduler import RequestScheduler, endpoint_key
+
+
+class _Throttled(Exception):
+    status_code = 429
+    response = None
+
+
+def _limiter(scheduler):
+    return next(iter(scheduler._limiters.values()))
+
+
+def test_stream_holds_its_slot_until_exhausted():
+    scheduler = RequestScheduler(initial_concurrency=1)
+    stream = scheduler.submit(lambda: iter(["a", "b"]), model="m", key="k")
+    assert _limiter(scheduler).in_flight == 1
+    assert list(stream) == ["a", "b"]
+    assert _limiter(scheduler).in_flight == 0
+
+
+def test_closing_a_stream_frees_the_slot():
+    scheduler = RequestScheduler(initial_concurrency=1)
+    stream = scheduler.submit(lambda: iter(["a", "b"]), model="m", key="k")
+    next(stream)
+    stream.close()
+    assert _limiter(scheduler).in_flight == 0
+
+
+def test_error_before_the_first_chunk_is_retried():
+    scheduler = RequestScheduler(base_delay=0, initial_concurrency=4)
+    calls = []
+
+    def chunks():
+        calls.append(1)
+        if len(calls) == 1:
+            raise _Throttled()
+        yield "ok"
+
+    assert list(scheduler.submit(chunks, model="m", key="k")) == ["ok"]
+    assert len(calls) == 2 and scheduler.total_retries == 1
+    assert _limiter(scheduler).limit < 4
+
+
+def test_throttle_mid_stream_shrinks_the_window():
+    scheduler = RequestScheduler(initial_concurrency=4)
+
+    def chunks():
+        yield "a"
+        raise _Throttled()
+
+    stream = scheduler.submit(chunks, model="m", key="k")
+    try:
+        list(stream)
+    except _Throttled:
+        pass
+    limiter = _limiter(scheduler)
+    assert limiter.in_flight == 0 and limiter.limit == 2 and scheduler.total_failures == 1
+
+
+def test_local_servers_get_separate_windows():
+    scheduler = RequestScheduler()
+    scheduler.submit(lambda: 1, model="m", key=endpoint_key("http://localhost:8080/api/v1"))
+    scheduler.submit(lambda: 1, model="m", key=endpoint_key("http://localhost:9090/api/v1", "secret-key-123456"))
+    assert len(scheduler._limiters) == 2
+    assert all("secret-key" not in name for name in scheduler.metrics()["models"])
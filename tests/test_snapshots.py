@@ -0,0 +1,101 @@
+import os
+import stat
+
+import pytest
+
+from sage.Core import snapshots
+from sage.Core.snapshots import SnapshotStore
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _checkpoint(store, changes):
+    """Apply {path: new text or None} as one recorded turn."""
+    checkpoint = store.begin()
+    for path, text in changes.items():
+        checkpoint.record(path)
+        if text is None:
+            os.unlink(path)
+        else:
+            with open(path, "w") as f:
+                f.write(text)
+    return store.commit(checkpoint, ", ".join(changes))
+
+
+def test_undo_redo_round_trip(project):
+    store = SnapshotStore()
+    (project / "a.txt").write_text("one")
+    assert _checkpoint(store, {"a.txt": "two", "b.txt": "new"}) == 1
+    result = store.undo()
+    assert sorted(result["restored"]) == ["a.txt", "b.txt"]
+    assert (project / "a.txt").read_text() == "one" and not (project / "b.txt").exists()
+    store.redo()
+    assert (project / "a.txt").read_text() == "two" and (project / "b.txt").read_text() == "new"
+    assert store.undo() and store.undo() is None
+
+
+def test_identical_content_is_stored_once(project):
+    store = SnapshotStore()
+    (project / "a.txt").write_text("same")
+    (project / "b.txt").write_text("same")
+    _checkpoint(store, {"a.txt": "x", "b.txt": "x"})
+    blobs = [p for p in (project / "Sage" / "objects").rglob("*") if p.is_file()]
+    assert len(blobs) == 2
+
+
+def test_undo_keeps_file_mode(project):
+    store = SnapshotStore()
+    script = project / "run.sh"
+    script.write_text("#!/bin/sh\necho one\n")
+    script.chmod(0o755)
+    _checkpoint(store, {"run.sh": "#!/bin/sh\necho two\n"})
+    store.undo()
+    assert stat.S_IMODE(script.stat().st_mode) == 0o755
+    store.redo()
+    assert stat.S_IMODE(script.stat().st_mode) == 0o755
+
+
+def test_deleted_file_comes_back_with_its_mode(project):
+    store = SnapshotStore()
+    script = project / "run.sh"
+    script.write_text("echo\n")
+    script.chmod(0o750)
+    _checkpoint(store, {"run.sh": None})
+    store.undo()
+    assert script.read_text() == "echo\n" and stat.S_IMODE(script.stat().st_mode) == 0o750
+
+
+def test_file_changed_since_is_skipped(project):
+    store = SnapshotStore()
+    (project / "a.txt").write_text("one")
+    _checkpoint(store, {"a.txt": "two"})
+    (project / "a.txt").write_text("user edit")
+    assert store.undo()["skipped"] == ["a.txt"]
+    assert (project / "a.txt").read_text() == "user edit"
+
+
+def test_failed_restore_changes_nothing(project, monkeypatch):
+    store = SnapshotStore()
+    (project / "a.txt").write_text("a1")
+    (project / "b.txt").write_text("b1")
+    _checkpoint(store, {"a.txt": "a2", "b.txt": "b2"})
+    real_replace = os.replace
+    calls = []
+
+    def flaky_replace(src, dst):
+        calls.append(dst)
+        if len(calls) == 2:
+            raise OSError("disk full")
+        real_replace(src, dst)
+
+    monkeypatch.setattr(snapshots.os, "replace", flaky_replace)
+    with pytest.raises(OSError):
+        store.undo()
+    monkeypatch.setattr(snapshots.os, "replace", real_replace)
+    assert (project / "a.txt").read_text() == "a2" and (project / "b.txt").read_text() == "b2"
+    assert store.list()["head"] == 1
+    assert not [p for p in project.iterdir() if p.name.endswith(".tmp")]
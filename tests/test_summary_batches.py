@@ -0,0 +1,53 @@
+import json
+from types import SimpleNamespace
+
+from sage.Core.backends import get_backend
+from sage.Core.models import context_chars
+from sage.Starters.AI_summerize import SUMMARY_REPLY_TOKENS, plan_batches, summarize_paths
+
+SMALL_MODEL = "google/gemma-2-9b-it:free"  # 8,192 tokens
+
+
+class _Client:
+    api_key = "test"
+
+    def __init__(self):
+        self.prompts = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, messages, **kwargs):
+        self.prompts.append(messages[-1]["content"])
+        reply = SimpleNamespace(content=json.dumps({}))
+        return SimpleNamespace(choices=[SimpleNamespace(message=reply)])
+
+
+def _files(tmp_path, count, size):
+    paths = []
+    for i in range(count):
+        (tmp_path / f"f{i}.txt").write_text("word " * (size // 5))
+        paths.append(f"f{i}.txt")
+    return paths
+
+
+def test_batches_fit_a_small_context_window(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    paths = _files(tmp_path, 10, 5000)
+    batches = plan_batches(paths, SMALL_MODEL, {path: "unsummarized" for path in paths})
+    assert len(batches) > 1 and sum(batches, []) == paths
+    assert len(plan_batches(paths, "unknown/huge", {})) == 1
+
+
+def test_batches_respect_summary_batch(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SAGE_SUMMARY_BATCH", "3")
+    paths = _files(tmp_path, 7, 10)
+    assert [len(batch) for batch in plan_batches(paths, "unknown/huge", {})] == [3, 3, 1]
+
+
+def test_batch_prompt_stays_inside_the_context_window(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SAGE_BACKEND", "mock")
+    paths = _files(tmp_path, 6, 5000)
+    client = _Client()
+    summarize_paths(client, SMALL_MODEL, paths, {path: "unsummarized" for path in paths}, get_backend())
+    assert len(client.prompts[0]) <= context_chars(SMALL_MODEL, SUMMARY_REPLY_TOKENS)
@@ -0,0 +1,53 @@
+import json
+from pathlib import Path
+
+from sage.Core.summary_worker import SummaryWorker
+
+
+class _Client:
+    closed = 0
+
+    def close(self):
+        _Client.closed += 1
+
+
+class _Backend:
+    created = 0
+
+    def create_client(self, api_key):
+        _Backend.created += 1
+        return _Client()
+
+
+def _interface(tmp_path):
+    (tmp_path / "a.py").write_text("import os\n\ndef f():\n    return 1\n")
+    interface_file = tmp_path / "Sage" / "interface.json"
+    interface_file.parent.mkdir()
+    interface_file.write_text(json.dumps({"a.py": "unsummarized"}))
+    return interface_file
+
+
+def test_local_pass_is_skipped_when_local_summaries_is_off(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SAGE_LOCAL_SUMMARIES", "false")
+    interface_file = _interface(tmp_path)
+    worker = SummaryWorker(interface_file=Path("Sage/interface.json"))
+    assert worker.queue_unsummarized() == 1
+    assert json.loads(interface_file.read_text()) == {"a.py": "unsummarized"}
+    assert worker.queue.get_nowait()[2] == "a.py"
+
+
+def test_local_pass_runs_when_local_summaries_is_on(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    interface_file = _interface(tmp_path)
+    SummaryWorker(interface_file=Path("Sage/interface.json")).queue_unsummarized()
+    assert isinstance(json.loads(interface_file.read_text())["a.py"], dict)
+
+
+def test_one_client_per_worker_closed_on_stop():
+    _Backend.created = _Client.closed = 0
+    worker = SummaryWorker()
+    first = worker._get_client(_Backend(), None)
+    assert worker._get_client(_Backend(), None) is first
+    worker.stop()
+    assert _Backend.created == 1 and _Client.closed == 1 and worker.client is None
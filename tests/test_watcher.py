@@ -0,0 +1,45 @@
+import errno
+import os
+
+import pytest
+
+from sage.Core.watcher import FileWatcher, _Debouncer, _InotifyBackend, _PollingBackend
+
+
+def _inotify_fds():
+    return sum(os.readlink(f"/proc/self/fd/{fd}") == "anon_inode:inotify"
+               for fd in os.listdir("/proc/self/fd") if os.path.exists(f"/proc/self/fd/{fd}"))
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs Linux /proc")
+def test_inotify_fd_is_closed_when_watching_the_tree_fails(tmp_path, monkeypatch):
+    def add_tree(self, rel_dir, report_files=False):
+        raise OSError(errno.ENOSPC, "no space for watches")
+
+    monkeypatch.setattr(_InotifyBackend, "_add_tree", add_tree)
+    before = _inotify_fds()
+    with pytest.raises(OSError):
+        _InotifyBackend(tmp_path, lambda rel: False, _Debouncer(0.1, lambda paths, dirs: None))
+    assert _inotify_fds() == before
+
+
+class _BrokenBackend:
+    closed = False
+
+    def poll(self, timeout):
+        raise OSError("inotify read failed")
+
+    def close(self):
+        self.closed = True
+
+
+def test_failed_poll_falls_back_to_polling(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    file_watcher = FileWatcher(tmp_path, poll_interval=0.05)
+    broken = file_watcher.backend = _BrokenBackend()
+    file_watcher.thread.start()
+    file_watcher.thread.join(0.5)
+    file_watcher.stop()
+    file_watcher.thread.join(2)
+    assert not file_watcher.thread.is_alive()
+    assert broken.closed and isinstance(file_watcher.backend, _PollingBackend)